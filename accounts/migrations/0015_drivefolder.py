@@ -0,0 +1,26 @@
+# Generated by Django 5.2.7 on 2026-10-18 12:09
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('accounts', '0014_assessment_topic'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='DriveFolder',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('parent_id', models.CharField(blank=True, default='', max_length=128)),
+                ('name', models.CharField(max_length=255)),
+                ('drive_id', models.CharField(max_length=128, unique=True)),
+                ('created_at', models.DateTimeField(auto_now_add=True)),
+            ],
+            options={
+                'unique_together': {('parent_id', 'name')},
+            },
+        ),
+    ]
@@ -0,0 +1,27 @@
+# Generated by Django 5.2.7 on 2026-10-18 12:13
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('accounts', '0015_drivefolder'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='DriveFile',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('drive_id', models.CharField(max_length=128, unique=True)),
+                ('parent_id', models.CharField(db_index=True, max_length=128)),
+                ('name', models.CharField(max_length=512)),
+                ('mime_type', models.CharField(max_length=255)),
+                ('md5_checksum', models.CharField(blank=True, default='', max_length=32)),
+                ('size', models.BigIntegerField(blank=True, null=True)),
+                ('modified_time', models.DateTimeField(blank=True, null=True)),
+                ('updated_at', models.DateTimeField(auto_now=True)),
+            ],
+        ),
+    ]
@@ -0,0 +1,22 @@
+# Generated by Django 5.2.7 on 2026-10-18 12:20
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('accounts', '0016_drivefile'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='DriveSyncState',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('page_token', models.CharField(blank=True, default='', max_length=255)),
+                ('synced_at', models.DateTimeField(blank=True, null=True)),
+                ('bootstrapped_at', models.DateTimeField(blank=True, null=True)),
+            ],
+        ),
+    ]
@@ -0,0 +1,29 @@
+# Generated by Django 5.2.7 on 2026-10-18 12:33
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('accounts', '0018_job'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='ContentDerivative',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('file_id', models.CharField(max_length=255)),
+                ('version', models.CharField(max_length=64)),
+                ('kind', models.CharField(max_length=32)),
+                ('extractor', models.CharField(max_length=64)),
+                ('data', models.BinaryField()),
+                ('text_length', models.PositiveIntegerField(default=0)),
+                ('created_at', models.DateTimeField(auto_now_add=True)),
+            ],
+            options={
+                'constraints': [models.UniqueConstraint(fields=('file_id', 'version', 'kind', 'extractor'), name='unique_content_derivative')],
+            },
+        ),
+    ]
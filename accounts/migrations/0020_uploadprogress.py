@@ -0,0 +1,31 @@
+# Generated by Django 5.2.7 on 2026-10-18 12:48
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('accounts', '0019_contentderivative'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='UploadProgress',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('batch_id', models.CharField(max_length=64)),
+                ('owner_id', models.IntegerField(blank=True, null=True)),
+                ('position', models.PositiveIntegerField()),
+                ('name', models.CharField(max_length=512)),
+                ('sent', models.BigIntegerField(default=0)),
+                ('size', models.BigIntegerField(blank=True, null=True)),
+                ('status', models.CharField(default='uploading', max_length=16)),
+                ('error', models.TextField(blank=True, default='')),
+                ('updated_at', models.DateTimeField(auto_now=True, db_index=True)),
+            ],
+            options={
+                'constraints': [models.UniqueConstraint(fields=('batch_id', 'position'), name='unique_upload_progress')],
+            },
+        ),
+    ]
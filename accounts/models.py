@@ -2,6 +2,7 @@
 
 from django.contrib.auth.models import AbstractUser
 from django.db import models
+from django.utils import timezone
 from django.db.models import UniqueConstraint
 
 # Syllabus
@@ -346,6 +347,146 @@ class DmMessage(models.Model):
     def __str__(self):
         return f"DM msg by {self.sender.username} at {self.created_at:%Y-%m-%d %H:%M}"
 
+
+# ---------- Google Drive Index --------------------------------------------------------------------------------
+
+class DriveFolder(models.Model):
+    """
+    Maps a (parent folder, folder name) pair to its Google Drive folder ID,
+    so resolving a known folder path needs no Drive calls.
+    """
+    parent_id = models.CharField(max_length=128, blank=True, default="")  # "" = no parent constraint (top level)
+    name = models.CharField(max_length=255)
+    drive_id = models.CharField(max_length=128, unique=True)
+    created_at = models.DateTimeField(auto_now_add=True)
+
+    class Meta:
+        unique_together = ('parent_id', 'name')
+
+    def __str__(self):
+        return f"{self.name} → {self.drive_id}"
+
+
+class DriveFile(models.Model):
+    """Metadata of a file stored in Google Drive, so listings don't need a Drive call."""
+    drive_id = models.CharField(max_length=128, unique=True)
+    parent_id = models.CharField(max_length=128, db_index=True)
+    name = models.CharField(max_length=512)
+    mime_type = models.CharField(max_length=255)
+    md5_checksum = models.CharField(max_length=32, blank=True, default="")
+    size = models.BigIntegerField(blank=True, null=True)
+    modified_time = models.DateTimeField(blank=True, null=True)
+    updated_at = models.DateTimeField(auto_now=True)
+
+    def as_drive_metadata(self):
+        """The file in the shape the Drive API returns it (id, name, mimeType, parents, ...)."""
+        metadata = {
+            "id": self.drive_id,
+            "name": self.name,
+            "mimeType": self.mime_type,
+            "parents": [self.parent_id] if self.parent_id else [],
+        }
+        if self.md5_checksum:
+            metadata["md5Checksum"] = self.md5_checksum
+        if self.size is not None:
+            metadata["size"] = str(self.size)
+        if self.modified_time:
+            metadata["modifiedTime"] = self.modified_time.isoformat()
+        return metadata
+
+    def __str__(self):
+        return f"{self.name} ({self.drive_id})"
+
+
+class DriveSyncState(models.Model):
+    """Where the Drive change-feed sync left off (a single row)."""
+    page_token = models.CharField(max_length=255, blank=True, default="")  # next changes.list page to read
+    synced_at = models.DateTimeField(blank=True, null=True)  # last time the feed was read to the end
+    bootstrapped_at = models.DateTimeField(blank=True, null=True)  # last full crawl of oer_content
+
+    def __str__(self):
+        return f"Drive sync at {self.synced_at} (token {self.page_token})"
+
+class ContentDerivative(models.Model):
+    """
+    Text derived from a stored file (PDF text, video transcript), kept so that
+    re-evaluations skip the download and extraction. A new file version or
+    extractor version simply gets a new row.
+    """
+    file_id = models.CharField(max_length=255)  # content store file ID
+    version = models.CharField(max_length=64)  # md5Checksum of the file (modifiedTime if it has none)
+    kind = models.CharField(max_length=32)  # "pdf_text", "transcript", ...
+    extractor = models.CharField(max_length=64)  # extractor and its version, e.g. "pypdf2/1"
+    data = models.BinaryField()  # zlib-compressed UTF-8 text
+    text_length = models.PositiveIntegerField(default=0)
+    created_at = models.DateTimeField(auto_now_add=True)
+
+    class Meta:
+        constraints = [
+            UniqueConstraint(fields=["file_id", "version", "kind", "extractor"], name="unique_content_derivative"),
+        ]
+
+    def __str__(self):
+        return f"{self.kind} of {self.file_id} ({self.extractor})"
+
+
+class Job(models.Model):
+    """
+    A unit of background work, run by `manage.py run_job_worker`. Workers claim
+    due jobs with SELECT ... FOR UPDATE SKIP LOCKED, so several can poll the
+    table at once without handing the same job out twice.
+    """
+    STATUS_CHOICES = [
+        ("queued", "Queued"),
+        ("running", "Running"),
+        ("done", "Done"),
+        ("failed", "Failed"),
+    ]
+
+    kind = models.CharField(max_length=64)  # key of settings.JOB_HANDLERS
+    payload = models.JSONField(default=dict)
+    status = models.CharField(max_length=16, choices=STATUS_CHOICES, default="queued")
+    attempts = models.PositiveIntegerField(default=0)
+    max_attempts = models.PositiveIntegerField(default=5)
+    run_after = models.DateTimeField(default=timezone.now)  # not claimed before this (retry backoff)
+    locked_until = models.DateTimeField(blank=True, null=True)  # a running job past this is claimable again
+    locked_by = models.CharField(max_length=128, blank=True, default="")
+    last_error = models.TextField(blank=True, default="")
+    result = models.JSONField(blank=True, null=True)
+    created_at = models.DateTimeField(auto_now_add=True)
+    updated_at = models.DateTimeField(auto_now=True)
+
+    class Meta:
+        indexes = [models.Index(fields=["status", "run_after"])]
+
+    def __str__(self):
+        return f"{self.kind} #{self.pk} ({self.status}, attempt {self.attempts}/{self.max_attempts})"
+
+
+class UploadProgress(models.Model):
+    """
+    How far one file of an upload batch has got (see drive_upload.UploadBatchProgress).
+    Kept in the database so that whichever worker process answers the page's
+    polls sees the process that is sending the file.
+    """
+    batch_id = models.CharField(max_length=64)  # chosen by the upload page
+    owner_id = models.IntegerField(blank=True, null=True)  # user who started the batch
+    position = models.PositiveIntegerField()  # order of the file in the batch
+    name = models.CharField(max_length=512)
+    sent = models.BigIntegerField(default=0)  # bytes Drive has acknowledged
+    size = models.BigIntegerField(blank=True, null=True)  # known once the file is stored
+    status = models.CharField(max_length=16, default="uploading")  # "uploading", "done" or "error"
+    error = models.TextField(blank=True, default="")
+    updated_at = models.DateTimeField(auto_now=True, db_index=True)
+
+    class Meta:
+        constraints = [
+            UniqueConstraint(fields=["batch_id", "position"], name="unique_upload_progress"),
+        ]
+
+    def __str__(self):
+        return f"{self.name} in batch {self.batch_id} ({self.status})"
+
 # python manage.py makemigrations
 # python manage.py migrate
 
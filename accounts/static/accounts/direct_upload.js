@@ -0,0 +1,83 @@
+// Browser-direct uploads to Google Drive.
+// The server opens a resumable-upload session in the right topic folder; the browser
+// then PUTs the file to Drive in chunks, so the bytes never pass through Django.
+// Needs md5.js.
+
+const DIRECT_UPLOAD_CHUNK = 8 * 1024 * 1024;  // must be a multiple of 256 KiB
+const DIRECT_UPLOAD_RETRIES = 5;
+const DIRECT_UPLOAD_CONCURRENCY = 3;  // files uploaded to Drive at the same time
+
+async function postJson(url, payload, csrfToken) {
+    const res = await fetch(url, {
+        method: 'POST',
+        headers: { 'Content-Type': 'application/json', 'X-CSRFToken': csrfToken },
+        body: JSON.stringify(payload)
+    });
+    const data = await res.json();
+    if (!res.ok) throw new Error(data.error || `Request failed (${res.status})`);
+    return data;
+}
+
+// Ask Drive how many bytes of the session it already has.
+async function committedBytes(sessionUri, total) {
+    const res = await fetch(sessionUri, { method: 'PUT', headers: { 'Content-Range': `bytes */${total}` } });
+    if (res.status === 200 || res.status === 201) return { done: await res.json() };
+    const range = res.headers.get('Range');
+    return { offset: range ? parseInt(range.split('-')[1], 10) + 1 : 0 };
+}
+
+async function directUpload(file, options) {
+    const { sessionUrl, completeUrl, csrfToken, contentType, topic, onProgress } = options;
+
+    // With the checksum the server can spot a file the folder already holds and skip the transfer
+    const session = await postJson(sessionUrl, {
+        name: file.name, mime_type: file.type, content_type: contentType, topic: topic,
+        md5: await md5OfFile(file), size: file.size
+    }, csrfToken);
+    if (session.duplicate) {
+        if (onProgress) onProgress(file, file.size);
+        return { success: true, file: session.file, duplicate: true };
+    }
+
+    let offset = 0;
+    let driveFile = null;
+    let failures = 0;
+    while (!driveFile) {
+        const end = Math.min(offset + DIRECT_UPLOAD_CHUNK, file.size);
+        try {
+            const res = await fetch(session.session_uri, {
+                method: 'PUT',
+                headers: { 'Content-Range': file.size ? `bytes ${offset}-${end - 1}/${file.size}` : 'bytes */0' },
+                body: file.slice(offset, end)
+            });
+            if (res.status === 200 || res.status === 201) {
+                driveFile = await res.json();
+            } else if (res.status === 308) {
+                const range = res.headers.get('Range');
+                offset = range ? parseInt(range.split('-')[1], 10) + 1 : 0;
+                failures = 0;
+            } else if (res.status >= 500 || res.status === 429) {
+                throw new Error(`Drive returned ${res.status}`);
+            } else {
+                throw Object.assign(new Error(`Drive rejected the upload (${res.status})`), { fatal: true });
+            }
+        } catch (err) {
+            if (err.fatal || ++failures > DIRECT_UPLOAD_RETRIES) throw err;
+            await new Promise(r => setTimeout(r, 1000 * 2 ** failures));
+            const status = await committedBytes(session.session_uri, file.size);
+            if (status.done) driveFile = status.done; else offset = status.offset;
+        }
+        if (onProgress) onProgress(file, driveFile ? file.size : offset);
+    }
+
+    return postJson(completeUrl, { upload_id: session.upload_id, file_id: driveFile.id }, csrfToken);
+}
+
+// Run worker(item) over items with at most `limit` in flight; rejects on the first failure.
+async function runWithConcurrency(items, limit, worker) {
+    const queue = [...items];
+    const runners = Array.from({ length: Math.min(limit, queue.length) }, async () => {
+        while (queue.length) await worker(queue.shift());
+    });
+    await Promise.all(runners);
+}
@@ -0,0 +1,79 @@
+// Incremental MD5 (RFC 1321), so the page can compare a file against Drive's
+// md5Checksum before uploading it. WebCrypto has no MD5, hence this.
+
+const MD5_SHIFTS = [
+    7, 12, 17, 22, 7, 12, 17, 22, 7, 12, 17, 22, 7, 12, 17, 22,
+    5, 9, 14, 20, 5, 9, 14, 20, 5, 9, 14, 20, 5, 9, 14, 20,
+    4, 11, 16, 23, 4, 11, 16, 23, 4, 11, 16, 23, 4, 11, 16, 23,
+    6, 10, 15, 21, 6, 10, 15, 21, 6, 10, 15, 21, 6, 10, 15, 21
+];
+const MD5_CONSTANTS = Array.from({ length: 64 }, (_, i) => Math.floor(Math.abs(Math.sin(i + 1)) * 2 ** 32) >>> 0);
+
+class Md5 {
+    constructor() {
+        this.state = [0x67452301, 0xefcdab89, 0x98badcfe, 0x10325476];
+        this.block = new Uint8Array(64);
+        this.blockLength = 0;
+        this.length = 0;  // bytes hashed so far
+        this.words = new Uint32Array(16);
+    }
+
+    update(bytes) {
+        let i = 0;
+        this.length += bytes.length;
+        while (i < bytes.length) {
+            const take = Math.min(64 - this.blockLength, bytes.length - i);
+            this.block.set(bytes.subarray(i, i + take), this.blockLength);
+            this.blockLength += take;
+            i += take;
+            if (this.blockLength === 64) {
+                this._compress(this.block);
+                this.blockLength = 0;
+            }
+        }
+        return this;
+    }
+
+    hex() {
+        const bits = this.length * 8;
+        const padding = new Uint8Array((this.blockLength < 56 ? 56 : 120) - this.blockLength + 8);
+        padding[0] = 0x80;
+        const view = new DataView(padding.buffer);
+        view.setUint32(padding.length - 8, bits >>> 0, true);
+        view.setUint32(padding.length - 4, Math.floor(bits / 2 ** 32), true);
+        this.update(padding);
+        return this.state.map(word => [0, 8, 16, 24]
+            .map(shift => ((word >>> shift) & 0xff).toString(16).padStart(2, '0')).join('')).join('');
+    }
+
+    _compress(block) {
+        const w = this.words;
+        for (let i = 0; i < 16; i++) {
+            w[i] = block[i * 4] | (block[i * 4 + 1] << 8) | (block[i * 4 + 2] << 16) | (block[i * 4 + 3] << 24);
+        }
+        let [a, b, c, d] = this.state;
+        for (let i = 0; i < 64; i++) {
+            let f, g;
+            if (i < 16) { f = (b & c) | (~b & d); g = i; }
+            else if (i < 32) { f = (d & b) | (~d & c); g = (5 * i + 1) % 16; }
+            else if (i < 48) { f = b ^ c ^ d; g = (3 * i + 5) % 16; }
+            else { f = c ^ (b | ~d); g = (7 * i) % 16; }
+            const sum = (a + f + MD5_CONSTANTS[i] + w[g]) >>> 0;
+            a = d; d = c; c = b;
+            b = (b + ((sum << MD5_SHIFTS[i]) | (sum >>> (32 - MD5_SHIFTS[i])))) >>> 0;
+        }
+        this.state = [
+            (this.state[0] + a) >>> 0, (this.state[1] + b) >>> 0,
+            (this.state[2] + c) >>> 0, (this.state[3] + d) >>> 0
+        ];
+    }
+}
+
+// Hex MD5 of a File or Blob, read a few megabytes at a time.
+async function md5OfFile(file, chunkSize = 4 * 1024 * 1024) {
+    const md5 = new Md5();
+    for (let offset = 0; offset < file.size; offset += chunkSize) {
+        md5.update(new Uint8Array(await file.slice(offset, offset + chunkSize).arrayBuffer()));
+    }
+    return md5.hex();
+}
@@ -1,3 +1,78 @@
-from django.test import TestCase
+from unittest import mock
 
-# Create your tests here.
+from django.core.files.uploadedfile import SimpleUploadedFile, UploadedFile
+from django.core.files.uploadhandler import FileUploadHandler, StopFutureHandlers
+from django.test import Client, TestCase
+from django.urls import reverse
+
+from accounts.views.contributor import submit_content
+from accounts.views.contributor.submit_content import parse_upload_hashes
+
+
+class ParseUploadHashesTests(TestCase):
+    def test_reads_name_to_md5_and_size(self):
+        md5 = "0123456789abcdef0123456789ABCDEF"
+        self.assertEqual(
+            parse_upload_hashes('{"notes.pdf": "%s:1024"}' % md5),
+            {"notes.pdf": (md5.lower(), 1024)},
+        )
+
+    def test_skips_bad_entries(self):
+        self.assertEqual(
+            parse_upload_hashes('{"short.pdf": "abc:10", "nosize.pdf": "%s:", "neg.pdf": "%s:-1"}' % ("a" * 32, "a" * 32)),
+            {},
+        )
+
+    def test_ignores_missing_or_malformed_parameter(self):
+        self.assertEqual(parse_upload_hashes(None), {})
+        self.assertEqual(parse_upload_hashes("not json"), {})
+        self.assertEqual(parse_upload_hashes('["a", "b"]'), {})
+
+
+class _FakeStreamingHandler(FileUploadHandler):
+    """Stands in for DriveStreamingUploadHandler: collects the body instead of sending it to Drive."""
+
+    received = []
+
+    def __init__(self, request, **kwargs):
+        super().__init__(request)
+
+    def new_file(self, *args, **kwargs):
+        super().new_file(*args, **kwargs)
+        self.data = b""
+        raise StopFutureHandlers()
+
+    def receive_data_chunk(self, raw_data, start):
+        self.data += raw_data
+        return None
+
+    def file_complete(self, file_size):
+        type(self).received.append((self.file_name, self.data))
+        uploaded = UploadedFile(None, self.file_name, self.content_type, file_size)
+        uploaded.drive_file = {"id": "drive-1", "name": self.file_name}
+        return uploaded
+
+
+class UploadFilesStreamingTests(TestCase):
+    def setUp(self):
+        _FakeStreamingHandler.received = []
+        # CSRF checks on: they must not parse the body before the streaming handler is installed
+        self.client = Client(enforce_csrf_checks=True)
+        session = self.client.session
+        session.update({"contributor_id": 7, "course_id": 1, "chapter_id": 1, "chapter_number": 2})
+        session.save()
+
+    def test_files_go_through_the_streaming_handler(self):
+        store = mock.Mock(streams_uploads=True)
+        with mock.patch.object(submit_content, "get_content_store", return_value=store), \
+                mock.patch.object(submit_content, "DriveStreamingUploadHandler", _FakeStreamingHandler), \
+                mock.patch.object(submit_content, "register_drive_file") as register:
+            response = self.client.post(
+                reverse("upload_files") + "?topic=Intro",
+                {"pdf_file": SimpleUploadedFile("notes.pdf", b"%PDF-1.4 body", content_type="application/pdf")},
+            )
+
+        self.assertEqual(response.status_code, 302)
+        self.assertEqual(_FakeStreamingHandler.received, [("notes.pdf", b"%PDF-1.4 body")])
+        register.assert_called_once_with({"id": "drive-1", "name": "notes.pdf"})
+        store.save.assert_not_called()
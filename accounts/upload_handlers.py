@@ -0,0 +1,138 @@
+# OER/accounts/upload_handlers.py
+
+from django.conf import settings
+from django.core.files.uploadedfile import UploadedFile
+from django.core.files.uploadhandler import FileUploadHandler, StopFutureHandlers
+from googleapiclient.errors import HttpError
+
+from langgraph_agents.services.drive_layout import resolve_upload_target
+from langgraph_agents.services.drive_resilience import DriveUnavailableError
+from langgraph_agents.services.drive_service import get_drive_service, forget_drive_folder
+from langgraph_agents.services.drive_upload import (
+    ResumableDriveUpload, BackgroundDriveUpload, DriveUploadError, KnownCopyUpload, find_existing_copy,
+)
+
+
+class DriveUploadedFile(UploadedFile):
+    """A file that was streamed straight to Google Drive while the request body was read."""
+
+    def __init__(self, background_upload, name, content_type, size, charset=None, content_type_extra=None):
+        super().__init__(None, name, content_type, size, charset, content_type_extra)
+        self.background_upload = background_upload
+
+    @property
+    def drive_file(self):
+        """Drive metadata (id, name, mimeType, size, md5Checksum, ...); waits for the upload to finish."""
+        return self.background_upload.result()
+
+    def close(self):
+        # Nothing local to close; if the request failed before the file was
+        # finished this cancels its Drive session (a no-op once it completed).
+        self.background_upload.abort()
+
+
+class DriveStreamingUploadHandler(FileUploadHandler):
+    """
+    Pipes the incoming chunks of selected multipart fields into Drive resumable
+    uploads: nothing is written to disk and memory per file stays bounded. Files
+    are sent in parallel on background sender threads; other fields fall through to
+    Django's default handlers.
+
+    resolve_folder(field_name) returns the Drive folder ID the file goes into
+    (a flat-layout folder ID is turned into the flat folder plus appProperties).
+    known_hashes maps a file name to the ``(md5, size)`` the page computed for it;
+    a file the folder already holds is then not sent to Drive at all.
+    """
+
+    def __init__(self, request, resolve_folder, field_mime_types, name_prefix="", progress=None, known_hashes=None):
+        super().__init__(request)
+        self.known_hashes = known_hashes or {}
+        self.resolve_folder = resolve_folder
+        self.field_mime_types = field_mime_types  # field name → fallback mime type
+        self.name_prefix = name_prefix
+        self.progress = progress  # optional UploadBatchProgress
+        self.upload = None
+
+    def new_file(self, field_name, file_name, content_type, content_length, charset=None, content_type_extra=None):
+        super().new_file(field_name, file_name, content_type, content_length, charset, content_type_extra)
+        self.upload = None
+        if field_name not in self.field_mime_types:
+            return
+
+        try:
+            upload = self._start_upload(field_name, file_name, content_type)
+        except (HttpError, DriveUnavailableError, OSError) as e:
+            # Drive trouble while resolving the folder: report it like any other failed upload
+            raise DriveUploadError(f"Could not start the Drive upload of {file_name}: {e}") from e
+
+        on_done = None
+        if self.progress:
+            file_key = self.progress.add_file(file_name)
+            upload.on_progress = lambda sent: self.progress.update(file_key, sent=sent)
+            on_done = lambda drive_file, error: self.progress.update(
+                file_key,
+                status="error" if error else "done",
+                error=str(error) if error else None,
+                size=int(drive_file.get("size") or 0) if drive_file else None,
+            )
+
+        if isinstance(upload, KnownCopyUpload):
+            upload.on_done = on_done
+            self.upload = upload
+        else:
+            print(f"[UPLOAD] Streaming {file_name} to Drive folder {upload.parent_id}")
+            # Sent from a sender thread if one is free, so this file keeps going while the next one streams in
+            self.upload = BackgroundDriveUpload(upload, on_done=on_done)
+        raise StopFutureHandlers()
+
+    def _start_upload(self, field_name, file_name, content_type):
+        service = get_drive_service()
+        parent_id, app_properties = resolve_upload_target(service, self.resolve_folder(field_name))
+        name = f"{self.name_prefix}{file_name}"
+
+        known = self.known_hashes.get(file_name)
+        if known and settings.DRIVE_UPLOAD_DEDUPE:
+            existing = find_existing_copy(service, parent_id, known[0], known[1], app_properties)
+            if existing:
+                return KnownCopyUpload(name, existing, *known)
+
+        upload = ResumableDriveUpload(
+            name=name,
+            parent_id=parent_id,
+            mime_type=content_type or self.field_mime_types[field_name],
+            app_properties=app_properties,
+            dedupe=settings.DRIVE_UPLOAD_DEDUPE,
+        )
+        try:
+            upload.start()
+        except DriveUploadError as e:
+            if e.status != 404:
+                raise
+            # Indexed folder no longer exists in Drive: drop it and resolve again
+            forget_drive_folder(upload.parent_id)
+            upload.parent_id, upload.app_properties = resolve_upload_target(
+                get_drive_service(), self.resolve_folder(field_name)
+            )
+            upload.start()
+        return upload
+
+    def receive_data_chunk(self, raw_data, start):
+        if self.upload is None:
+            return raw_data
+        self.upload.write(raw_data)
+        return None
+
+    def file_complete(self, file_size):
+        if self.upload is None:
+            return None
+        upload, self.upload = self.upload, None
+        upload.close()
+        return DriveUploadedFile(
+            upload, self.file_name, self.content_type, file_size,
+            self.charset, self.content_type_extra,
+        )
+
+    def upload_interrupted(self):
+        if self.upload is not None:
+            self.upload.abort()
+            self.upload = None
@@ -2,9 +2,10 @@ from django.urls import path
 from .views import views
 from .views.contributor import generate_expertise
 from .views.contributor.contributor_dashboard import contributor_dashboard_view, contributor_submit_content_view, contributor_profile
-from .views.contributor.submit_content import upload_files, load_file, contributor_editor, delete_drive_file, \
-    confirm_submission, submit_assessment, gemini_chat, contributor_upload_file, \
-    generate_assessment, after_submission, final_submission
+from .views.contributor.submit_content import upload_files, load_file, serve_file, stream_file, contributor_editor, \
+    delete_drive_file, confirm_submission, submit_assessment, gemini_chat, contributor_upload_file, \
+    generate_assessment, after_submission, final_submission, create_upload_session, complete_upload_session, \
+    upload_progress, drive_metrics_view, job_status
 from .views.home.home import about, contact
 from .views.home.subjects import subject_view, chapter_view
 from .views.forum import (
@@ -29,8 +30,15 @@ urlpatterns = [
     path('dashboard/contributor/submit_content/', contributor_submit_content_view, name='contributor_submit_content_view'),
     path('dashboard/contributor/submit_content/upload/submission', contributor_upload_file, name='contributor_upload_file'),
     path('dashboard/contributor/submit_content/upload', upload_files, name='upload_files'),
+    path('dashboard/contributor/submit_content/upload/progress', upload_progress, name='upload_progress'),
+    path('dashboard/drive/metrics', drive_metrics_view, name='drive_metrics'),
+    path('dashboard/contributor/submit_content/job/<int:job_id>', job_status, name='job_status'),
+    path('dashboard/contributor/submit_content/upload/session', create_upload_session, name='create_upload_session'),
+    path('dashboard/contributor/submit_content/upload/complete', complete_upload_session, name='complete_upload_session'),
     path('dashboard/contributor/submit_content/uploadDraft', contributor_editor, name='contributor_editor'),
     path('dashboard/contributor/submit_content/load_file', load_file, name='load_file'),  # needed for JS
+    path('dashboard/contributor/submit_content/file', serve_file, name='serve_file'),
+    path('dashboard/contributor/submit_content/stream', stream_file, name='stream_file'),
     path('dashboard/contributor/submit_content/delete_file', delete_drive_file, name='delete_drive_file'),  # needed for JS
     path('dashboard/contributor/submit_content/submit_assessment', submit_assessment, name='submit_assessment'),
     path('dashboard/contributor/submit_content/gemini_chat', gemini_chat, name='gemini_chat'),
@@ -5,7 +5,8 @@ from django.conf import settings
 from django.contrib.auth.decorators import login_required
 from django.shortcuts import render, get_object_or_404, redirect
 
-from .submit_content import get_drive_service, get_or_create_drive_folder
+from langgraph_agents.services.drive_service import reset_drive_service
+from langgraph_agents.services.contributor_files import list_contributor_files
 from ...models import Expertise, Course, Chapter, UploadCheck
 
 
@@ -266,38 +267,10 @@ def contributor_submit_content_view(request):
     })
 
     try:
-        # 🔹 Initialize Drive service
-        service = get_drive_service()
-        oer_root_id = get_or_create_drive_folder(service, "oer_content")
-
-        # --- Helper to fetch files from Drive ---
-        def get_files_from_folder(folder_type):
-            folder_name = f"{contributor_id}_{course.id}_{chapter.chapter_number}"
-            root_folder_id = get_or_create_drive_folder(service, settings.GOOGLE_DRIVE_FOLDERS[folder_type], oer_root_id)
-
-            # Find or create contributor folder
-            query = f"mimeType='application/vnd.google-apps.folder' and name='{folder_name}' and '{root_folder_id}' in parents and trashed=false"
-            folders = service.files().list(q=query, fields="files(id, name)").execute().get('files', [])
-            files_list = []
-
-            if folders:
-                folder_id = folders[0]['id']
-                results = service.files().list(
-                    q=f"'{folder_id}' in parents and trashed=false",
-                    fields="files(id, name, mimeType)"
-                ).execute()
-                for f in results.get('files', []):
-                    files_list.append({
-                        'id': f['id'],
-                        'name': f['name'],
-                        'mimeType': f['mimeType'],
-                        'type': folder_type
-                    })
-            return files_list
-
-        files = []
-        for folder_type in ['drafts', 'pdf', 'videos', 'assessments']:
-            files.extend(get_files_from_folder(folder_type))
+        # 🔹 Folder chains are resolved concurrently, then listed with one Drive query
+        files = list_contributor_files(
+            contributor_id, course.id, chapter.chapter_number, ['drafts', 'pdf', 'videos', 'assessments']
+        )
 
     except RefreshError as e:
         # 🔹 Token expired or revoked → delete it and ask user to reauthorize
@@ -305,6 +278,7 @@ def contributor_submit_content_view(request):
         token_path = os.path.join(settings.BASE_DIR, 'token.json')
         if os.path.exists(token_path):
             os.remove(token_path)
+        reset_drive_service()
         messages.error(request, "⚠️ Your Google Drive session has expired. Please reconnect.")
         return redirect('contributor_submit_content_view')  # Will trigger re-login
 
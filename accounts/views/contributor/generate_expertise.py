@@ -80,7 +80,7 @@
 
 
 from ...models import Program, Course, Expertise
-from sentence_transformers import SentenceTransformer, util
+from langgraph_agents.services.inference import embed_texts
 from sklearn.cluster import AgglomerativeClustering
 import numpy as np
 import re
@@ -97,7 +97,6 @@ def generate_expertise(min_courses=3, similarity_threshold=0.45):
     course names + objectives + outcomes.
     """
     print("🚀 Starting smart expertise generation...")
-    model = SentenceTransformer('all-MiniLM-L6-v2')
 
     for program in Program.objects.all():
         print(f"\n🔹 Processing Program: {program.program_name}")
@@ -115,7 +114,8 @@ def generate_expertise(min_courses=3, similarity_threshold=0.45):
             full_text = f"{c.course_name}. {objectives_text}. {outcomes_text}"
             course_texts.append(full_text.strip())
 
-        embeddings = model.encode(course_texts, normalize_embeddings=True)
+        # Encoded by the shared inference daemon (model loaded once, requests batched)
+        embeddings = embed_texts(course_texts, normalize=True)
 
         # Agglomerative clustering
         clustering = AgglomerativeClustering(
@@ -142,7 +142,8 @@ def generate_expertise(min_courses=3, similarity_threshold=0.45):
             idxs = [courses.index(c) for c in grouped_courses]
             cluster_embs = embeddings[idxs]
             centroid = np.mean(cluster_embs, axis=0)
-            sims = util.cos_sim(centroid, cluster_embs)[0]
+            # Rows are unit vectors, so the dot product ranks them like cosine similarity
+            sims = cluster_embs @ centroid
             rep_idx = int(np.argmax(sims))
             rep_course = grouped_courses[rep_idx]
 
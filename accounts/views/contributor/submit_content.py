@@ -8,16 +8,19 @@ from django.shortcuts import render, redirect, get_object_or_404
 from django.contrib import messages
 from docx import Document
 
-from accounts.models import Chapter, UploadCheck, Assessment, Question, Option, Course
+from accounts.models import Chapter, UploadCheck, Assessment, Question, Option, Course, Job
+from accounts.upload_handlers import DriveStreamingUploadHandler
 from googleapiclient.discovery import build
 from googleapiclient.http import MediaFileUpload, MediaIoBaseUpload, MediaIoBaseDownload
 from google.oauth2.credentials import Credentials
 from django.conf import settings
 from django.views.decorators.csrf import csrf_exempt
-from django.http import JsonResponse, HttpResponseBadRequest
+from django.http import JsonResponse, HttpResponse, HttpResponseBadRequest, HttpResponseServerError, \
+    StreamingHttpResponse, Http404
 import os
 import tempfile
 import json
+import uuid
 import io
 from urllib.parse import unquote
 
@@ -26,8 +29,15 @@ import time
 
 from langgraph_agents.agents.submission_agent import submission_agent
 from langgraph_agents.graph.workflow import compiled_graph, graph
-from langgraph_agents.services.drive_service import get_drive_service, get_or_create_drive_folder
+from langgraph_agents.services.drive_service import get_drive_service, register_drive_file, is_not_found_error, \
+    DRIVE_FILE_FIELDS
+from langgraph_agents.services.content_store import get_content_store, parse_range_header
+from langgraph_agents.services.drive_resilience import drive_metrics
+from langgraph_agents.services.contributor_files import list_contributor_files
+from langgraph_agents.services.drive_upload import DriveUploadError, ResumableDriveUpload, UploadBatchProgress, \
+    find_existing_copy, reuse_existing_copy
 from langgraph_agents.services.gemini_service import llm
+from langgraph_agents.services.job_queue import enqueue_job
 
 from urllib.parse import unquote
 
@@ -37,8 +47,6 @@ def contributor_upload_file(request):
     chapter_id = request.GET.get('chapter_id')
     topic = unquote(request.GET.get('topic', ''))
 
-    service = get_drive_service()
-
     # Validate inputs
     if not all([course_id, chapter_id, topic]):
         return HttpResponseBadRequest("Missing course_id, chapter_id, or topic parameter")
@@ -73,79 +81,59 @@ def contributor_upload_file(request):
         "topic": topic,
     })
 
-    # Initialize Drive service
-    service = get_drive_service()
-    oer_root_id = get_or_create_drive_folder(service, "oer_content")
-
-    # Base folder name for contributor-chapter
-    base_folder_name = f"{contributor_id}_{course.id}_{chapter.chapter_number}"
-
-    # Helper: fetch files for a folder type and topic
-    def get_files_from_folder(folder_type):
-        try:
-            # 1️⃣ Find or create root subfolder (drafts/pdf/videos) under main OER folder
-            root_folder_id = get_or_create_drive_folder(
-                service, settings.GOOGLE_DRIVE_FOLDERS[folder_type], oer_root_id
-            )
-
-            # 2️⃣ Find contributor's folder inside that section
-            query = (
-                f"mimeType='application/vnd.google-apps.folder' "
-                f"and name='{base_folder_name}' "
-                f"and '{root_folder_id}' in parents and trashed=false"
-            )
-            folders = service.files().list(q=query, fields="files(id, name)").execute().get('files', [])
-            if not folders:
-                return []  # Contributor folder doesn’t exist
-
-            chapter_folder_id = folders[0]['id']
-
-            # 3️⃣ Now check for topic folder inside contributor’s folder
-            query_topic = (
-                f"mimeType='application/vnd.google-apps.folder' "
-                f"and name='{topic}' "
-                f"and '{chapter_folder_id}' in parents and trashed=false"
-            )
-            topic_folders = service.files().list(q=query_topic, fields="files(id, name)").execute().get('files', [])
-            if not topic_folders:
-                return []  # Topic folder doesn’t exist yet
-
-            topic_folder_id = topic_folders[0]['id']
-
-            # 4️⃣ Fetch all files under that topic folder
-            result = service.files().list(
-                q=f"'{topic_folder_id}' in parents and trashed=false",
-                fields="files(id, name, mimeType)"
-            ).execute()
-
-            files_list = []
-            for f in result.get('files', []):
-                files_list.append({
-                    'id': f['id'],
-                    'name': f['name'],
-                    'mimeType': f['mimeType'],
-                    'type': folder_type
-                })
-            return files_list
-
-        except Exception as e:
-            print(f"[Drive Fetch Error - {folder_type}] {e}")
-            return []
-
-    # Fetch all file types
-    files = []
-    for folder_type in ['drafts', 'pdf', 'videos']:
-        files.extend(get_files_from_folder(folder_type))
+    # Fetch all file types (folder chains resolved concurrently, one listing query)
+    try:
+        files = list_contributor_files(
+            contributor_id, course.id, chapter.chapter_number, ['drafts', 'pdf', 'videos'], topic=topic
+        )
+    except Exception as e:
+        print(f"[Drive Fetch Error] {e}")
+        files = []
 
     context = {
         "course": course,
         "chapter": chapter,
         "topic": topic,
         "files": files,
+        # Drive content is linked and uploaded to directly; other stores go through Django
+        "drive_store": get_content_store().streams_uploads,
     }
     return render(request, "contributor/contributor_upload_file.html", context)
 
 
+# Multipart fields streamed to Drive → (content type folder, fallback mime type)
+UPLOAD_FIELDS = {
+    'pdf_file': ("pdf", "application/pdf"),
+    'video_file': ("videos", "video/mp4"),
+}
+
+
+def ensure_topic_folder(contributor_id, course_id, chapter_number, folder_type, topic_name):
+    """oer_content → type root → {contributor}_{course}_{chapter} → topic, creating what's missing."""
+    path = ("oer_content", settings.GOOGLE_DRIVE_FOLDERS[folder_type], f"{contributor_id}_{course_id}_{chapter_number}")
+
+    safe_topic_name = (topic_name or "").strip().replace("/", "-").replace("\\", "-")
+    if safe_topic_name:
+        path += (safe_topic_name,)
+    return get_content_store().ensure_folder(path)
+
+
+def parse_upload_hashes(raw):
+    """{file name: (md5, size)} from the page's ``hashes`` parameter (JSON of name → "md5:size"); bad entries are skipped."""
+    try:
+        hashes = json.loads(raw or '{}')
+    except ValueError:
+        return {}
+    known = {}
+    for name, value in (hashes.items() if isinstance(hashes, dict) else []):
+        md5, _, size = str(value).partition(':')
+        if len(md5) == 32 and size.isdigit():
+            known[name] = (md5.lower(), int(size))
+    return known
+
+
+# Exempt: the CSRF check reads request.POST, which would parse the body before the
+# streaming upload handler below is installed
 @csrf_exempt
 def upload_files(request):
     """Upload PDFs or videos to Drive — organized by contributor, chapter, and topic (keep topic name intact)."""
@@ -153,95 +141,67 @@ def upload_files(request):
     course_id = request.session.get('course_id')
     chapter_number = request.session.get('chapter_number')
     chapter_name = request.session.get('chapter_name')
-    topic_name = (request.POST.get('topic') or request.GET.get('topic') or "").strip()
-    print(f"[UPLOAD] Chapter: {chapter_name}, Topic: '{topic_name}'")
 
     if request.method != "POST":
         return HttpResponseBadRequest("Invalid request")
 
-    service = get_drive_service()
-    oer_root_id = get_or_create_drive_folder(service, "oer_content")
+    # The topic must come from the query string: files are streamed to Drive while
+    # the body is parsed, before any POST field is readable.
+    upload_topic = (request.GET.get('topic') or "").strip()
+    print(f"[UPLOAD] Chapter: {chapter_name}, Topic: '{upload_topic}'")
 
-    base_folder_name = f"{contributor_id}_{course_id}_{chapter_number}"
-    safe_topic_name = topic_name.replace("/", "-").replace("\\", "-")
+    store = get_content_store()
+    resolve_folder = lambda field_name: ensure_topic_folder(
+        contributor_id, course_id, chapter_number, UPLOAD_FIELDS[field_name][0], upload_topic
+    )
 
-    # ✅ Read all files first before uploading
-    pdf_files = request.FILES.getlist('pdf_file')
-    video_files = request.FILES.getlist('video_file')
+    # Optional batch ID chosen by the page, so it can poll upload_progress meanwhile
+    batch_id = (request.GET.get('batch_id') or '')[:64]
+    progress = UploadBatchProgress(batch_id, request.user.id) if batch_id else None
+
+    if store.streams_uploads:
+        # Stream pdf/video parts straight into Drive resumable uploads (no temp files),
+        # several files in parallel
+        request.upload_handlers.insert(0, DriveStreamingUploadHandler(
+            request,
+            resolve_folder=resolve_folder,
+            field_mime_types={field: mime for field, (_, mime) in UPLOAD_FIELDS.items()},
+            name_prefix=f"{contributor_id}_",
+            progress=progress,
+            known_hashes=parse_upload_hashes(request.GET.get('hashes')),
+        ))
 
-    def get_or_create_nested_folder(service, parent_id, folder_name):
-        query = (
-            f"mimeType='application/vnd.google-apps.folder' "
-            f"and name='{folder_name}' "
-            f"and '{parent_id}' in parents and trashed=false"
-        )
-        results = service.files().list(q=query, fields="files(id, name)").execute()
-        folders = results.get("files", [])
-        if folders:
-            return folders[0]["id"]
-        folder_metadata = {
-            "name": folder_name,
-            "mimeType": "application/vnd.google-apps.folder",
-            "parents": [parent_id],
-        }
-        new_folder = service.files().create(body=folder_metadata, fields="id").execute()
-        return new_folder["id"]
-
-    def ensure_topic_folder(folder_type):
-        type_root = get_or_create_drive_folder(service, settings.GOOGLE_DRIVE_FOLDERS[folder_type], oer_root_id)
-        contrib_folder = get_or_create_nested_folder(service, type_root, base_folder_name)
-        if safe_topic_name:
-            topic_folder = get_or_create_nested_folder(service, contrib_folder, safe_topic_name)
-            return topic_folder
-        return contrib_folder
-
-    # =================== PDF UPLOAD ===================
-    if pdf_files:
-        topic_pdf_folder = ensure_topic_folder("pdf")
-        print(f"[UPLOAD] Uploading {len(pdf_files)} PDFs to folder ID {topic_pdf_folder}")
-        for pdf in pdf_files:
-            with tempfile.NamedTemporaryFile(delete=False, suffix=".pdf") as tmp:
-                for chunk in pdf.chunks():
-                    tmp.write(chunk)
-                tmp.flush()
-                tmp_path = tmp.name
-
-            media = MediaFileUpload(tmp_path, mimetype="application/pdf", resumable=False)
-            service.files().create(
-                body={'name': f"{contributor_id}_{pdf.name}", 'parents': [topic_pdf_folder]},
-                media_body=media,
-                fields='id'
-            ).execute()
-
-            try:
-                media._fd.close()
-                os.remove(tmp_path)
-            except Exception as e:
-                print(f"[ERROR] Could not delete temp file: {tmp_path}, {e}")
-
-    # =================== VIDEO UPLOAD ===================
-    if video_files:
-        topic_video_folder = ensure_topic_folder("videos")
-        print(f"[UPLOAD] Uploading {len(video_files)} videos to folder ID {topic_video_folder}")
-        for video in video_files:
-            with tempfile.NamedTemporaryFile(delete=False, suffix=".mp4") as tmp:
-                for chunk in video.chunks():
-                    tmp.write(chunk)
-                tmp.flush()
-                tmp_path = tmp.name
-
-            media = MediaFileUpload(tmp_path, mimetype="video/mp4", resumable=False)
-            service.files().create(
-                body={'name': f"{contributor_id}_{video.name}", 'parents': [topic_video_folder]},
-                media_body=media,
-                fields='id'
-            ).execute()
-
-            try:
-                media._fd.close()
-                os.remove(tmp_path)
-            except Exception as e:
-                print(f"[ERROR] Could not delete temp file: {tmp_path}, {e}")
+    try:
+        pdf_files = request.FILES.getlist('pdf_file')
+        video_files = request.FILES.getlist('video_file')
+    except DriveUploadError as e:
+        print(f"[ERROR] Streaming upload failed: {e}")
+        return HttpResponseServerError(f"Upload to Google Drive failed: {e}")
+
+    topic_name = (request.POST.get('topic') or upload_topic).strip()
+
+    # Wait for the uploads still running in the background (or store the files now
+    # when the content store doesn't stream)
+    failed = []
+    uploads = [('pdf_file', f) for f in pdf_files] + [('video_file', f) for f in video_files]
+    for field_name, uploaded in uploads:
+        try:
+            if store.streams_uploads:
+                stored_file = uploaded.drive_file
+                register_drive_file(stored_file)
+            else:
+                stored_file = store.save(
+                    resolve_folder(field_name), f"{contributor_id}_{uploaded.name}", uploaded,
+                    uploaded.content_type or UPLOAD_FIELDS[field_name][1],
+                )
+        except Exception as e:
+            print(f"[ERROR] Upload of {uploaded.name} failed: {e}")
+            failed.append(uploaded.name)
+            continue
+        print(f"[UPLOAD] {uploaded.name} ({uploaded.size} bytes) → file {stored_file['id']}")
+
+    if failed:
+        return HttpResponseServerError(f"Upload failed for: {', '.join(failed)}")
 
     # ✅ Redirect only after both are done
     messages.success(request, "Files uploaded to Google Drive successfully!")
@@ -268,11 +228,149 @@ def upload_files(request):
     # return render(request, "contributor/submit_content.html")
 
 
+def drive_metrics_view(request):
+    """This worker's Drive call counters (throttled, retried, failed, ...) and circuit state; staff only."""
+    if not request.user.is_staff:
+        return JsonResponse({'error': 'Staff only'}, status=403)
+    return JsonResponse(drive_metrics())
+
+
+def upload_progress(request):
+    """Per-file progress of an upload batch started by upload_files (polled by the upload page)."""
+    files = UploadBatchProgress.load(request.GET.get('batch_id'), request.user.id)
+    if files is None:
+        return JsonResponse({'error': 'Unknown upload batch'}, status=404)
+    return JsonResponse({
+        'files': files,
+        'done': all(f['status'] != 'uploading' for f in files),
+    })
+
+
+# ---------------- BROWSER-DIRECT UPLOADS ---------------- #
+@csrf_exempt
+def create_upload_session(request):
+    """
+    Open a Drive resumable-upload session in the contributor's topic folder and hand
+    its URI to the browser, which then PUTs the file bytes to Drive directly.
+    """
+    if request.method != "POST":
+        return JsonResponse({'error': 'POST required'}, status=405)
+    if not get_content_store().streams_uploads:
+        return JsonResponse({'error': 'Direct uploads need the Google Drive content store'}, status=400)
+
+    contributor_id = request.session.get('contributor_id')
+    course_id = request.session.get('course_id')
+    chapter_number = request.session.get('chapter_number')
+    if not all([contributor_id, course_id, chapter_number]):
+        return JsonResponse({'error': 'Missing session data'}, status=400)
+
+    try:
+        data = json.loads(request.body)
+    except ValueError:
+        return JsonResponse({'error': 'Invalid JSON'}, status=400)
+
+    file_name = (data.get('name') or "").strip()
+    folder_type = data.get('content_type', 'videos')
+    if not file_name or folder_type not in ('pdf', 'videos'):
+        return JsonResponse({'error': 'name and content_type (pdf or videos) are required'}, status=400)
+
+    try:
+        folder_id = ensure_topic_folder(contributor_id, course_id, chapter_number, folder_type, data.get('topic'))
+        parent_id, app_properties = get_content_store().upload_target(folder_id)
+
+        # The page sends the file's MD5 and size first: a file already in the folder
+        # is reused without a byte of the upload being sent
+        existing = None
+        if settings.DRIVE_UPLOAD_DEDUPE and data.get('md5') and data.get('size') is not None:
+            service = get_drive_service()
+            existing = find_existing_copy(
+                service, parent_id, str(data['md5']).lower(), int(data['size']), app_properties
+            )
+        if existing:
+            print(f"[UPLOAD] {file_name} matches {existing['name']} ({existing['id']}), skipping the transfer")
+            drive_file = reuse_existing_copy(service, existing, f"{contributor_id}_{file_name}")
+            return JsonResponse({'duplicate': True, 'file': drive_file})
+
+        upload = ResumableDriveUpload(
+            f"{contributor_id}_{file_name}", parent_id, data.get('mime_type'), app_properties=app_properties
+        )
+        # Drive only answers the browser's cross-origin PUTs if the session was opened for its origin
+        session_uri = upload.start(origin=request.headers.get('Origin') or request.build_absolute_uri('/').rstrip('/'))
+    except Exception as e:
+        print(f"[ERROR] Could not open upload session for {file_name}: {e}")
+        return JsonResponse({'error': str(e)}, status=502)
+
+    upload_id = uuid.uuid4().hex
+    # Sessions the browser abandoned are never completed: drop the ones older than the session itself
+    now = time.time()
+    pending = {
+        key: entry for key, entry in request.session.get('pending_uploads', {}).items()
+        if now - entry.get('created', 0) < settings.SESSION_COOKIE_AGE
+    }
+    pending[upload_id] = {
+        'name': upload.name, 'folder_id': parent_id, 'app_properties': app_properties, 'created': now,
+    }
+    request.session['pending_uploads'] = pending
+
+    return JsonResponse({'upload_id': upload_id, 'session_uri': session_uri})
+
+
+@csrf_exempt
+def complete_upload_session(request):
+    """Verify a browser-direct upload landed where its session said and record its metadata."""
+    if request.method != "POST":
+        return JsonResponse({'error': 'POST required'}, status=405)
+
+    try:
+        data = json.loads(request.body)
+    except ValueError:
+        return JsonResponse({'error': 'Invalid JSON'}, status=400)
+
+    pending = request.session.get('pending_uploads', {})
+    expected = pending.get(data.get('upload_id'))
+    file_id = data.get('file_id')
+    if not expected or not file_id:
+        return JsonResponse({'error': 'Unknown upload'}, status=404)
+
+    try:
+        service = get_drive_service()
+        drive_file = service.files().get(fileId=file_id, fields=DRIVE_FILE_FIELDS).execute()
+    except Exception as e:
+        return JsonResponse({'error': str(e)}, status=502)
+
+    if expected['folder_id'] not in drive_file.get('parents', []) or drive_file.get('name') != expected['name']:
+        return JsonResponse({'error': 'Uploaded file does not match its upload session'}, status=400)
+
+    del pending[data['upload_id']]
+    request.session['pending_uploads'] = pending
+
+    # The browser had to send the bytes either way, but a second copy needn't be kept
+    existing = None
+    if settings.DRIVE_UPLOAD_DEDUPE and drive_file.get('md5Checksum'):
+        try:
+            existing = find_existing_copy(
+                service, expected['folder_id'], drive_file['md5Checksum'], int(drive_file.get('size') or 0),
+                expected.get('app_properties'), exclude_id=file_id,
+            )
+            if existing:
+                print(f"[UPLOAD] {drive_file['name']} duplicates {existing['name']}, keeping the existing file")
+                reused = reuse_existing_copy(service, existing, drive_file['name'])
+                service.files().delete(fileId=file_id).execute()
+                drive_file = reused
+        except Exception as e:
+            print(f"[WARN] Duplicate check for {drive_file['name']} failed: {e}")
+
+    register_drive_file(drive_file)
+    print(f"[UPLOAD] Browser upload complete: {drive_file['name']} ({drive_file.get('size')} bytes)")
+
+    return JsonResponse({'success': True, 'file': drive_file, 'duplicate': existing is not None})
+
+
 # ---------------- EDITOR / DRAFT ---------------- #
 @csrf_exempt
 def contributor_editor(request):
-    """Save drafts as HTML or final submissions as PDF in Google Drive."""
-    service = get_drive_service()
+    """Save drafts as HTML or final submissions as PDF in the content store (Google Drive by default)."""
+    store = get_content_store()
 
     contributor_id = request.session.get('contributor_id', 101)
     course_id = request.session.get('course_id')
@@ -281,28 +379,22 @@ def contributor_editor(request):
     print("Topic name: " + topic_name)
     chapter_name = request.session.get('chapter_name', 'structured_query_language')
 
-    # Root folder for all OER content
-    oer_root_id = get_or_create_drive_folder(service, "oer_content")
-    drafts_root_id = get_or_create_drive_folder(service, settings.GOOGLE_DRIVE_FOLDERS['drafts'], oer_root_id)
-    pdf_root_id = get_or_create_drive_folder(service, settings.GOOGLE_DRIVE_FOLDERS['pdf'], oer_root_id)
-
-    # Contributor-specific folders
-    # drafts_folder_id = get_or_create_drive_folder(service, f"{contributor_id}_{course_id}_{chapter_number}", drafts_root_id)
-    # pdf_folder_id = get_or_create_drive_folder(service, f"{contributor_id}_{course_id}_{chapter_number}", pdf_root_id)
-
-    # Contributor-level folders
+    # Contributor-level folders, with topic-level subfolders inside them;
+    # whatever is missing is created (on Drive, level by level in batch requests)
     base_folder_name = f"{contributor_id}_{course_id}_{chapter_number}"
-    drafts_folder_id = get_or_create_drive_folder(service, base_folder_name, drafts_root_id)
-    pdf_folder_id = get_or_create_drive_folder(service, base_folder_name, pdf_root_id)
+    drafts_path = ("oer_content", settings.GOOGLE_DRIVE_FOLDERS['drafts'], base_folder_name)
+    pdf_path = ("oer_content", settings.GOOGLE_DRIVE_FOLDERS['pdf'], base_folder_name)
+    paths = [drafts_path, pdf_path]
 
     # ✅ Topic-level subfolders inside contributor folder
     if topic_name:
         safe_topic_name = topic_name.replace("/", "_").strip()  # avoid invalid path characters
-        drafts_topic_folder_id = get_or_create_drive_folder(service, safe_topic_name, drafts_folder_id)
-        pdf_topic_folder_id = get_or_create_drive_folder(service, safe_topic_name, pdf_folder_id)
-    else:
-        drafts_topic_folder_id = drafts_folder_id
-        pdf_topic_folder_id = pdf_folder_id
+        paths += [drafts_path + (safe_topic_name,), pdf_path + (safe_topic_name,)]
+
+    folder_ids = store.ensure_folders(paths)
+    drafts_folder_id = folder_ids[drafts_path]
+    drafts_topic_folder_id = folder_ids[paths[-2]]
+    pdf_topic_folder_id = folder_ids[paths[-1]]
 
     if request.method == 'POST':
         action = request.POST.get('action')  # 'draft' or 'submitDraft'
@@ -324,29 +416,18 @@ def contributor_editor(request):
                 file_io = io.BytesIO()
                 doc.save(file_io)
                 file_io.seek(0)
-                media = MediaIoBaseUpload(
-                    file_io,
-                    mimetype='application/vnd.openxmlformats-officedocument.wordprocessingml.document',
-                    resumable=True
-                )
+                docx_mime_type = 'application/vnd.openxmlformats-officedocument.wordprocessingml.document'
 
                 user_filename = filename if filename.lower().endswith('.docx') else f"{filename}.docx"
                 doc_filename = f"{contributor_id}_{user_filename}"
 
                 if file_id:
                     # Update existing draft
-                    service.files().update(
-                        fileId=file_id,
-                        media_body=media
-                    ).execute()
+                    store.replace(file_id, file_io, docx_mime_type)
                 else:
                     # Create new draft
                     doc_filename = f"{contributor_id}_{user_filename}"
-                    service.files().create(
-                        body={'name': doc_filename, 'parents': [drafts_topic_folder_id]},
-                        media_body=media,
-                        fields='id'
-                    ).execute()
+                    store.save(drafts_topic_folder_id, doc_filename, file_io, docx_mime_type)
 
             elif action == 'submitDraft':
                 # Save as PDF using xhtml2pdf
@@ -359,7 +440,6 @@ def contributor_editor(request):
                     raise Exception("PDF generation failed")
 
                 pdf_io.seek(0)
-                media = MediaIoBaseUpload(pdf_io, mimetype='application/pdf', resumable=True)
 
                 # Use same naming as draft
                 # Ensure filename ends with .pdf
@@ -371,19 +451,14 @@ def contributor_editor(request):
                 else:
                     pdf_filename = user_filename
 
-                # Upload PDF to Drive
-                service.files().create(
-                    body={'name': pdf_filename, 'parents': [pdf_topic_folder_id]},
-                    media_body=media,
-                    fields='id'
-                ).execute()
+                # Upload PDF
+                store.save(pdf_topic_folder_id, pdf_filename, pdf_io, 'application/pdf')
 
-                # Delete the draft from Drive if editing an existing draft
+                # Delete the draft if editing an existing draft
                 if file_id:
-                    try:
-                        service.files().delete(fileId=file_id).execute()
-                    except Exception as e:
-                        print(f"[WARNING] Could not delete draft {file_id}: {e}")
+                    error = store.delete([file_id]).get(file_id)
+                    if error is not None:
+                        print(f"[WARNING] Could not delete draft {file_id}: {error}")
 
         except Exception as e:
             print(f"[ERROR] {action.capitalize()} upload failed: {e}")
@@ -391,9 +466,7 @@ def contributor_editor(request):
 
     # Fetch existing drafts
     try:
-        query = f"'{drafts_folder_id}' in parents and trashed=false"
-        results = service.files().list(q=query, fields="files(id, name, createdTime)").execute()
-        files = results.get('files', [])
+        files = list(store.list_files([drafts_folder_id]))
     except Exception as e:
         files = []
         print(f"[ERROR] Failed to fetch drafts: {e}")
@@ -412,36 +485,29 @@ def contributor_editor(request):
 # ---------------- LOAD FILE CONTENT ---------------- #
 @csrf_exempt
 def load_file(request):
-    service = get_drive_service()
+    store = get_content_store()
     file_id = request.GET.get('file_id')
 
     if not file_id:
         return JsonResponse({'error': 'file_id is required'}, status=400)
 
     try:
-        request_file = service.files().get(fileId=file_id, fields='mimeType').execute()
-        mime_type = request_file.get('mimeType', 'text/html')
-
-        fh = io.BytesIO()
-        downloader = MediaIoBaseDownload(fh, service.files().get_media(fileId=file_id))
-        done = False
-        while not done:
-            _, done = downloader.next_chunk()
-        fh.seek(0)
+        metadata = store.get_metadata(file_id)
+        mime_type = metadata.get('mimeType', 'text/html')
 
         print("Loading file_id:", file_id)
-        print("Service object:", service)
-
-        if 'text/html' in mime_type:
-            content = fh.getvalue().decode('utf-8')
-        elif mime_type == 'application/vnd.openxmlformats-officedocument.wordprocessingml.document':
-            import docx
-            doc = docx.Document(fh)
-            paragraphs = [p.text for p in doc.paragraphs if p.text.strip()]
-            # Join with <p> tags for TinyMCE
-            content = ''.join(f'<p>{p}</p>' for p in paragraphs)
-        else:
-            content = f"<p>Cannot edit file of type {mime_type} in the editor.</p>"
+
+        with store.open(file_id, metadata) as fh:
+            if 'text/html' in mime_type:
+                content = fh.read().decode('utf-8')
+            elif mime_type == 'application/vnd.openxmlformats-officedocument.wordprocessingml.document':
+                import docx
+                doc = docx.Document(fh)
+                paragraphs = [p.text for p in doc.paragraphs if p.text.strip()]
+                # Join with <p> tags for TinyMCE
+                content = ''.join(f'<p>{p}</p>' for p in paragraphs)
+            else:
+                content = f"<p>Cannot edit file of type {mime_type} in the editor.</p>"
 
         return JsonResponse({'content': content})
 
@@ -449,17 +515,77 @@ def load_file(request):
         return JsonResponse({'error': str(e)}, status=500)
 
 
+def serve_file(request):
+    """Send a stored file to the browser (used when content isn't kept in Drive)."""
+    file_id = request.GET.get('file_id')
+    if not file_id:
+        return HttpResponseBadRequest("file_id is required")
+    return get_content_store().serve(file_id, as_attachment=request.GET.get('download') == '1')
+
+
+def stream_file(request):
+    """
+    Stream a stored file with HTTP Range support (206 Partial Content), so a video
+    can start playing and seek without the whole file passing through the worker.
+    """
+    file_id = request.GET.get('file_id')
+    if not file_id:
+        return HttpResponseBadRequest("file_id is required")
+
+    store = get_content_store()
+    try:
+        metadata = store.get_metadata(file_id)
+    except Exception as e:
+        if is_not_found_error(e):
+            raise Http404(f"No such file: {file_id}")
+        raise
+    size = int(metadata.get('size') or 0)
+
+    byte_range = parse_range_header(request.headers.get('Range'), size)
+    if byte_range is False:
+        response = HttpResponse(status=416)
+        response['Content-Range'] = f"bytes */{size}"
+        return response
+
+    start, end = byte_range or (0, size - 1)
+    response = StreamingHttpResponse(
+        store.iter_range(file_id, start, end, metadata),
+        status=206 if byte_range else 200,
+        content_type=metadata.get('mimeType') or 'application/octet-stream',
+    )
+    response['Accept-Ranges'] = 'bytes'
+    response['Content-Length'] = str(end - start + 1)
+    if byte_range:
+        response['Content-Range'] = f"bytes {start}-{end}/{size}"
+    return response
+
+
 @csrf_exempt
 def delete_drive_file(request):
-    """Delete a Google Drive file permanently."""
+    """
+    Delete stored files permanently. Accepts one or more `file_id` values
+    (repeat the field to delete several); on Drive they go in batch requests.
+    """
     if request.method == 'POST':
-        file_id = request.POST.get('file_id')
-        service = get_drive_service()
+        file_ids = [fid for fid in request.POST.getlist('file_id') if fid.strip()]
+        if not file_ids:
+            return JsonResponse({'success': False, 'message': 'file_id is required'})
+
         try:
-            service.files().delete(fileId=file_id).execute()
-            return JsonResponse({'success': True, 'message': 'File deleted successfully.'})
+            errors = get_content_store().delete(file_ids)
         except Exception as e:
             return JsonResponse({'success': False, 'message': str(e)})
+
+        failed = {fid: str(error) for fid, error in errors.items()
+                  if error is not None and not is_not_found_error(error)}
+        if failed:
+            return JsonResponse({
+                'success': False,
+                'message': f"Could not delete {len(failed)} of {len(errors)} file(s).",
+                'failed': failed,
+            })
+        message = 'File deleted successfully.' if len(errors) == 1 else f'{len(errors)} files deleted successfully.'
+        return JsonResponse({'success': True, 'message': message})
     # Redirect back to original submission page
     course_id = request.session.get("course_id")
     chapter_id = request.session.get("chapter_id")
@@ -524,7 +650,7 @@ def gemini_chat(request):
 
 @csrf_exempt
 def confirm_submission(request):
-    """Handles final submission confirmation and triggers the LangGraph submission agent."""
+    """Handles final submission confirmation and queues the submission and its evaluation."""
     if request.method != "POST":
         return JsonResponse({'error': 'POST required'}, status=405)
 
@@ -540,21 +666,16 @@ def confirm_submission(request):
         chapter_name = chapter_obj.chapter_name
         chapter_number = chapter_obj.chapter_number
 
-        service = get_drive_service()
-        oer_root_id = get_or_create_drive_folder(service, "oer_content")
-
-        # 🔹 Create or get subfolders for each content type
-        pdf_root_id = get_or_create_drive_folder(service, settings.GOOGLE_DRIVE_FOLDERS['pdf'], oer_root_id)
-        video_root_id = get_or_create_drive_folder(service, settings.GOOGLE_DRIVE_FOLDERS['videos'], oer_root_id)
-        assess_root_id = get_or_create_drive_folder(service, settings.GOOGLE_DRIVE_FOLDERS['assessments'], oer_root_id)
-
-        # 🔹 Contributor-specific folders
-        pdf_folder_id = get_or_create_drive_folder(service, f"{contributor_id}_{course_id}_{chapter_number}",
-                                                   pdf_root_id)
-        video_folder_id = get_or_create_drive_folder(service, f"{contributor_id}_{course_id}_{chapter_number}",
-                                                     video_root_id)
-        assess_folder_id = get_or_create_drive_folder(service, f"{contributor_id}_{course_id}_{chapter_number}",
-                                                      assess_root_id)
+        # 🔹 Create or get the contributor-specific folder for each content type
+        base_folder_name = f"{contributor_id}_{course_id}_{chapter_number}"
+        paths = {
+            folder_type: ("oer_content", settings.GOOGLE_DRIVE_FOLDERS[folder_type], base_folder_name)
+            for folder_type in ('pdf', 'videos', 'assessments')
+        }
+        folder_ids = get_content_store().ensure_folders(paths.values())
+        pdf_folder_id = folder_ids[paths['pdf']]
+        video_folder_id = folder_ids[paths['videos']]
+        assess_folder_id = folder_ids[paths['assessments']]
 
         # 🔹 Prepare LangGraph state
         state = {
@@ -582,35 +703,36 @@ def confirm_submission(request):
         #         "contributor_id": contributor_id
         #     })
 
-        # Run submission agent synchronously
-        async def run_submission():
-            return await submission_agent.ainvoke(state)
-
-        result = asyncio.run(run_submission())  # UI waits only for DB update
-
-        if result.get("status") == "submission_recorded":
-            # Trigger evaluation agent in background (non-blocking)
-            import threading
-            def run_graph_in_thread(state):
-                asyncio.run(compiled_graph.ainvoke(state))  # ensures coroutine is executed
-
-            # trigger in a thread
-            threading.Thread(target=run_graph_in_thread, args=(state,)).start()
-
-            return render(request, "contributor/final_submission.html", {
-                "chapter_name": chapter_name,
-                "contributor_id": contributor_id
-            })
+        # Recording and evaluation run on the job workers (`manage.py run_job_worker`);
+        # the contributor gets the job ID straight away
+        job = enqueue_job("record_submission", {"state": state})
+        print(f"[INFO] Submission for chapter {chapter_id} queued as job {job.id}")
 
-        else:
-            print(f"[ERROR] Submission agent did not return success: {result}")
-            return JsonResponse({'error': 'Submission agent failed or returned invalid response'}, status=500)
+        return render(request, "contributor/final_submission.html", {
+            "chapter_name": chapter_name,
+            "contributor_id": contributor_id,
+            "job_id": job.id,
+        })
 
     except Exception as e:
         print(f"[ERROR] Final submission failed: {e}")
         return JsonResponse({'error': str(e)}, status=500)
 
 
+def job_status(request, job_id):
+    """Progress of a queued submission job, for the contributor who submitted it."""
+    job = get_object_or_404(Job, id=job_id)
+    if str(job.payload.get("state", {}).get("contributor_id")) != str(request.session.get('contributor_id')):
+        return JsonResponse({'error': 'Not your job'}, status=403)
+    return JsonResponse({
+        'id': job.id,
+        'kind': job.kind,
+        'status': job.status,
+        'attempts': job.attempts,
+        'result': job.result,
+    })
+
+
 # # Inside the upload_files view function...
 # def upload_files(request):
 #     # Get course_id, chapter_id, topic_name needed for the redirect
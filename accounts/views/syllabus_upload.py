@@ -1,7 +1,8 @@
 import re
-import pdfplumber
+from django.conf import settings
 from django.db import transaction
 from ..models import Program, Department, Scheme, Course, Chapter, CourseOutcome
+from langgraph_agents.services.pdf_text import iter_pdf_pages
 from langchain_google_genai import ChatGoogleGenerativeAI
 import os
 
@@ -23,12 +24,12 @@ def _roman_to_int(r):
 def extract_and_upload(pdf_file):
     """Robust syllabus parser for Mumbai University-style PDFs."""
 
-    text = ""
-    with pdfplumber.open(pdf_file) as pdf:
-        for page in pdf.pages:
-            text += (page.extract_text() or "") + "\n"
-
-    lines = [re.sub(r'\s+', ' ', l).strip() for l in text.splitlines() if l.strip()]
+    # The patterns below work line by line, so the engine must keep the layout's lines
+    lines = [
+        re.sub(r'\s+', ' ', l).strip()
+        for page_text in iter_pdf_pages(pdf_file, engine=settings.SYLLABUS_PDF_ENGINE)
+        for l in page_text.splitlines() if l.strip()
+    ]
 
     # --- Program / Dept / Scheme header ---
     header = "\n".join(lines[:150])
@@ -1,68 +1,72 @@
+import functools
 import json
 
 from asgiref.sync import sync_to_async
+from django.db import connections, transaction
 from langchain.tools import tool
 
 from accounts.models import ContentScore, UploadCheck, Assessment
-from langgraph_agents.services.drive_service import get_drive_service
+from langgraph_agents.services.content_store import get_content_store
 from langgraph_agents.services.gemini_service import llm
-from langgraph_agents.services.pdf_service import download_and_read_pdf
+from langgraph_agents.services.derivative_cache import derived_text
+from langgraph_agents.services.pdf_service import extract_pdf_texts
+import shutil
 import tempfile
-from googleapiclient.http import MediaIoBaseDownload
 
 
-from langgraph_agents.services.video_service import transcribe_audio_or_video
+from langgraph_agents.services.video_service import transcribe_audio_or_video, TRANSCRIPT_EXTRACTOR
 
 
 def extract_all_pdf_texts(folder_id):
-    service = get_drive_service()
-    results = service.files().list(
-        q=f"'{folder_id}' in parents and mimeType='application/pdf' and trashed=false",
-        fields="files(id, name)"
-    ).execute()
+    store = get_content_store()
+    pdf_files = [f for f in store.list_files([folder_id]) if f["mimeType"] == "application/pdf"]
 
-    pdf_texts = []
-    for f in results.get("files", []):
-        content = download_and_read_pdf(f["id"])
-        pdf_texts.append(content)
-    return pdf_texts
+    # Downloaded and parsed concurrently; texts already extracted for this file version are reused
+    return [text for text in extract_pdf_texts(pdf_files) if text is not None]
+
+
+def _transcribe(store, f):
+    """Transcribe one stored video with Whisper, from local disk or a temporary download."""
+    print(f"[INFO] Processing video: {f['name']}")
+
+    local_path = store.local_path(f["id"], f)
+    if local_path:
+        # Transcribe in place, no copy needed
+        state = transcribe_audio_or_video({"file_path": local_path})
+    else:
+        # Create a temporary file
+        with tempfile.NamedTemporaryFile(delete=True, suffix=".mp4") as tmp_file:
+            # Download the file
+            with store.open(f["id"], f) as source:
+                shutil.copyfileobj(source, tmp_file, 1024 * 1024)
+
+            tmp_file.flush()  # Ensure all bytes are written
+            tmp_file.seek(0)
+
+            # Transcribe using Whisper
+            state = transcribe_audio_or_video({"file_path": tmp_file.name})
+
+    transcript = state.get("transcript", "")
+    if transcript.upper().startswith("[ERROR]"):
+        raise RuntimeError(transcript)  # not cached, so the next run tries again
+    return transcript
 
 
 def extract_all_video_transcripts(folder_id):
     """
-    Extracts transcripts from all video files in a Drive folder.
-    Downloads each video temporarily to transcribe with Whisper.
+    Extracts transcripts from all video files in a content folder.
+    Videos not already on local disk are downloaded temporarily to transcribe with Whisper;
+    transcripts are kept per file version, so unchanged videos are never transcribed twice.
     """
-    service = get_drive_service()
-    results = service.files().list(
-        q=f"'{folder_id}' in parents and trashed=false",
-        fields="files(id, name, mimeType)"
-    ).execute()
+    store = get_content_store()
+    video_files = (f for f in store.list_files([folder_id]) if f["mimeType"].startswith("video/"))
 
     transcripts = []
-
-    for f in results.get("files", []):
-        if f["mimeType"].startswith("video/"):
-            print(f"[INFO] Processing video: {f['name']}")
-
-            # Create a temporary file
-            with tempfile.NamedTemporaryFile(delete=True, suffix=".mp4") as tmp_file:
-                # Download the file from Drive
-                request = service.files().get_media(fileId=f["id"])
-                downloader = MediaIoBaseDownload(tmp_file, request)
-                done = False
-                while not done:
-                    status, done = downloader.next_chunk()
-                    if status:
-                        print(f"[INFO] Download {int(status.progress() * 100)}%.")
-
-                tmp_file.flush()  # Ensure all bytes are written
-                tmp_file.seek(0)
-
-                # Transcribe using Whisper
-                state = {"file_path": tmp_file.name}
-                state = transcribe_audio_or_video(state)
-                transcripts.append(state.get("transcript", ""))
+    for f in video_files:
+        try:
+            transcripts.append(derived_text(f, "transcript", TRANSCRIPT_EXTRACTOR, lambda: _transcribe(store, f)))
+        except Exception as e:
+            print(f"[ERROR] Transcription of {f['name']} failed: {e}")
 
     return transcripts
 
@@ -89,9 +93,9 @@ async def analyze_engagement_with_gemini(content: str) -> dict:
     {content}
     """
 
-    response = llm.invoke(prompt)
+    response = await llm.ainvoke(prompt)  # awaited, so the other scorers run meanwhile
     try:
-        return json.loads(response.content)
+        return _parse_json(response.content)
     except Exception as e:
         print("[ERROR] Gemini JSON parsing failed:", e)
         return {"case_studies": 0, "assessments": 0, "scenario_cues": 0}
@@ -173,50 +177,117 @@ async def analyze_engagement_with_gemini(content: str) -> dict:
 #     }
 
 
-from asgiref.sync import sync_to_async
-from langchain.tools import tool
+# ---------- Evaluation graph nodes (wired in langgraph_agents/graph/workflow.py) ----------
+# extract_content downloads and extracts the chapter once; the score_* nodes then
+# run concurrently on that text, and join_scores writes every score together.
+
+CRITERIA_PROMPTS = {
+    "completeness": "how completely it covers the chapter's topic: key concepts, definitions and examples, with no obvious gaps",
+    "clarity": "how clearly it is written and structured: logical order, plain explanations, well-defined terms",
+    "accuracy": "how factually and technically correct it is: no errors, outdated claims or misleading statements",
+}
+
 
-@tool
-async def evaluate_engagement(contributor_id: int, chapter_id: int, drive_folders: dict, **kwargs) -> dict:
+def _in_worker_thread(func):
     """
-    Evaluates the engagement level of uploaded content using Gemini + assessment DB check.
+    ``func`` as a coroutine function that runs on a thread of the event loop's
+    pool. sync_to_async's default (thread-sensitive) sends every call in the
+    process to one shared thread, so evaluations running side by side in the job
+    worker would take turns. The thread's DB connections are closed when it returns.
     """
+    @functools.wraps(func)
+    def run(*args, **kwargs):
+        try:
+            return func(*args, **kwargs)
+        finally:
+            connections.close_all()
 
-    # ✅ ORM in async → wrap it
-    upload = await sync_to_async(
-        lambda: UploadCheck.objects.filter(
-            contributor_id=contributor_id, chapter_id=chapter_id
-        ).order_by('-timestamp').first()
-    )()
+    return sync_to_async(run, thread_sensitive=False)
+
+
+def _parse_json(text):
+    # Gemini sometimes wraps its JSON in a ```json fence
+    text = text.strip()
+    if text.startswith("```"):
+        text = text.strip("`")
+        text = text[text.find("{"):]
+    return json.loads(text)
 
+
+def _find_upload(contributor_id, chapter_id, upload_id=None):
+    uploads = UploadCheck.objects.select_related("chapter")
+    if upload_id:
+        return uploads.filter(id=upload_id).first()
+    return uploads.filter(contributor_id=contributor_id, chapter_id=chapter_id).order_by('-timestamp').first()
+
+
+async def extract_content(state):
+    """Download and extract the chapter's PDFs and videos once, for every scorer."""
+    upload = await _in_worker_thread(_find_upload)(state["contributor_id"], state["chapter_id"], state.get("upload_id"))
     if not upload:
         return {"status": "no_upload_found"}
 
-    # ✅ Wrap get_or_create
-    score_obj, _ = await sync_to_async(
-        lambda: ContentScore.objects.get_or_create(upload=upload)
-    )()
+    drive_folders = state["drive_folders"]
+    pdf_texts = await _in_worker_thread(extract_all_pdf_texts)(drive_folders.get("pdf"))
+    video_texts = await _in_worker_thread(extract_all_video_transcripts)(drive_folders.get("videos"))
+    content = "\n\n".join(pdf_texts + video_texts)
+    if not content.strip():
+        return {"status": "no_content_found", "upload_id": upload.id}
 
-    # ✅ If your PDF / video extractors are synchronous — wrap them too
-    pdf_texts = await sync_to_async(extract_all_pdf_texts)(drive_folders.get("pdf"))
-    video_texts = await sync_to_async(extract_all_video_transcripts)(drive_folders.get("videos"))
-    full_text = "\n\n".join(pdf_texts + video_texts)
+    print(f"[INFO] Extracted {len(content)} characters for upload {upload.id}")
+    return {"upload_id": upload.id, "content": content}
 
-    if not full_text.strip():
-        return {"status": "no_content_found"}
 
-    # ✅ Gemini analysis (already async)
-    gemini_result = await analyze_engagement_with_gemini(full_text)
+async def _score_criterion(criterion, content):
+    prompt = f"""
+    You are an educational content evaluator.
+
+    Rate the following material on {criterion}: {CRITERIA_PROMPTS[criterion]}.
+
+    Respond ONLY in pure JSON:
+    {{
+      "score": <number from 0 to 10>,
+      "reason": "<one sentence>"
+    }}
+
+    Content:
+    {content}
+    """
+
+    response = await llm.ainvoke(prompt)
+    try:
+        result = _parse_json(response.content)
+        score = min(10, max(0, round(float(result["score"]), 2)))
+    except Exception as e:
+        print(f"[ERROR] Gemini {criterion} JSON parsing failed:", e)
+        return {"scores": {criterion: None}, "details": {criterion: {"error": str(e)}}}
+    return {"scores": {criterion: score}, "details": {criterion: {"reason": result.get("reason", "")}}}
+
+
+async def score_completeness(state):
+    return await _score_criterion("completeness", state["content"])
+
+
+async def score_clarity(state):
+    return await _score_criterion("clarity", state["content"])
+
+
+async def score_accuracy(state):
+    return await _score_criterion("accuracy", state["content"])
+
+
+async def score_engagement(state):
+    """Engagement from Gemini's count of case studies, scenario cues and exercises, plus uploaded assessments."""
+    gemini_result = await analyze_engagement_with_gemini(state["content"])
     case_studies = gemini_result["case_studies"]
     assessments = gemini_result["assessments"]
     scenario_cues = gemini_result["scenario_cues"]
 
-    # ✅ ORM existence check
-    has_assessment = await sync_to_async(
+    has_assessment = await _in_worker_thread(
         lambda: Assessment.objects.filter(
-            chapter_id=chapter_id,
-            course_id=upload.chapter.course_id,
-            contributor_id=contributor_id
+            chapter_id=state["chapter_id"],
+            course_id=UploadCheck.objects.get(id=state["upload_id"]).chapter.course_id,
+            contributor_id=state["contributor_id"]
         ).exists()
     )()
 
@@ -227,39 +298,39 @@ async def evaluate_engagement(contributor_id: int, chapter_id: int, drive_folder
             (assessments * 1.5) +
             (5 if has_assessment else 0)
     )
-
     engagement_score = min(10, round(engagement_score, 2))
 
-    # ✅ Save the score safely
-    await sync_to_async(lambda: _save_score(score_obj, engagement_score))()
-
-    # ✅ Check if all parameters filled and mark complete
-    # await sync_to_async(lambda: _finalize_upload(upload, score_obj))()
-
     return {
-        "status": "engagement_evaluated",
-        "details": {
+        "scores": {"engagement": engagement_score},
+        "details": {"engagement": {
             "case_studies": case_studies,
             "scenario_cues": scenario_cues,
             "assessments_found": assessments,
             "assessment_uploaded": has_assessment
-        },
-        "score": engagement_score
+        }},
     }
 
 
-# Helper functions (run synchronously)
-def _save_score(score_obj, engagement_score):
-    score_obj.engagement = engagement_score
-    score_obj.save()
-
-
-# def _finalize_upload(upload, score_obj):
-#     if all([
-#         score_obj.completeness,
-#         score_obj.clarity,
-#         score_obj.accuracy,
-#         score_obj.engagement
-#     ]):
-#         upload.evaluation_status = True
-#         upload.save()
+def _save_scores(upload_id, scores):
+    # All four scores land together, and the upload is only marked evaluated once all are in
+    with transaction.atomic():
+        upload = UploadCheck.objects.select_for_update().get(id=upload_id)
+        score_obj, _ = ContentScore.objects.get_or_create(upload=upload)
+        score_obj.completeness = scores.get("completeness")
+        score_obj.clarity = scores.get("clarity")
+        score_obj.accuracy = scores.get("accuracy")
+        score_obj.enagagement = scores.get("engagement")  # (sic) the model's column name
+        score_obj.save()
+
+        complete = all(scores.get(c) is not None for c in ("completeness", "clarity", "accuracy", "engagement"))
+        if complete and not upload.evaluation_status:
+            upload.evaluation_status = True
+            upload.save(update_fields=["evaluation_status"])
+    return complete
+
+
+async def join_scores(state):
+    """Write every scorer's result in one transaction."""
+    complete = await _in_worker_thread(_save_scores)(state["upload_id"], state.get("scores", {}))
+    print(f"[INFO] Scores for upload {state['upload_id']}: {state.get('scores')}")
+    return {"status": "evaluated" if complete else "partially_evaluated"}
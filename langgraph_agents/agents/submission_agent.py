@@ -5,7 +5,7 @@ import whisper
 import mimetypes
 from langchain.tools import tool
 
-from langgraph_agents.services.drive_service import get_drive_service
+from langgraph_agents.services.content_store import get_content_store
 from langgraph_agents.services.gemini_service import llm
 import datetime
 from googleapiclient.discovery import build
@@ -21,7 +21,7 @@ def record_submission_to_db(contributor_id, chapter_id, drive_folders):
     Called once the contributor confirms submission.
     Creates one UploadCheck + linked ContentCheck.
     """
-    service = get_drive_service()
+    store = get_content_store()
     now = timezone.now()  # Timestamp when Confirm Submission clicked
 
     # 🔹 Check which content folders actually have files
@@ -30,14 +30,8 @@ def record_submission_to_db(contributor_id, chapter_id, drive_folders):
     for folder_type, folder_id in drive_folders.items():
         if not folder_id:
             continue
-        query = f"'{folder_id}' in parents and trashed=false"
-        results = service.files().list(
-            q=query,
-            spaces='drive',
-            fields="files(id)",
-            pageSize=1
-        ).execute()
-        if results.get("files"):
+        # Only need to know whether there is at least one file
+        if next(iter(store.list_files([folder_id])), None):
             content_flags[folder_type] = True
 
     # 🔹 Get chapter object
@@ -1,17 +1,52 @@
+import operator
+from typing import Annotated, TypedDict
+
 from langgraph.constants import END
 from langgraph.graph import StateGraph
-from langgraph_agents.agents.submission_agent import submission_agent
-from langgraph_agents.agents.evaluation_agent import evaluate_engagement
+from langgraph_agents.agents.evaluation_agent import (
+    extract_content, score_completeness, score_clarity, score_accuracy, score_engagement, join_scores,
+)
 
-graph = StateGraph(dict)
 
-graph.add_node("submission_agent", submission_agent)
-graph.add_node("evaluate_engagement", evaluate_engagement)
+class EvaluationState(TypedDict, total=False):
+    contributor_id: int
+    chapter_id: int
+    course_id: int
+    chapter_name: str
+    drive_folders: dict
+    upload_id: int
+    content: str  # extracted once by extract_content, read by every scorer
+    status: str
+    # Scorers run in the same step, so their partial dicts are merged rather than overwritten
+    scores: Annotated[dict, operator.or_]
+    details: Annotated[dict, operator.or_]
 
-graph.set_entry_point("evaluate_engagement")
-graph.add_edge("evaluate_engagement", END)
 
-# graph.add_edge("evaluate_engagement", END)
+SCORERS = {
+    "score_completeness": score_completeness,
+    "score_clarity": score_clarity,
+    "score_accuracy": score_accuracy,
+    "score_engagement": score_engagement,
+}
+
+
+def route_after_extraction(state):
+    # Fan out to every scorer at once, or stop if there was nothing to evaluate
+    if not state.get("content"):
+        return END
+    return list(SCORERS)
 
-compiled_graph = graph.compile()
 
+graph = StateGraph(EvaluationState)
+
+graph.add_node("extract_content", extract_content)
+for name, scorer in SCORERS.items():
+    graph.add_node(name, scorer)
+graph.add_node("join_scores", join_scores)
+
+graph.set_entry_point("extract_content")
+graph.add_conditional_edges("extract_content", route_after_extraction, list(SCORERS) + [END])
+graph.add_edge(list(SCORERS), "join_scores")  # waits for all scorers
+graph.add_edge("join_scores", END)
+
+compiled_graph = graph.compile()
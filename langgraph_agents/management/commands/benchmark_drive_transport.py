@@ -0,0 +1,97 @@
+import ssl
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+from django.core.management.base import BaseCommand
+from googleapiclient.discovery import build
+
+from langgraph_agents.services.drive_service import get_credentials, build_drive_http, FOLDER_MIME_TYPE
+
+# Read-only call used for every step: the lookup of the oer_content root folder
+ROOT_QUERY = f"mimeType='{FOLDER_MIME_TYPE}' and name='oer_content' and trashed=false"
+
+
+class HandshakeCounter:
+    """Counts TLS handshakes (SSLContext.wrap_socket calls) while active."""
+
+    def __init__(self):
+        self.count = 0
+        self._lock = threading.Lock()
+        self._original = ssl.SSLContext.wrap_socket
+
+    def __enter__(self):
+        counter = self
+        original = self._original
+
+        def wrap_socket(context, *args, **kwargs):
+            with counter._lock:
+                counter.count += 1
+            return original(context, *args, **kwargs)
+
+        ssl.SSLContext.wrap_socket = wrap_socket
+        return self
+
+    def __exit__(self, *exc):
+        ssl.SSLContext.wrap_socket = self._original
+
+
+class Command(BaseCommand):
+    help = (
+        "Replay a typical contributor session against Drive with the httplib2 and the pooled "
+        "transport, and compare TLS handshakes and latency."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument("--rounds", type=int, default=5, help="Contributor sessions to replay per transport.")
+        parser.add_argument("--transport", choices=["both", "pooled", "httplib2"], default="both")
+
+    def handle(self, *args, **options):
+        transports = ["httplib2", "pooled"] if options["transport"] == "both" else [options["transport"]]
+        creds = get_credentials()
+
+        results = []
+        for transport in transports:
+            results.append(self.run_sessions(transport, creds, options["rounds"]))
+
+        self.stdout.write(f"{'transport':<10} {'calls':>6} {'handshakes':>11} {'total s':>8} {'ms/call':>8}")
+        for transport, calls, handshakes, elapsed in results:
+            self.stdout.write(
+                f"{transport:<10} {calls:>6} {handshakes:>11} {elapsed:>8.2f} {elapsed / calls * 1000:>8.1f}"
+            )
+
+    def run_sessions(self, transport, creds, rounds):
+        local = threading.local()
+        calls = 0
+        calls_lock = threading.Lock()
+
+        def drive_call():
+            nonlocal calls
+            service = getattr(local, "service", None)
+            if service is None:
+                service = build("drive", "v3", http=build_drive_http(creds, transport), cache_discovery=False)
+                local.service = service
+            service.files().list(q=ROOT_QUERY, fields="files(id)", pageSize=1).execute()
+            with calls_lock:
+                calls += 1
+
+        def in_new_thread(n):
+            # Like a request thread or a job worker thread
+            thread = threading.Thread(target=lambda: [drive_call() for _ in range(n)])
+            thread.start()
+            thread.join()
+
+        # Long-lived listing pool, like contributor_files' executor
+        with ThreadPoolExecutor(max_workers=4) as listing_pool, HandshakeCounter() as handshakes:
+            started = time.monotonic()
+            for _ in range(rounds):
+                # Dashboard: folder chains for four content types resolved concurrently
+                list(listing_pool.map(lambda _: drive_call(), range(4)))
+                # Upload page request: listing + folder lookups on the request thread
+                in_new_thread(3)
+                # confirm_submission: folder lookups, then the evaluation job on a worker thread
+                in_new_thread(3)
+                in_new_thread(4)
+            elapsed = time.monotonic() - started
+
+        return transport, calls, handshakes.count, elapsed
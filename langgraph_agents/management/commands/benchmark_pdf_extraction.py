@@ -0,0 +1,104 @@
+import re
+import time
+from collections import Counter
+from pathlib import Path
+
+from django.core.management.base import BaseCommand, CommandError
+
+from langgraph_agents.services.pdf_text import ENGINES, iter_pdf_pages
+
+
+def _words(text):
+    return re.findall(r"\w+", text.lower())
+
+
+def text_fidelity(reference, text):
+    """
+    F1 of the word multisets of ``text`` against ``reference``: 1.0 when every
+    word is recovered, lower for dropped, garbled or run-together words. Word
+    order isn't compared, so reading-order differences don't count against it.
+    """
+    ref, got = Counter(_words(reference)), Counter(_words(text))
+    if not ref or not got:
+        return float(ref == got)
+    common = sum((ref & got).values())
+    precision, recall = common / sum(got.values()), common / sum(ref.values())
+    return 2 * precision * recall / (precision + recall) if common else 0.0
+
+
+class Command(BaseCommand):
+    help = (
+        "Extract the text of every PDF in a corpus directory with each PDF engine and compare "
+        "pages per second and text fidelity. Fidelity is measured against a transcript next to the "
+        "PDF (same name, .txt) where there is one, else against the --reference engine's output."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument("corpus", help="Directory of PDFs (searched recursively), e.g. syllabi and lecture notes.")
+        parser.add_argument(
+            "--engines", default=",".join(ENGINES),
+            help=f"Comma-separated engines to compare (default: all of {', '.join(ENGINES)}).",
+        )
+        parser.add_argument("--reference", default="pdfplumber", choices=list(ENGINES),
+                            help="Engine whose text stands in for PDFs without a .txt transcript.")
+        parser.add_argument("--max-pages", type=int, default=None, help="Only read this many pages of each PDF.")
+
+    def handle(self, *args, **options):
+        engines = [e.strip() for e in options["engines"].split(",") if e.strip()]
+        unknown = [e for e in engines if e not in ENGINES]
+        if unknown:
+            raise CommandError(f"Unknown engine(s): {', '.join(unknown)}")
+        pdfs = sorted(Path(options["corpus"]).rglob("*.pdf"))
+        if not pdfs:
+            raise CommandError(f"No PDFs under {options['corpus']}")
+
+        totals = {
+            engine: {"files": 0, "pages": 0, "seconds": 0.0, "fidelity": 0.0, "scored": 0, "errors": 0}
+            for engine in engines
+        }
+        for pdf in pdfs:
+            reference = self.reference_text(pdf, options)
+            line = [f"{pdf.name[:40]:<40}"]
+            for engine in engines:
+                try:
+                    pages, seconds, text = self.extract(pdf, engine, options["max_pages"])
+                except Exception as e:
+                    print(f"[WARN] {engine} failed on {pdf}: {e}")
+                    totals[engine]["errors"] += 1
+                    line.append(f"{engine}: error")
+                    continue
+                fidelity = text_fidelity(reference, text) if reference is not None else None
+                total = totals[engine]
+                total["files"] += 1
+                total["pages"] += pages
+                total["seconds"] += seconds
+                if fidelity is not None:
+                    total["fidelity"] += fidelity
+                    total["scored"] += 1
+                line.append(f"{engine}: {pages / seconds if seconds else 0:.0f} p/s"
+                            + (f" {fidelity:.3f}" if fidelity is not None else ""))
+            self.stdout.write("  ".join(line))
+
+        self.stdout.write("")
+        self.stdout.write(f"{'engine':<12} {'files':>6} {'pages':>7} {'seconds':>8} {'pages/s':>8} {'fidelity':>9} {'errors':>7}")
+        for engine, total in totals.items():
+            files, pages, seconds = total["files"], total["pages"], total["seconds"]
+            self.stdout.write(
+                f"{engine:<12} {files:>6} {pages:>7} {seconds:>8.2f} {pages / seconds if seconds else 0:>8.1f} "
+                f"{total['fidelity'] / total['scored'] if total['scored'] else 0:>9.3f} {total['errors']:>7}"
+            )
+
+    def extract(self, pdf, engine, max_pages):
+        started = time.monotonic()
+        texts = list(iter_pdf_pages(pdf, max_pages=max_pages, engine=engine))
+        return len(texts), time.monotonic() - started, "\n".join(texts)
+
+    def reference_text(self, pdf, options):
+        transcript = pdf.with_suffix(".txt")
+        if transcript.exists():
+            return transcript.read_text(encoding="utf-8")
+        try:
+            return "\n".join(iter_pdf_pages(pdf, max_pages=options["max_pages"], engine=options["reference"]))
+        except Exception as e:
+            print(f"[WARN] No reference text for {pdf}: {e}")
+            return None
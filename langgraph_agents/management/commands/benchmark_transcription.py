@@ -0,0 +1,109 @@
+import os
+import re
+import tempfile
+import time
+
+from django.conf import settings
+from django.core.management.base import BaseCommand, CommandError
+
+from langgraph_agents.services import transcription
+
+
+def _words(text):
+    return re.findall(r"[a-z0-9']+", text.lower())
+
+
+def word_error_rate(reference, hypothesis):
+    """(substitutions + deletions + insertions) / reference words, on lowercased words without punctuation."""
+    ref, hyp = _words(reference), _words(hypothesis)
+    if not ref:
+        return 0.0 if not hyp else 1.0
+    # Edit distance over words, one row at a time
+    previous = list(range(len(hyp) + 1))
+    for i, ref_word in enumerate(ref, 1):
+        current = [i]
+        for j, hyp_word in enumerate(hyp, 1):
+            current.append(min(
+                previous[j] + 1,  # deletion
+                current[j - 1] + 1,  # insertion
+                previous[j - 1] + (ref_word != hyp_word),  # substitution or match
+            ))
+        previous = current
+    return previous[-1] / len(ref)
+
+
+class Command(BaseCommand):
+    help = (
+        "Transcribe a sample clip with each transcription backend and compare real-time factor "
+        "(processing seconds per second of audio) and word error rate against a reference transcript."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument("clip", help="Audio or video file to transcribe.")
+        parser.add_argument("reference", help="Text file with the correct transcript of the clip.")
+        parser.add_argument(
+            "--backends", default=",".join(transcription.BACKENDS),
+            help=f"Comma-separated backends to compare (default: all of {', '.join(transcription.BACKENDS)}).",
+        )
+        parser.add_argument("--model", default=settings.WHISPER_MODEL, help="Whisper model size.")
+        parser.add_argument("--compute-type", default=settings.TRANSCRIBE_COMPUTE_TYPE, help="faster-whisper weight type.")
+        parser.add_argument("--workers", type=int, default=1, help="Worker processes per backend.")
+        parser.add_argument("--rounds", type=int, default=2, help="Timed runs per backend (the best one is reported).")
+
+    def handle(self, *args, **options):
+        backends = [b.strip() for b in options["backends"].split(",") if b.strip()]
+        unknown = [b for b in backends if b not in transcription.BACKENDS]
+        if unknown:
+            raise CommandError(f"Unknown backend(s): {', '.join(unknown)}")
+        with open(options["reference"], encoding="utf-8") as f:
+            reference = f.read()
+
+        # A backend that isn't installed runs as the fallback; report (and run) what really runs
+        resolved = []
+        for backend in backends:
+            actual = transcription.resolve_backend(backend)
+            if actual != backend:
+                self.stderr.write(f"{backend} is not installed, {actual} runs in its place")
+            resolved.append(actual)
+
+        results = []
+        for backend in dict.fromkeys(resolved):
+            results.append(self.run_backend(backend, options, reference))
+        transcription.reset_pool()
+
+        self.stdout.write(f"{'backend':<16} {'load s':>7} {'audio s':>8} {'best s':>7} {'RTF':>6} {'WER':>6}")
+        for backend, load, duration, best, wer in results:
+            self.stdout.write(
+                f"{backend:<16} {load:>7.1f} {duration:>8.1f} {best:>7.1f} {best / duration:>6.3f} {wer:>6.1%}"
+            )
+
+    def run_backend(self, backend, options, reference):
+        pool = transcription.get_pool(
+            options["workers"], options["model"], settings.TRANSCRIBE_THREADS_PER_WORKER,
+            backend=backend, compute_type=options["compute_type"],
+        )
+        # Workers load the model on their first task; time that separately from transcription
+        started = time.monotonic()
+        pool.submit(time.sleep, 0).result()
+        load = time.monotonic() - started
+
+        timings, result = [], None
+        for _ in range(max(options["rounds"], 1)):
+            started = time.monotonic()
+            result = transcription.transcribe_file(
+                options["clip"], pool,
+                target=settings.TRANSCRIBE_SEGMENT_SECONDS,
+                longest=settings.TRANSCRIBE_MAX_SEGMENT_SECONDS,
+                noise_db=settings.TRANSCRIBE_SILENCE_DB,
+                min_silence=settings.TRANSCRIBE_SILENCE_SECONDS,
+            )
+            timings.append(time.monotonic() - started)
+
+        duration = self.clip_duration(options["clip"])
+        return backend, load, duration, min(timings), word_error_rate(reference, result["text"])
+
+    def clip_duration(self, clip):
+        with tempfile.TemporaryDirectory(prefix="benchmark-") as tmp:
+            wav_path = os.path.join(tmp, "audio.wav")
+            transcription.extract_audio(clip, wav_path)
+            return transcription.wav_duration(wav_path)
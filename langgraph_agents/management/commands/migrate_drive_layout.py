@@ -0,0 +1,125 @@
+from django.conf import settings
+from django.core.management.base import BaseCommand, CommandError
+
+from langgraph_agents.services.drive_batch import batch_trash_files, batch_update_files, ensure_drive_folder_paths
+from langgraph_agents.services.drive_layout import flat_folder_path, path_tags, file_tags
+from langgraph_agents.services.drive_service import (
+    get_drive_service, find_drive_folder, list_folder_children, register_drive_file,
+    DRIVE_FILE_FIELDS, FOLDER_MIME_TYPE,
+)
+
+CHILD_FIELDS = "id, name, mimeType, parents"
+
+
+class Command(BaseCommand):
+    help = (
+        "Move content from the nested Drive layout (type → contributor_course_chapter → topic folders) "
+        "into the flat layout: one folder, each file tagged with appProperties. Set DRIVE_LAYOUT = \"flat\" afterwards."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument("--dry-run", action="store_true", help="Only report what would be moved.")
+        parser.add_argument("--prune", action="store_true",
+                            help="Move the chapter and topic folders to the Drive trash once they are empty.")
+
+    def handle(self, *args, **options):
+        service = get_drive_service()
+        root_id = find_drive_folder(service, "oer_content")
+        if not root_id:
+            raise CommandError("No oer_content folder in Drive")
+
+        moves, emptied_topics, emptied_chapters = self.collect(service, root_id)
+        emptied = len(emptied_topics) + len(emptied_chapters)
+        print(f"[INFO] {len(moves)} file(s) to tag and move, {emptied} folder(s) left empty")
+        if options["dry_run"]:
+            for file_id, (drive_file, tags) in moves.items():
+                print(f"  {drive_file['name']} ({file_id}): {tags}")
+            return
+
+        flat_id = ensure_drive_folder_paths(service, [flat_folder_path()])[flat_folder_path()]
+        updates = {
+            file_id: {
+                "body": {"appProperties": tags},
+                "addParents": flat_id,
+                "removeParents": ",".join(drive_file["parents"]),
+            }
+            for file_id, (drive_file, tags) in moves.items()
+        }
+        failed = 0
+        for file_id, (response, error) in batch_update_files(service, updates, fields=DRIVE_FILE_FIELDS).items():
+            if error is not None:
+                failed += 1
+                print(f"[ERROR] Could not move {moves[file_id][0]['name']} ({file_id}): {error}")
+            else:
+                register_drive_file(response)
+        print(f"[INFO] Moved {len(moves) - failed} file(s) into oer_content/{settings.DRIVE_FLAT_FOLDER}")
+
+        if options["prune"]:
+            if failed:
+                print("[WARN] Some files were not moved; leaving the old folders in place")
+                return
+            # Topics first, so that their chapters are empty when checked
+            trashed = sum(self.prune(service, folder_ids) for folder_ids in (emptied_topics, emptied_chapters))
+            print(f"[INFO] Moved {trashed} empty folder(s) to the Drive trash")
+
+    def prune(self, service, folder_ids):
+        """
+        Trash the folders that are still empty now: anything uploaded into them
+        since they were listed keeps its folder. Returns how many were trashed.
+        """
+        occupied = {
+            child["parents"][0] for child in list_folder_children(service, folder_ids, fields="id, parents")
+        }
+        for folder_id in occupied:
+            print(f"[WARN] Folder {folder_id} is no longer empty; leaving it in place")
+        errors = batch_trash_files(service, [fid for fid in folder_ids if fid not in occupied])
+        for folder_id, error in errors.items():
+            if error is not None:
+                print(f"[ERROR] Could not trash folder {folder_id}: {error}")
+        return sum(error is None for error in errors.values())
+
+    def collect(self, service, root_id):
+        """
+        Walk type root → chapter folders → topic folders; returns
+        ({file_id: (file, tags)}, [topic folder IDs], [chapter folder IDs]) with the folders left empty.
+        """
+        moves, emptied_topics, emptied_chapters = {}, [], []
+        for type_name in settings.GOOGLE_DRIVE_FOLDERS.values():
+            type_id = find_drive_folder(service, type_name, root_id)
+            if not type_id:
+                continue
+
+            chapters = {}  # chapter folder ID → tags
+            for folder in list_folder_children(service, [type_id], fields=CHILD_FIELDS):
+                tags = path_tags(("oer_content", type_name, folder["name"]))
+                if folder["mimeType"] == FOLDER_MIME_TYPE and tags:
+                    chapters[folder["id"]] = tags
+                else:
+                    print(f"[WARN] Skipping {type_name}/{folder['name']}: not a contributor_course_chapter folder")
+
+            topics = {}  # topic folder ID → tags
+            topic_chapters = {}  # topic folder ID → chapter folder ID
+            for child in list_folder_children(service, list(chapters), fields=CHILD_FIELDS):
+                tags = chapters[child["parents"][0]]
+                if child["mimeType"] == FOLDER_MIME_TYPE:
+                    topics[child["id"]] = dict(tags, topic=child["name"])
+                    topic_chapters[child["id"]] = child["parents"][0]
+                else:
+                    moves[child["id"]] = (child, file_tags(tags))
+
+            kept = set()  # folders that won't be empty after the move
+            for child in list_folder_children(service, list(topics), fields=CHILD_FIELDS):
+                tags = topics[child["parents"][0]]
+                if child["mimeType"] == FOLDER_MIME_TYPE:
+                    print(f"[WARN] Skipping nested folder {child['name']} under topic {tags['topic']}")
+                    kept.add(child["parents"][0])
+                    continue
+                moves[child["id"]] = (child, file_tags(tags))
+
+            # Trashing a Drive folder trashes everything in it, so keep the chapters of kept topics too
+            for topic_id, chapter_id in topic_chapters.items():
+                if topic_id in kept:
+                    kept.add(chapter_id)
+            emptied_topics += [folder_id for folder_id in topics if folder_id not in kept]
+            emptied_chapters += [folder_id for folder_id in chapters if folder_id not in kept]
+        return moves, emptied_topics, emptied_chapters
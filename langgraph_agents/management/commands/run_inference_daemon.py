@@ -0,0 +1,25 @@
+from django.conf import settings
+from django.core.management.base import BaseCommand
+
+from langgraph_agents.services.inference_server import build_server
+
+
+class Command(BaseCommand):
+    help = (
+        "Load the Whisper and sentence-transformers models once and serve transcription and "
+        "embedding requests from web and job workers over a Unix socket."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument("--socket", default=str(settings.INFERENCE_SOCKET), help="Unix socket path to listen on.")
+
+    def handle(self, *args, **options):
+        server = build_server(options["socket"])
+        print(f"[INFO] Inference daemon listening on {options['socket']}")
+        try:
+            server.serve_forever()
+        except KeyboardInterrupt:
+            pass
+        finally:
+            server.server_close()
+            print("[INFO] Inference daemon stopped")
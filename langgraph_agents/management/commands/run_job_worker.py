@@ -0,0 +1,73 @@
+import os
+import signal
+import socket
+import time
+from concurrent.futures import ThreadPoolExecutor, wait, FIRST_COMPLETED
+
+from django.conf import settings
+from django.core.management.base import BaseCommand
+from django.db import close_old_connections, connection
+
+from langgraph_agents.services.job_queue import claim_jobs, extend_locks, run_job
+
+
+class Command(BaseCommand):
+    help = "Run queued background jobs (submission recording, evaluation, ...) from the Job table."
+
+    def add_arguments(self, parser):
+        parser.add_argument("--concurrency", type=int, default=settings.JOB_WORKER_CONCURRENCY,
+                            help="Jobs this worker runs at the same time.")
+        parser.add_argument("--once", action="store_true",
+                            help="Run the jobs that are due now and exit instead of polling.")
+        parser.add_argument("--poll-interval", type=float, default=settings.JOB_POLL_INTERVAL,
+                            help="Seconds between polls for new jobs when idle.")
+
+    def handle(self, *args, **options):
+        worker_id = f"{socket.gethostname()}:{os.getpid()}"
+        concurrency = options["concurrency"]
+        heartbeat_every = settings.JOB_VISIBILITY_TIMEOUT / 3
+        self.stopping = False
+        signal.signal(signal.SIGTERM, self.stop)
+        signal.signal(signal.SIGINT, self.stop)
+
+        print(f"[INFO] Job worker {worker_id} started ({concurrency} at a time)")
+        running = {}  # future → job
+        last_heartbeat = time.monotonic()
+        with ThreadPoolExecutor(max_workers=concurrency, thread_name_prefix="job") as pool:
+            while True:
+                if not self.stopping and len(running) < concurrency:
+                    for job in claim_jobs(worker_id, concurrency - len(running)):
+                        running[pool.submit(self.run_in_thread, job, worker_id)] = job
+                    close_old_connections()
+
+                if not running and (self.stopping or options["once"]):
+                    break
+
+                # Keep the locks of long jobs (video evaluation) from expiring
+                if running and time.monotonic() - last_heartbeat >= heartbeat_every:
+                    extend_locks(worker_id, [job.id for job in running.values()])
+                    last_heartbeat = time.monotonic()
+
+                if running:
+                    done, _ = wait(running, timeout=options["poll_interval"], return_when=FIRST_COMPLETED)
+                    for future in done:
+                        running.pop(future)
+                else:
+                    time.sleep(options["poll_interval"])
+
+        print(f"[INFO] Job worker {worker_id} stopped")
+
+    def stop(self, signum, frame):
+        if not self.stopping:
+            print("[INFO] Finishing running jobs before exiting (signal again to force)")
+            self.stopping = True
+        else:
+            raise KeyboardInterrupt
+
+    @staticmethod
+    def run_in_thread(job, worker_id):
+        try:
+            return run_job(job, worker_id)
+        finally:
+            # One DB connection per pool thread, closed after each job instead of leaking
+            connection.close()
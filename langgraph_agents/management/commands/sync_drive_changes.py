@@ -0,0 +1,40 @@
+import time
+
+from django.conf import settings
+from django.core.management.base import BaseCommand
+from google.auth.exceptions import RefreshError
+
+from langgraph_agents.services.drive_service import get_drive_service, reset_drive_service
+from langgraph_agents.services.drive_sync import bootstrap_drive_mirror, sync_drive_changes
+
+
+class Command(BaseCommand):
+    help = "Keep the DriveFile mirror table in step with Google Drive by following its change feed."
+
+    def add_arguments(self, parser):
+        parser.add_argument("--once", action="store_true", help="Sync once and exit instead of looping.")
+        parser.add_argument("--bootstrap", action="store_true",
+                            help="Re-crawl oer_content before syncing (rebuilds the mirror).")
+        parser.add_argument("--interval", type=int, default=settings.DRIVE_SYNC_INTERVAL,
+                            help="Seconds between syncs when looping.")
+
+    def handle(self, *args, **options):
+        if options["bootstrap"]:
+            bootstrap_drive_mirror(get_drive_service())
+
+        while True:
+            try:
+                applied = sync_drive_changes(get_drive_service())
+                if applied:
+                    print(f"[INFO] Applied {applied} Drive change(s) to the mirror")
+            except RefreshError as e:
+                print(f"[ERROR] Drive token refresh failed: {e}")
+                reset_drive_service()
+            except Exception as e:
+                if options["once"]:
+                    raise
+                print(f"[ERROR] Drive sync failed: {e}")
+
+            if options["once"]:
+                return
+            time.sleep(options["interval"])
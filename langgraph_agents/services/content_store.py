@@ -0,0 +1,495 @@
+import datetime
+import hashlib
+import io
+import mimetypes
+import mmap
+import os
+import shutil
+import tempfile
+import threading
+from abc import ABC, abstractmethod
+from pathlib import Path
+
+from django.conf import settings
+from django.core.cache import cache
+from django.http import FileResponse, Http404, HttpResponse
+from googleapiclient.http import MediaIoBaseDownload, MediaIoBaseUpload
+
+from accounts.models import DriveFile
+from langgraph_agents.services.download_cache import DownloadCache
+from langgraph_agents.services.drive_batch import batch_delete_files, ensure_drive_folder_paths
+from langgraph_agents.services.drive_layout import (
+    flat_layout_enabled, path_tags, virtual_folder_id, parse_virtual_folder_id, list_tagged_files,
+    resolve_upload_target,
+)
+from langgraph_agents.services.drive_resilience import DriveUnavailableError, is_retryable, record
+from langgraph_agents.services.drive_sync import mirror_is_fresh, list_mirrored_files
+from langgraph_agents.services.drive_service import (
+    get_authorized_session, get_drive_service, find_drive_folder, list_folder_children, register_drive_file,
+    DRIVE_FILE_FIELDS,
+)
+
+DRIVE_FILES_URL = "https://www.googleapis.com/drive/v3/files"
+
+# Everything a ContentStore says about a file uses Drive's field names:
+# id, name, mimeType, parents, size, modifiedTime (and md5Checksum where known).
+
+
+class ContentStore(ABC):
+    """
+    Where contributor content lives. Folders are addressed by their path of names
+    from the store root, e.g. ("oer_content", "pdf", "12_3_1", "Joins"); files and
+    folders are then referred to by the opaque IDs the store hands back.
+    """
+
+    # Whether uploads go straight to the backend while the request is read
+    # (Drive resumable sessions) instead of through Django's upload handlers
+    streams_uploads = False
+
+    def ensure_folder(self, path):
+        """Create the folder path as needed and return its ID."""
+        return self.ensure_folders([path])[tuple(path)]
+
+    @abstractmethod
+    def ensure_folders(self, paths):
+        """Create several folder paths as needed; returns ``{path: folder_id}``."""
+
+    @abstractmethod
+    def find_folder(self, path):
+        """Return the folder ID for a path, or None if it doesn't exist (never creates)."""
+
+    @abstractmethod
+    def list_files(self, folder_ids):
+        """Yield the files directly inside the given folders."""
+
+    @abstractmethod
+    def get_metadata(self, file_id):
+        """Return a file's metadata dict."""
+
+    @abstractmethod
+    def save(self, folder_id, name, fileobj, mime_type=None):
+        """Store a new file from a binary file object and return its metadata."""
+
+    @abstractmethod
+    def replace(self, file_id, fileobj, mime_type=None):
+        """Overwrite an existing file's contents and return its metadata."""
+
+    @abstractmethod
+    def open(self, file_id, metadata=None):
+        """
+        Return a readable, seekable binary file object for the file's contents.
+        Pass ``metadata`` if the caller already fetched it, to save a lookup.
+        """
+
+    @abstractmethod
+    def delete(self, file_ids):
+        """Delete several files; returns ``{file_id: None or error}``."""
+
+    @abstractmethod
+    def serve(self, file_id, as_attachment=False):
+        """Return an HTTP response that sends the file to the browser."""
+
+    def read(self, file_id):
+        with self.open(file_id) as f:
+            return f.read()
+
+    def iter_range(self, file_id, start, end, metadata=None):
+        """Yield bytes ``start`` to ``end`` (inclusive) of the file, one block at a time."""
+        with self.open(file_id, metadata) as f:
+            yield from _iter_file_range(f, start, end)
+
+    def local_path(self, file_id, metadata=None):
+        """Path of a copy of the file on local disk if the store keeps one, else None."""
+        return None
+
+
+# ---------- Google Drive ----------
+
+class DriveContentStore(ContentStore):
+    """Content kept in Google Drive, through the shared per-thread Drive client."""
+
+    streams_uploads = True
+
+    def _virtual_folder(self, path):
+        """Flat-layout folder ID for a content folder path, or None to use real Drive folders."""
+        if not flat_layout_enabled():
+            return None
+        tags = path_tags(path)
+        return virtual_folder_id(tags) if tags else None
+
+    def ensure_folders(self, paths):
+        paths = [tuple(p) for p in paths]
+        folder_ids = {p: self._virtual_folder(p) for p in paths}
+        real_paths = [p for p, folder_id in folder_ids.items() if folder_id is None]
+        if real_paths:
+            folder_ids.update(ensure_drive_folder_paths(get_drive_service(), real_paths))
+        return folder_ids
+
+    def find_folder(self, path):
+        virtual_id = self._virtual_folder(path)
+        if virtual_id:
+            return virtual_id  # tags, not folders: there is nothing to look up
+        service = get_drive_service()
+        folder_id = None
+        for name in path:
+            folder_id = find_drive_folder(service, name, folder_id)
+            if not folder_id:
+                return None
+        return folder_id
+
+    def upload_target(self, folder_id):
+        """``(parent_id, app_properties)`` for a new file in ``folder_id`` (see drive_layout)."""
+        return resolve_upload_target(get_drive_service(), folder_id)
+
+    def list_files(self, folder_ids):
+        virtual_ids = [folder_id for folder_id in folder_ids if parse_virtual_folder_id(folder_id)]
+        folder_ids = [folder_id for folder_id in folder_ids if folder_id not in virtual_ids]
+
+        files = []
+        if virtual_ids:
+            # The DriveFile mirror doesn't keep appProperties, so tagged files are always
+            # listed live: one query per chapter, whatever the number of types and topics
+            service = get_drive_service()
+            files += self._live_listing(
+                virtual_ids, lambda: list(list_tagged_files(service, virtual_ids, DRIVE_FILE_FIELDS))
+            )
+        if not any(folder_ids):
+            return files
+
+        # While the change-feed sync keeps the DriveFile mirror current, listings are one SQL query
+        if mirror_is_fresh():
+            return files + list_mirrored_files(folder_ids)
+        return files + self._live_listing(
+            folder_ids, lambda: list(list_folder_children(get_drive_service(), folder_ids, fields=DRIVE_FILE_FIELDS))
+        )
+
+    def _live_listing(self, folder_ids, fetch):
+        # Keep the result of a live listing so it can be served (stale) while Drive is degraded
+        stale_key = "drive_listing:" + hashlib.sha1(",".join(sorted(filter(None, folder_ids))).encode()).hexdigest()
+        try:
+            files = fetch()
+        except Exception as e:
+            if not isinstance(e, DriveUnavailableError) and not is_retryable(e):
+                raise
+            stale = cache.get(stale_key)
+            if stale is None:
+                raise
+            print(f"[WARN] Drive unavailable ({e}), serving the last known listing")
+            record("stale_served")
+            return stale
+        cache.set(stale_key, files, settings.DRIVE_STALE_LISTING_TTL)
+        return files
+
+    def get_metadata(self, file_id):
+        # The mirror is kept current by the change-feed sync; otherwise ask Drive
+        row = DriveFile.objects.filter(drive_id=file_id).first() if mirror_is_fresh() else None
+        if row:
+            return row.as_drive_metadata()
+        return get_drive_service().files().get(fileId=file_id, fields=DRIVE_FILE_FIELDS).execute()
+
+    def save(self, folder_id, name, fileobj, mime_type=None):
+        service = get_drive_service()
+        parent_id, app_properties = resolve_upload_target(service, folder_id)
+        body = {'name': name, 'parents': [parent_id]}
+        if app_properties:
+            body['appProperties'] = app_properties
+        media = MediaIoBaseUpload(fileobj, mimetype=mime_type or _guess_mime_type(name), resumable=True)
+        drive_file = service.files().create(
+            body=body,
+            media_body=media,
+            fields=DRIVE_FILE_FIELDS
+        ).execute()
+        register_drive_file(drive_file)
+        return drive_file
+
+    def replace(self, file_id, fileobj, mime_type=None):
+        media = MediaIoBaseUpload(fileobj, mimetype=mime_type or 'application/octet-stream', resumable=True)
+        drive_file = get_drive_service().files().update(
+            fileId=file_id,
+            media_body=media,
+            fields=DRIVE_FILE_FIELDS
+        ).execute()
+        register_drive_file(drive_file)
+        return drive_file
+
+    def _cached_path(self, file_id, metadata=None):
+        """Download the file into the local cache (once per version) and return its path."""
+        version = _cache_version(file_id, metadata or self.get_metadata(file_id))
+
+        def download(fileobj):
+            downloader = MediaIoBaseDownload(fileobj, get_drive_service().files().get_media(fileId=file_id))
+            done = False
+            while not done:
+                _, done = downloader.next_chunk()
+
+        return get_download_cache().get(file_id, version, download)
+
+    def open(self, file_id, metadata=None):
+        try:
+            return open(self._cached_path(file_id, metadata), "rb")
+        except FileNotFoundError:
+            # Evicted by another worker between lookup and open: fetch it again
+            return open(self._cached_path(file_id, metadata), "rb")
+
+    def local_path(self, file_id, metadata=None):
+        return self._cached_path(file_id, metadata)
+
+    def iter_range(self, file_id, start, end, metadata=None):
+        # Serve from a full cached copy if there is one; otherwise stream just the
+        # requested bytes from one ranged media request, so seeking never downloads
+        # (or buffers) the whole file. Media reads aren't API calls, so they don't
+        # take tokens from the Drive rate limiter.
+        version = _cache_version(file_id, metadata or self.get_metadata(file_id))
+        whole = get_download_cache().lookup(file_id, version)
+        if whole:
+            with open(whole, "rb") as f:
+                yield from _iter_file_range(f, start, end)
+            return
+
+        response = get_authorized_session().get(
+            f"{DRIVE_FILES_URL}/{file_id}",
+            params={"alt": "media"},
+            headers={"Range": f"bytes={start}-{end}"},
+            stream=True,
+            timeout=settings.DRIVE_UPLOAD_TIMEOUT,
+        )
+        with response:
+            if response.status_code == 404:
+                raise Http404(f"No such file: {file_id}")
+            response.raise_for_status()
+            record("media_reads")
+            skip = start if response.status_code == 200 else 0  # the range was ignored: whole file
+            remaining = end - start + 1
+            for data in response.iter_content(settings.DRIVE_STREAM_BLOCK_SIZE):
+                if skip:
+                    dropped = min(skip, len(data))
+                    data, skip = data[dropped:], skip - dropped
+                if not data:
+                    continue
+                yield data[:remaining]
+                remaining -= len(data)
+                if remaining <= 0:
+                    return
+
+    def delete(self, file_ids):
+        return batch_delete_files(get_drive_service(), file_ids)
+
+    def serve(self, file_id, as_attachment=False):
+        metadata = self.get_metadata(file_id)
+        return FileResponse(
+            self.open(file_id, metadata), as_attachment=as_attachment,
+            filename=metadata['name'], content_type=metadata.get('mimeType'),
+        )
+
+
+# ---------- Local / mounted filesystem ----------
+
+class LocalContentStore(ContentStore):
+    """
+    Content kept under a directory on this machine (or a mounted share). IDs are
+    paths relative to the root. Reads are memory-mapped and responses use the
+    server's sendfile support, so nothing is copied through Python.
+    """
+
+    def __init__(self, root):
+        self.root = Path(root).resolve()
+        self.root.mkdir(parents=True, exist_ok=True)
+
+    def _path(self, item_id, allow_root=False):
+        # "", "." and the like name the root itself, which only listing may address
+        path = (self.root / item_id).resolve() if item_id else self.root
+        if path == self.root and not allow_root:
+            raise Http404(f"{item_id!r} is not a file or folder in the content store")
+        if path != self.root and self.root not in path.parents:
+            raise Http404(f"{item_id} is outside the content store")
+        return path
+
+    def _id(self, path):
+        return path.relative_to(self.root).as_posix()
+
+    def _metadata(self, path):
+        stat = path.stat()
+        metadata = {
+            'id': self._id(path),
+            'name': path.name,
+            'mimeType': 'application/vnd.google-apps.folder' if path.is_dir() else _guess_mime_type(path.name),
+            'parents': [self._id(path.parent)] if path.parent != self.root else [],
+            'modifiedTime': datetime.datetime.fromtimestamp(stat.st_mtime, datetime.timezone.utc).isoformat(),
+        }
+        if path.is_file():
+            metadata['size'] = str(stat.st_size)
+        return metadata
+
+    def ensure_folders(self, paths):
+        folder_ids = {}
+        for path in paths:
+            folder = self._path(os.path.join(*[_safe_name(name) for name in path]))
+            folder.mkdir(parents=True, exist_ok=True)
+            folder_ids[tuple(path)] = self._id(folder)
+        return folder_ids
+
+    def find_folder(self, path):
+        folder = self._path(os.path.join(*[_safe_name(name) for name in path]))
+        return self._id(folder) if folder.is_dir() else None
+
+    def list_files(self, folder_ids):
+        for folder_id in folder_ids:
+            if not folder_id:
+                continue
+            folder = self._path(folder_id, allow_root=True)
+            if not folder.is_dir():
+                continue
+            for entry in sorted(folder.iterdir()):
+                if not entry.name.startswith('.'):
+                    yield self._metadata(entry)
+
+    def get_metadata(self, file_id):
+        path = self._path(file_id)
+        if not path.exists():
+            raise Http404(f"No such file: {file_id}")
+        return self._metadata(path)
+
+    def _write(self, path, fileobj):
+        # Write next to the target and rename, so readers never see a partial file
+        fd, tmp_path = tempfile.mkstemp(dir=path.parent, prefix=".upload-")
+        try:
+            with os.fdopen(fd, "wb") as f:
+                shutil.copyfileobj(fileobj, f, 1024 * 1024)
+            os.replace(tmp_path, path)
+        except Exception:
+            if os.path.exists(tmp_path):
+                os.remove(tmp_path)
+            raise
+        return self._metadata(path)
+
+    def save(self, folder_id, name, fileobj, mime_type=None):
+        folder = self._path(folder_id)
+        folder.mkdir(parents=True, exist_ok=True)
+        return self._write(folder / _safe_name(name), fileobj)
+
+    def replace(self, file_id, fileobj, mime_type=None):
+        path = self._path(file_id)
+        if not path.is_file():
+            raise Http404(f"No such file: {file_id}")
+        return self._write(path, fileobj)
+
+    def open(self, file_id, metadata=None):
+        path = self._path(file_id)
+        with open(path, "rb") as f:
+            if os.fstat(f.fileno()).st_size == 0:
+                return io.BytesIO()  # mmap can't map an empty file
+            # The mapping stays valid after the descriptor is closed
+            return mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+
+    def delete(self, file_ids):
+        errors = {}
+        for file_id in dict.fromkeys(file_ids):
+            try:
+                path = self._path(file_id)
+                if path.is_dir():
+                    raise IsADirectoryError(f"{file_id} is a folder; only files can be deleted")
+                if path.is_file():
+                    path.unlink()
+                errors[file_id] = None
+            except Exception as e:
+                errors[file_id] = e
+        return errors
+
+    def serve(self, file_id, as_attachment=False):
+        path = self._path(file_id)
+        if not path.is_file():
+            raise Http404(f"No such file: {file_id}")
+
+        if settings.CONTENT_STORE_ACCEL_REDIRECT:
+            # Let the front-end server (nginx X-Accel-Redirect) send the bytes itself
+            response = HttpResponse(content_type=_guess_mime_type(path.name))
+            response['X-Accel-Redirect'] = f"{settings.CONTENT_STORE_ACCEL_REDIRECT.rstrip('/')}/{file_id}"
+            disposition = 'attachment' if as_attachment else 'inline'
+            response['Content-Disposition'] = f'{disposition}; filename="{path.name}"'
+            return response
+
+        # FileResponse hands the open file to wsgi.file_wrapper, which uses sendfile() where available
+        return FileResponse(open(path, "rb"), as_attachment=as_attachment, filename=path.name)
+
+    def local_path(self, file_id, metadata=None):
+        return str(self._path(file_id))
+
+
+def _cache_version(file_id, metadata):
+    version = metadata.get('md5Checksum') or metadata.get('modifiedTime')
+    if not version:
+        raise ValueError(f"Drive file {file_id} has neither md5Checksum nor modifiedTime")
+    return version
+
+
+def _iter_file_range(f, start, end, block_size=1024 * 1024):
+    f.seek(start)
+    remaining = end - start + 1
+    while remaining > 0:
+        data = f.read(min(block_size, remaining))
+        if not data:
+            return
+        remaining -= len(data)
+        yield data
+
+
+def parse_range_header(header, size):
+    """
+    Parse a single-range ``Range: bytes=...`` header against a file of ``size`` bytes.
+    Returns (start, end) inclusive, None to send the whole file (no header, or one
+    we don't handle such as multiple ranges), or False if the range can't be satisfied.
+    """
+    if not header or not header.startswith("bytes=") or "," in header:
+        return None
+    first, _, last = header[len("bytes="):].strip().partition("-")
+    try:
+        if first:
+            start = int(first)
+            end = min(int(last), size - 1) if last else size - 1
+        else:
+            # "bytes=-500" means the last 500 bytes
+            start, end = max(size - int(last), 0), size - 1
+    except ValueError:
+        return None
+    if start > end or start >= size:
+        return False
+    return start, end
+
+
+def _guess_mime_type(name):
+    return mimetypes.guess_type(name)[0] or 'application/octet-stream'
+
+
+def _safe_name(name):
+    """A single path component: no separators and no '.'/'..'."""
+    name = str(name).replace("/", "_").replace("\\", "_").strip()
+    return name if name not in ("", ".", "..") else "_"
+
+
+_store = None
+_store_lock = threading.Lock()
+
+_download_cache = None
+
+
+def get_download_cache():
+    """The process-wide cache of files downloaded from Drive (settings.DRIVE_CACHE_DIR)."""
+    global _download_cache
+    with _store_lock:
+        if _download_cache is None:
+            _download_cache = DownloadCache(settings.DRIVE_CACHE_DIR, settings.DRIVE_CACHE_MAX_BYTES)
+        return _download_cache
+
+
+def get_content_store():
+    """Return the process-wide ContentStore selected by settings.CONTENT_STORE ("drive" or "local")."""
+    global _store
+    with _store_lock:
+        if _store is None:
+            if settings.CONTENT_STORE == "local":
+                _store = LocalContentStore(settings.CONTENT_STORE_ROOT)
+            elif settings.CONTENT_STORE == "drive":
+                _store = DriveContentStore()
+            else:
+                raise ValueError(f"Unknown CONTENT_STORE {settings.CONTENT_STORE!r} (expected 'drive' or 'local')")
+        return _store
@@ -0,0 +1,111 @@
+from concurrent.futures import ThreadPoolExecutor
+import threading
+
+from django.conf import settings
+from django.db import connections
+from google.auth.exceptions import RefreshError
+
+from langgraph_agents.services.content_store import get_content_store
+from langgraph_agents.services.drive_resilience import DriveUnavailableError
+
+# Errors that mean Drive can't be used at all (not just one folder): the caller
+# handles them (e.g. by asking to reconnect) instead of getting empty panels
+ACCOUNT_ERRORS = (RefreshError, DriveUnavailableError)
+
+# Shared, bounded pool for folder resolution. Its threads are long-lived, so each
+# keeps the Drive client it built (see get_drive_service) across requests.
+_executor = None
+_executor_lock = threading.Lock()
+
+
+def _get_executor():
+    global _executor
+    with _executor_lock:
+        if _executor is None:
+            _executor = ThreadPoolExecutor(
+                max_workers=settings.DRIVE_LISTING_WORKERS, thread_name_prefix="drive-listing"
+            )
+        return _executor
+
+
+def _resolve_content_folder(folder_type, base_folder_name, topic=None):
+    """oer_content → type root → contributor folder (→ topic). None if it doesn't exist yet."""
+    try:
+        path = ("oer_content", settings.GOOGLE_DRIVE_FOLDERS[folder_type], base_folder_name)
+        return get_content_store().find_folder(path + (topic,) if topic else path)
+    finally:
+        # Runs on a pool thread: don't keep its DB connection open between requests
+        connections.close_all()
+
+
+def list_contributor_files(contributor_id, course_id, chapter_number, folder_types, topic=None):
+    """
+    Fetch a contributor's files for one chapter (optionally one topic) across the
+    given content types. Folder chains are resolved concurrently (mostly index hits)
+    and all leaf folders are then listed in a single pass (one Drive query).
+    A content type whose folder can't be read is left out; the others are still returned.
+    ACCOUNT_ERRORS (an expired token, an open circuit) are raised instead.
+    """
+    base_folder_name = f"{contributor_id}_{course_id}_{chapter_number}"
+
+    executor = _get_executor()
+    futures = {
+        folder_type: executor.submit(_resolve_content_folder, folder_type, base_folder_name, topic)
+        for folder_type in folder_types
+    }
+    folder_types_by_id = {}
+    for folder_type, future in futures.items():
+        try:
+            folder_id = future.result()
+        except ACCOUNT_ERRORS:
+            raise
+        except Exception as e:
+            print(f"[Drive Fetch Error - {folder_type}] {e}")
+            continue
+        if folder_id:
+            folder_types_by_id[folder_id] = folder_type
+
+    if not folder_types_by_id:
+        return []
+
+    children = _list_folders(folder_types_by_id)
+
+    files_by_type = {folder_type: [] for folder_type in folder_types}
+    for f in children:
+        parent_id = next((p for p in f.get('parents', []) if p in folder_types_by_id), None)
+        if not parent_id:
+            continue
+        folder_type = folder_types_by_id[parent_id]
+        files_by_type[folder_type].append({
+            'id': f['id'],
+            'name': f['name'],
+            'mimeType': f['mimeType'],
+            'type': folder_type
+        })
+
+    # Keep the panel grouped in the order the caller asked for
+    return [f for folder_type in folder_types for f in files_by_type[folder_type]]
+
+
+def _list_folders(folder_types_by_id):
+    """Children of all the folders in one query; if that fails, folder by folder, skipping the ones that fail."""
+    store = get_content_store()
+    try:
+        return list(store.list_files(list(folder_types_by_id)))
+    except ACCOUNT_ERRORS:
+        raise
+    except Exception as e:
+        if len(folder_types_by_id) == 1:
+            print(f"[Drive Fetch Error - {next(iter(folder_types_by_id.values()))}] {e}")
+            return []
+        print(f"[WARN] Combined Drive listing failed, listing folders one by one: {e}")
+
+    children = []
+    for folder_id, folder_type in folder_types_by_id.items():
+        try:
+            children.extend(store.list_files([folder_id]))
+        except ACCOUNT_ERRORS:
+            raise
+        except Exception as e:
+            print(f"[Drive Fetch Error - {folder_type}] {e}")
+    return children
@@ -0,0 +1,51 @@
+import zlib
+
+from django.db import IntegrityError, transaction
+
+from accounts.models import ContentDerivative
+
+
+def _version(metadata):
+    return metadata.get("md5Checksum") or metadata.get("modifiedTime")
+
+
+def lookup_derived_text(metadata, kind, extractor):
+    """The stored text for this file version and extractor, or None."""
+    version = _version(metadata)
+    if not version:
+        return None
+    row = ContentDerivative.objects.filter(
+        file_id=metadata["id"], version=version, kind=kind, extractor=extractor
+    ).only("data").first()
+    if not row:
+        return None
+    print(f"[INFO] Reusing {kind} of {metadata.get('name', metadata['id'])}")
+    return zlib.decompress(bytes(row.data)).decode("utf-8")
+
+
+def store_derived_text(metadata, kind, extractor, text):
+    version = _version(metadata)
+    if not version:
+        return  # nothing to tell versions apart by
+    try:
+        with transaction.atomic():
+            ContentDerivative.objects.create(
+                file_id=metadata["id"], version=version, kind=kind, extractor=extractor,
+                data=zlib.compress(text.encode("utf-8"), 6), text_length=len(text),
+            )
+    except IntegrityError:
+        pass  # another worker extracted the same version meanwhile
+
+
+def derived_text(metadata, kind, extractor, extract):
+    """
+    Text derived from a stored file, extracted at most once per file version and
+    extractor version. ``metadata`` is the file's store metadata (id plus
+    md5Checksum or modifiedTime); ``extract()`` returns the text, or raises if
+    extraction failed (failures aren't cached).
+    """
+    text = lookup_derived_text(metadata, kind, extractor)
+    if text is None:
+        text = extract()
+        store_derived_text(metadata, kind, extractor, text)
+    return text
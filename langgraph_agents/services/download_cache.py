@@ -0,0 +1,135 @@
+import hashlib
+import os
+import tempfile
+import threading
+from collections import OrderedDict
+from concurrent.futures import Future
+
+
+class DownloadCache:
+    """
+    Content-addressed on-disk cache of downloaded files.
+
+    Entries are keyed by file ID plus a version string (Drive's md5Checksum, or
+    modifiedTime when there is no checksum), so a changed file is simply a new
+    entry and stale copies age out. Writes go to a temp file and are renamed into
+    place, so readers (in any process) never see a partial file. Threads asking
+    for the same entry while it downloads share that one download. Least recently
+    used entries are evicted once the cache grows past ``max_bytes``, going by an
+    in-memory LRU index that is read from disk once per process.
+    """
+
+    def __init__(self, root, max_bytes):
+        self.root = str(root)
+        self.max_bytes = max_bytes
+        os.makedirs(self.root, exist_ok=True)
+        self._in_flight = {}
+        self._lock = threading.Lock()
+        self._index = None  # path → size, least recently used first; built on first use
+        self._size = 0  # total size of the indexed entries
+
+    def _entry_path(self, file_id, version):
+        key = hashlib.sha256(f"{file_id}:{version}".encode()).hexdigest()
+        return os.path.join(self.root, key[:2], key)
+
+    def lookup(self, file_id, version):
+        """Path of the cached copy if there is one (marking it used), else None."""
+        path = self._entry_path(file_id, version)
+        try:
+            os.utime(path)  # mark as recently used, for processes that index the directory later
+            size = os.stat(path).st_size
+        except FileNotFoundError:
+            return None
+        with self._lock:
+            self._touch(path, size)
+        return path
+
+    def get(self, file_id, version, download):
+        """
+        Return the path of the cached copy, calling ``download(fileobj)`` to fill
+        it if it isn't cached yet.
+        """
+        path = self.lookup(file_id, version)
+        if path:
+            return path
+
+        path = self._entry_path(file_id, version)
+        with self._lock:
+            future = self._in_flight.get(path)
+            owner = future is None
+            if owner:
+                future = Future()
+                self._in_flight[path] = future
+
+        if not owner:
+            return future.result()
+
+        try:
+            if not os.path.exists(path):
+                size = self._fill(path, download)
+                self._account(size, keep=path)
+            future.set_result(path)
+            return path
+        except BaseException as e:
+            future.set_exception(e)
+            raise
+        finally:
+            with self._lock:
+                del self._in_flight[path]
+
+    def _fill(self, path, download):
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+        fd, tmp_path = tempfile.mkstemp(dir=os.path.dirname(path), prefix=".download-")
+        try:
+            with os.fdopen(fd, "wb") as f:
+                download(f)
+                f.flush()
+                size = f.tell()
+            os.replace(tmp_path, path)
+        except BaseException:
+            if os.path.exists(tmp_path):
+                os.remove(tmp_path)
+            raise
+        return size
+
+    def _entries(self):
+        for dirpath, _, filenames in os.walk(self.root):
+            for name in filenames:
+                if name.startswith("."):
+                    continue  # a download still in progress
+                path = os.path.join(dirpath, name)
+                try:
+                    stat = os.stat(path)
+                except FileNotFoundError:
+                    continue
+                yield stat.st_mtime, stat.st_size, path
+
+    def _load_index(self):
+        # Called with the lock held; the one full scan of the directory
+        if self._index is None:
+            self._index = OrderedDict((path, size) for _, size, path in sorted(self._entries()))
+            self._size = sum(self._index.values())
+
+    def _touch(self, path, size):
+        # Called with the lock held: record the entry as the most recently used
+        self._load_index()
+        self._size += size - self._index.pop(path, 0)
+        self._index[path] = size
+
+    def _account(self, added, keep=None):
+        with self._lock:
+            self._touch(keep, added)
+            # Evict from the least recently used end; entries other processes
+            # already removed are simply dropped from the index
+            for path in list(self._index):
+                if self._size <= self.max_bytes:
+                    break
+                if path == keep:
+                    continue  # the entry we were asked for, however large
+                size = self._index.pop(path)
+                self._size -= size
+                try:
+                    # Readers that already opened the file keep their handle
+                    os.remove(path)
+                except FileNotFoundError:
+                    pass
@@ -0,0 +1,199 @@
+import time
+
+from accounts.models import DriveFolder, DriveFile
+from langgraph_agents.services.drive_resilience import (
+    IDEMPOTENT_METHODS, acquire_drive_tokens, backoff_delay, call_drive, is_rate_limited, is_retryable, record,
+)
+from langgraph_agents.services.drive_service import (
+    FOLDER_MIME_TYPE, escape_query_value, forget_drive_folder, is_not_found_error, _index_lookup, _index_store,
+)
+
+# Drive accepts at most 100 calls in one multipart batch request
+BATCH_LIMIT = 100
+
+# Items that fail with a rate-limit or server error are re-sent in the next batch this many times
+BATCH_RETRIES = 3
+
+
+def _is_idempotent(request):
+    return request.method.upper() in IDEMPOTENT_METHODS
+
+
+def execute_batch(service, requests):
+    """
+    Run many Drive API calls through the HTTP batch endpoint, BATCH_LIMIT per request.
+
+    requests maps a caller-chosen key to an un-executed request
+    (e.g. ``service.files().delete(fileId=...)``). Returns ``{key: (response, error)}``
+    with exactly one of the two set for every key, in the order given.
+
+    Only the items that failed are sent again. A batch holding a create is not
+    re-sent after a network error, since Drive may already have acted on part
+    of it; its items then all get that error.
+    """
+    results = {key: (None, None) for key in requests}
+    pending = list(requests.items())
+
+    for attempt in range(BATCH_RETRIES + 1):
+        retry = []
+        for start in range(0, len(pending), BATCH_LIMIT):
+            chunk = pending[start:start + BATCH_LIMIT]
+            by_id = {str(i): key for i, (key, _) in enumerate(chunk)}
+
+            def callback(request_id, response, exception, by_id=by_id):
+                key = by_id[request_id]
+                if exception is not None and is_rate_limited(exception):
+                    record("throttled")
+                if (exception is not None and attempt < BATCH_RETRIES
+                        and is_retryable(exception, _is_idempotent(requests[key]))):
+                    retry.append((key, requests[key]))
+                results[key] = (response, exception)
+
+            batch = service.new_batch_http_request(callback=callback)
+            for request_id, (_, request) in enumerate(chunk):
+                batch.add(request, request_id=str(request_id))
+            # Each item counts against Drive's quota; call_drive takes the batch's own token
+            acquire_drive_tokens(len(chunk) - 1)
+            try:
+                call_drive(batch.execute, "Drive batch", idempotent=all(_is_idempotent(r) for _, r in chunk))
+            except Exception as e:
+                # The batch request itself failed (after any safe retries): no item got an answer
+                for key, _ in chunk:
+                    if results[key] == (None, None):
+                        results[key] = (None, e)
+
+        if not retry:
+            break
+        print(f"[WARN] {len(retry)} Drive batch item(s) rate limited or failed, retrying")
+        record("retried", len(retry))
+        time.sleep(backoff_delay(attempt))
+        pending = retry
+
+    return results
+
+
+def batch_delete_files(service, file_ids):
+    """
+    Permanently delete several Drive files in as few HTTP requests as possible.
+    Returns ``{file_id: None or error}``; deleted files are dropped from the Drive index.
+    """
+    file_ids = list(dict.fromkeys(fid for fid in file_ids if fid))
+    results = execute_batch(service, {fid: service.files().delete(fileId=fid) for fid in file_ids})
+
+    errors = {fid: error for fid, (_, error) in results.items()}
+    # A 404 means the file is already gone, which is what the caller wanted
+    deleted = [fid for fid, error in errors.items() if error is None or is_not_found_error(error)]
+    if deleted:
+        DriveFile.objects.filter(drive_id__in=deleted).delete()
+        DriveFolder.objects.filter(drive_id__in=deleted).delete()
+    return errors
+
+
+def batch_trash_files(service, file_ids):
+    """
+    Move several Drive files or folders to the trash, where they can still be
+    restored for 30 days. Returns ``{file_id: None or error}``; trashed files are
+    dropped from the Drive index.
+    """
+    file_ids = list(dict.fromkeys(fid for fid in file_ids if fid))
+    results = batch_update_files(service, {fid: {"trashed": True} for fid in file_ids})
+
+    errors = {fid: error for fid, (_, error) in results.items()}
+    trashed = [fid for fid, error in errors.items() if error is None or is_not_found_error(error)]
+    if trashed:
+        DriveFile.objects.filter(drive_id__in=trashed).delete()
+        DriveFolder.objects.filter(drive_id__in=trashed).delete()
+    return errors
+
+
+def batch_update_files(service, updates, fields="id"):
+    """
+    Apply metadata changes to several files at once.
+
+    updates maps file ID to either a metadata body or a dict with ``body`` and the
+    extra ``files().update`` arguments (``addParents``, ``removeParents``).
+    Returns ``{file_id: (response, error)}``.
+    """
+    requests = {}
+    for file_id, update in updates.items():
+        kwargs = dict(update) if "body" in update else {"body": update}
+        requests[file_id] = service.files().update(fileId=file_id, fields=fields, **kwargs)
+    return execute_batch(service, requests)
+
+
+def batch_get_or_create_folders(service, folders):
+    """
+    Resolve several ``(folder_name, parent_id)`` pairs at once: indexed folders
+    cost nothing, the rest are looked up in one batch and whatever is still
+    missing is created in another. Returns ``{(folder_name, parent_id): folder_id}``.
+    """
+    folders = list(dict.fromkeys(folders))
+    found = {}
+    for name, parent_id in folders:
+        folder_id = _index_lookup(parent_id, name)
+        if folder_id:
+            found[(name, parent_id)] = folder_id
+
+    missing = [f for f in folders if f not in found]
+    if missing:
+        lookups = {}
+        for name, parent_id in missing:
+            query = f"mimeType='{FOLDER_MIME_TYPE}' and name='{escape_query_value(name)}' and trashed=false"
+            if parent_id:
+                query += f" and '{parent_id}' in parents"
+            lookups[(name, parent_id)] = service.files().list(q=query, spaces='drive', fields='files(id)')
+
+        for key, (response, error) in execute_batch(service, lookups).items():
+            if error is not None:
+                raise error
+            if response.get('files'):
+                found[key] = response['files'][0]['id']
+                _index_store(key[1], key[0], found[key])
+
+    to_create = [f for f in folders if f not in found]
+    if to_create:
+        creates = {}
+        for name, parent_id in to_create:
+            metadata = {'name': name, 'mimeType': FOLDER_MIME_TYPE}
+            if parent_id:
+                metadata['parents'] = [parent_id]
+            creates[(name, parent_id)] = service.files().create(body=metadata, fields='id')
+
+        errors = []
+        for key, (response, error) in execute_batch(service, creates).items():
+            if error is not None:
+                errors.append((key, error))
+                continue
+            # Indexed even if another create failed, so a retry doesn't create it twice
+            found[key] = response['id']
+            _index_store(key[1], key[0], found[key])
+        for key, error in errors:
+            if is_not_found_error(error) and key[1]:
+                # The indexed parent no longer exists in Drive
+                forget_drive_folder(key[1])
+        if errors:
+            raise errors[0][1]
+        print(f"[INFO] Created {len(to_create)} Drive folder(s) in one batch")
+
+    return {f: found[f] for f in folders}
+
+
+def ensure_drive_folder_paths(service, paths):
+    """
+    Make sure every folder path (a tuple of names from the Drive root) exists,
+    resolving all paths level by level so each level is at most two batch requests.
+    Returns ``{path: folder_id}``.
+    """
+    paths = [tuple(p) for p in paths]
+    resolved = {(): None}
+    depth = max((len(p) for p in paths), default=0)
+
+    for level in range(1, depth + 1):
+        prefixes = list(dict.fromkeys(p[:level] for p in paths if len(p) >= level))
+        ids = batch_get_or_create_folders(
+            service, [(prefix[-1], resolved[prefix[:-1]]) for prefix in prefixes]
+        )
+        for prefix in prefixes:
+            resolved[prefix] = ids[(prefix[-1], resolved[prefix[:-1]])]
+
+    return {p: resolved[p] for p in paths}
@@ -0,0 +1,131 @@
+import hashlib
+from urllib.parse import parse_qsl, urlencode
+
+from django.conf import settings
+
+from langgraph_agents.services.drive_batch import ensure_drive_folder_paths
+from langgraph_agents.services.drive_service import escape_query_value, iter_drive_files
+
+# In the flat layout every content file sits in one folder and carries these
+# appProperties instead of living in type → contributor_course_chapter → topic folders.
+CONTENT_TAG_KEYS = ("type", "contributor", "course", "chapter", "topic")
+
+# Prefix of the IDs the store hands out for "folders" in the flat layout
+VIRTUAL_FOLDER_PREFIX = "chapter:"
+
+# Drive rejects an appProperty whose key and value together exceed this many UTF-8 bytes
+APP_PROPERTY_MAX_BYTES = 124
+
+
+def flat_layout_enabled():
+    return settings.DRIVE_LAYOUT == "flat"
+
+
+def flat_folder_path():
+    return ("oer_content", settings.DRIVE_FLAT_FOLDER)
+
+
+def path_tags(path):
+    """
+    Tags for a content folder path ("oer_content", type folder, "{contributor}_{course}_{chapter}"[, topic]),
+    or None if the path isn't a content folder (e.g. a type root).
+    """
+    path = tuple(path)
+    if len(path) not in (3, 4) or path[0] != "oer_content":
+        return None
+    folder_types = {name: key for key, name in settings.GOOGLE_DRIVE_FOLDERS.items()}
+    parts = path[2].split("_", 2)
+    if path[1] not in folder_types or len(parts) != 3:
+        return None
+    tags = {"type": folder_types[path[1]], "contributor": parts[0], "course": parts[1], "chapter": parts[2]}
+    if len(path) == 4:
+        tags["topic"] = path[3]
+    return tags
+
+
+def virtual_folder_id(tags):
+    return VIRTUAL_FOLDER_PREFIX + urlencode(sorted(tags.items()))
+
+
+def parse_virtual_folder_id(folder_id):
+    """Tags encoded in a flat-layout folder ID, or None for a real Drive folder ID."""
+    if not folder_id or not folder_id.startswith(VIRTUAL_FOLDER_PREFIX):
+        return None
+    return dict(parse_qsl(folder_id[len(VIRTUAL_FOLDER_PREFIX):], keep_blank_values=True))
+
+
+def fit_tag(key, value):
+    """
+    ``value`` as stored in the ``key`` appProperty: unchanged if it fits Drive's
+    limit, else cut short and suffixed with a hash of the whole value, so long
+    (or non-ASCII) topic names stay distinct.
+    """
+    value = str(value)
+    budget = APP_PROPERTY_MAX_BYTES - len(key.encode("utf-8"))
+    encoded = value.encode("utf-8")
+    if len(encoded) <= budget:
+        return value
+    digest = hashlib.sha1(encoded).hexdigest()[:12]
+    prefix = encoded[:budget - len(digest) - 1].decode("utf-8", "ignore")
+    return f"{prefix}~{digest}"
+
+
+def file_tags(tags):
+    """appProperties for a new file in a (virtual) folder: a chapter-level file has an empty topic."""
+    return {key: fit_tag(key, tags.get(key, "")) for key in CONTENT_TAG_KEYS}
+
+
+def resolve_upload_target(service, folder_id):
+    """
+    Where a new file for ``folder_id`` really goes: ``(parent_id, app_properties)``.
+    Real folder IDs are used as they are; flat-layout folders map to the shared
+    flat folder plus the tags that place the file in its chapter and topic.
+    """
+    tags = parse_virtual_folder_id(folder_id)
+    if tags is None:
+        return folder_id, None
+    flat_path = flat_folder_path()
+    return ensure_drive_folder_paths(service, [flat_path])[flat_path], file_tags(tags)
+
+
+def _tag_clause(key, value):
+    return f"appProperties has {{ key='{key}' and value='{escape_query_value(fit_tag(key, value))}' }}"
+
+
+def tags_query(app_properties):
+    """Drive query clauses matching files that carry all of ``app_properties``."""
+    return " and ".join(_tag_clause(key, value) for key, value in app_properties.items())
+
+
+def list_tagged_files(service, virtual_ids, fields):
+    """
+    Yield the files in flat-layout virtual folders with one `appProperties has`
+    query per chapter (all requested types and topics OR-ed together). Each file's
+    ``parents`` is set to the virtual folder it belongs to.
+
+    A folder without a topic covers the whole chapter, every topic included.
+    """
+    fields = fields if "appProperties" in fields else f"{fields}, appProperties"
+
+    chapters = {}
+    for vid in virtual_ids:
+        tags = parse_virtual_folder_id(vid)
+        key = (tags["contributor"], tags["course"], tags["chapter"])
+        chapters.setdefault(key, []).append((vid, tags))
+
+    for (contributor, course, chapter), folders in chapters.items():
+        types = sorted({tags["type"] for _, tags in folders})
+        query = " and ".join([
+            _tag_clause("contributor", contributor),
+            _tag_clause("course", course),
+            _tag_clause("chapter", chapter),
+            "(" + " or ".join(_tag_clause("type", t) for t in types) + ")",
+            "trashed=false",
+        ])
+        for drive_file in iter_drive_files(service, query, fields=fields):
+            props = drive_file.get("appProperties", {})
+            for vid, tags in folders:
+                if props.get("type") == tags["type"] and (
+                    "topic" not in tags or props.get("topic") == fit_tag("topic", tags["topic"])
+                ):
+                    yield dict(drive_file, parents=[vid])
@@ -0,0 +1,214 @@
+import random
+import socket
+import threading
+import time
+from collections import Counter
+
+import httplib2
+from django.conf import settings
+from googleapiclient.errors import HttpError
+from googleapiclient.http import HttpRequest
+
+RETRYABLE_STATUSES = {429, 500, 502, 503, 504}
+
+# Reasons Drive gives on 403s that mean "slow down" rather than "forbidden"
+RATE_LIMIT_REASONS = ("userRateLimitExceeded", "rateLimitExceeded")
+
+
+class DriveUnavailableError(Exception):
+    """Drive calls are being refused locally because the circuit breaker is open."""
+
+
+def is_rate_limited(error):
+    if not isinstance(error, HttpError):
+        return False
+    if error.resp.status == 429:
+        return True
+    return error.resp.status == 403 and any(reason in str(error) for reason in RATE_LIMIT_REASONS)
+
+
+# Failures that mean the request never reached Drive
+_NOT_SENT_ERRORS = (ConnectionRefusedError, socket.gaierror, httplib2.ServerNotFoundError)
+
+# HTTP methods that are safe to repeat: Drive's update is a PATCH that sets the same fields again
+IDEMPOTENT_METHODS = {"GET", "HEAD", "PUT", "PATCH", "DELETE"}
+
+
+def is_retryable(error, idempotent=True):
+    """
+    Whether a failed call may be sent again. A call that isn't idempotent (a
+    create) is only repeated when Drive certainly didn't act on it: it answered
+    with a throttling or server error, or the connection was never made. After
+    a timeout or reset the request may have been committed, so it isn't retried.
+    """
+    if isinstance(error, HttpError):
+        return error.resp.status in RETRYABLE_STATUSES or is_rate_limited(error)
+    if not idempotent:
+        return isinstance(error, _NOT_SENT_ERRORS)
+    # Connection resets, timeouts, DNS failures, ...
+    return isinstance(error, (OSError, httplib2.HttpLib2Error))
+
+
+# ---------- Metrics ----------
+
+_metrics = Counter()
+_metrics_lock = threading.Lock()
+
+
+def record(metric, amount=1):
+    with _metrics_lock:
+        _metrics[metric] += amount
+
+
+def drive_metrics():
+    """Counters for this process: calls, throttled, retried, failed, rejected, stale_served, ..."""
+    with _metrics_lock:
+        snapshot = dict(_metrics)
+    snapshot["circuit_state"] = _breaker.state
+    return snapshot
+
+
+# ---------- Rate limiter ----------
+
+class TokenBucket:
+    """Allows ``rate`` calls per second on average, with bursts of up to ``capacity``."""
+
+    def __init__(self, rate, capacity):
+        self.rate = rate
+        self.capacity = capacity
+        self._tokens = capacity
+        self._updated = time.monotonic()
+        self._lock = threading.Lock()
+
+    def acquire(self, tokens=1):
+        """Block until ``tokens`` are available; returns the seconds spent waiting."""
+        tokens = min(tokens, self.capacity)
+        waited = 0.0
+        while True:
+            with self._lock:
+                now = time.monotonic()
+                self._tokens = min(self.capacity, self._tokens + (now - self._updated) * self.rate)
+                self._updated = now
+                if self._tokens >= tokens:
+                    self._tokens -= tokens
+                    return waited
+                delay = (tokens - self._tokens) / self.rate
+            time.sleep(delay)
+            waited += delay
+
+
+# ---------- Circuit breaker ----------
+
+class CircuitBreaker:
+    """
+    Opens after ``failure_threshold`` consecutive calls fail even after retries,
+    refuses calls for ``cooldown`` seconds, then lets one trial call through
+    (half-open): success closes the circuit, failure opens it again.
+    """
+
+    def __init__(self, failure_threshold, cooldown):
+        self.failure_threshold = failure_threshold
+        self.cooldown = cooldown
+        self.state = "closed"
+        self._failures = 0
+        self._opened_at = 0.0
+        self._lock = threading.Lock()
+
+    def allow(self):
+        with self._lock:
+            if self.state == "closed":
+                return True
+            if self.state == "open" and time.monotonic() - self._opened_at >= self.cooldown:
+                self.state = "half-open"
+                return True  # the trial call
+            return False
+
+    def succeeded(self):
+        with self._lock:
+            if self.state != "closed":
+                print("[INFO] Drive circuit closed again")
+            self.state = "closed"
+            self._failures = 0
+
+    def failed(self):
+        with self._lock:
+            self._failures += 1
+            if self.state == "half-open" or self._failures >= self.failure_threshold:
+                if self.state != "open":
+                    print(f"[WARN] Drive circuit opened after {self._failures} failed call(s)")
+                self.state = "open"
+                self._opened_at = time.monotonic()
+
+
+_bucket = None
+_bucket_lock = threading.Lock()
+_breaker = CircuitBreaker(settings.DRIVE_CIRCUIT_FAILURES, settings.DRIVE_CIRCUIT_COOLDOWN)
+
+
+def acquire_drive_tokens(tokens=1):
+    """Wait for the process-wide Drive rate limiter (shared by every worker thread)."""
+    global _bucket
+    with _bucket_lock:
+        if _bucket is None:
+            _bucket = TokenBucket(settings.DRIVE_RATE_LIMIT, settings.DRIVE_RATE_BURST)
+    waited = _bucket.acquire(tokens)
+    if waited:
+        record("rate_limited_locally")
+        record("rate_limit_wait_seconds", waited)
+
+
+def backoff_delay(attempt):
+    """Full-jitter exponential backoff: uniform in [0, min(max, base * 2^attempt)]."""
+    return random.uniform(0, min(settings.DRIVE_BACKOFF_MAX, settings.DRIVE_BACKOFF_BASE * 2 ** attempt))
+
+
+def call_drive(func, description="Drive call", idempotent=True):
+    """
+    Run one Drive call through the shared resilience layer: circuit breaker,
+    rate limiter, and retries with jittered exponential backoff on throttling,
+    5xx and network errors. Errors that aren't transient are raised at once;
+    pass ``idempotent=False`` for calls that must not run twice (see is_retryable).
+    """
+    if not _breaker.allow():
+        record("rejected")
+        raise DriveUnavailableError(f"{description} refused: Drive circuit is open")
+
+    for attempt in range(settings.DRIVE_MAX_RETRIES + 1):
+        acquire_drive_tokens()
+        record("calls")
+        try:
+            result = func()
+        except Exception as e:
+            if not is_retryable(e, idempotent):
+                if is_retryable(e):
+                    # Transient, but the call may have taken effect: not safe to send again
+                    record("failed")
+                    _breaker.failed()
+                else:
+                    _breaker.succeeded()  # Drive answered; the request itself was wrong
+                raise
+            if is_rate_limited(e):
+                record("throttled")
+            if attempt == settings.DRIVE_MAX_RETRIES:
+                record("failed")
+                _breaker.failed()
+                raise
+            delay = backoff_delay(attempt)
+            record("retried")
+            print(f"[WARN] {description} failed ({e}), retry {attempt + 1} in {delay:.1f}s")
+            time.sleep(delay)
+        else:
+            _breaker.succeeded()
+            return result
+
+
+class ResilientHttpRequest(HttpRequest):
+    """googleapiclient request whose execute() goes through call_drive (see build(requestBuilder=...))."""
+
+    def execute(self, http=None, num_retries=0):
+        parent_execute = super().execute
+        return call_drive(
+            lambda: parent_execute(http=http, num_retries=0),
+            self.methodId or "Drive call",
+            idempotent=self.method.upper() in IDEMPOTENT_METHODS,
+        )
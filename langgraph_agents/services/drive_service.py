@@ -1,16 +1,75 @@
+import datetime
 import json
+import os
+import tempfile
+import threading
+from collections import OrderedDict
 
+import httplib2
 from django.conf import settings
+from django.db import IntegrityError
+from django.db.models import Q
+from django.utils.dateparse import parse_datetime
+from google.auth.transport.requests import AuthorizedSession, Request
+from google_auth_httplib2 import AuthorizedHttp
 from google.oauth2.credentials import Credentials
 from googleapiclient.discovery import build
+from googleapiclient.errors import HttpError
 
+from accounts.models import DriveFolder, DriveFile
+from langgraph_agents.services.drive_resilience import ResilientHttpRequest
+from langgraph_agents.services.drive_transport import PooledHttp, get_pooled_adapter
 
-def get_drive_service():
-    """Authenticate with personal Google Drive using OAuth token."""
+# Refresh the access token this long before Google says it expires, so a request
+# never goes out with a token that dies mid-flight (and never eats a 401 round trip).
+TOKEN_REFRESH_MARGIN = datetime.timedelta(minutes=5)
+
+_credentials = None
+# Reentrant: get_credentials refreshes through SharedCredentials.refresh while holding it
+_credentials_lock = threading.RLock()
+
+# Each worker thread gets its own service object built once and reused for the
+# life of the thread; their HTTP connections all come from one shared keep-alive
+# pool (see drive_transport), so a new thread doesn't mean new TLS handshakes.
+_thread_local = threading.local()
+
+# Bumped by reset_drive_service; a thread whose cached clients were built under
+# an older generation rebuilds them on its next call.
+_generation = 0
+
+
+class SharedCredentials(Credentials):
+    """
+    The process-wide credentials. google-auth's transports refresh them on their
+    own (on expiry, or after a 401), so every refresh goes through here: one
+    thread at a time, and the new token is written back to token.json.
+    """
+
+    def refresh(self, request):
+        stale_token = self.token
+        with _credentials_lock:
+            if self.token != stale_token and not _needs_refresh(self):
+                return  # another thread refreshed while this one waited for the lock
+            # Another worker may already have refreshed and saved a newer token
+            try:
+                on_disk = _load_credentials()
+            except (OSError, ValueError):
+                on_disk = None
+            if on_disk and on_disk.token != self.token and not _needs_refresh(on_disk):
+                self.token = on_disk.token
+                self.expiry = on_disk.expiry
+                return
+            super().refresh(request)
+            _save_credentials(self)
+            print(f"[INFO] Drive access token refreshed (expires {self.expiry} UTC)")
+
+
+def _load_credentials():
+    """Read token.json into a Credentials object (including the stored expiry)."""
     with open(settings.GOOGLE_TOKEN_FILE, "r") as f:
         token_data = json.load(f)
 
-    creds = Credentials(
+    creds = SharedCredentials(
         token=token_data.get("token"),
         refresh_token=token_data.get("refresh_token"),
         token_uri=token_data.get("token_uri"),
@@ -18,26 +77,283 @@ def get_drive_service():
         client_secret=token_data.get("client_secret"),
         scopes=token_data.get("scopes"),
     )
+    expiry = token_data.get("expiry")
+    if expiry:
+        # google-auth keeps expiry as a naive UTC datetime
+        creds.expiry = datetime.datetime.fromisoformat(expiry.rstrip("Z")).replace(tzinfo=None)
+    return creds
+
+
+def _save_credentials(creds):
+    """Write refreshed credentials back to token.json atomically (temp file + rename)."""
+    token_path = str(settings.GOOGLE_TOKEN_FILE)
+    token_data = {
+        "token": creds.token,
+        "refresh_token": creds.refresh_token,
+        "token_uri": creds.token_uri,
+        "client_id": creds.client_id,
+        "client_secret": creds.client_secret,
+        "scopes": creds.scopes,
+        "expiry": creds.expiry.isoformat() + "Z" if creds.expiry else None,
+    }
+
+    fd, tmp_path = tempfile.mkstemp(dir=os.path.dirname(token_path), prefix=".token-", suffix=".json")
+    try:
+        with os.fdopen(fd, "w") as f:
+            json.dump(token_data, f)
+            f.flush()
+            os.fsync(f.fileno())
+        os.replace(tmp_path, token_path)
+    except Exception:
+        if os.path.exists(tmp_path):
+            os.remove(tmp_path)
+        raise
+
+
+def _needs_refresh(creds):
+    if not creds.token or not creds.expiry:
+        return True
+    return creds.expiry - TOKEN_REFRESH_MARGIN <= datetime.datetime.utcnow()
+
+
+def get_credentials():
+    """
+    Return the process-wide Drive credentials, refreshing them ahead of expiry.
+    Refreshed tokens are persisted so other workers (and restarts) pick them up.
+    """
+    global _credentials
+
+    with _credentials_lock:
+        if _credentials is None:
+            _credentials = _load_credentials()
 
-    service = build("drive", "v3", credentials=creds)
+        if _needs_refresh(_credentials):
+            _credentials.refresh(Request())
+
+        return _credentials
+
+
+def build_drive_http(creds, transport=None):
+    """Authorized HTTP object for googleapiclient on the given (default: configured) transport."""
+    if (transport or settings.DRIVE_HTTP_TRANSPORT) == "pooled":
+        return AuthorizedHttp(creds, http=PooledHttp())
+    return AuthorizedHttp(creds, http=httplib2.Http(timeout=settings.DRIVE_HTTP_READ_TIMEOUT))
+
+
+def get_drive_service():
+    """Return this thread's Drive client, built once and reused across requests."""
+    creds = get_credentials()
+
+    service = getattr(_thread_local, "service", None)
+    if service is None or getattr(_thread_local, "service_generation", None) != _generation:
+        # cache_discovery=False: the bundled discovery document is used and the
+        # "file_cache is only supported with oauth2client<4.0.0" warning goes away.
+        # Every request goes through the shared rate limiter / retry / circuit breaker.
+        service = build("drive", "v3", http=build_drive_http(creds), cache_discovery=False,
+                        requestBuilder=ResilientHttpRequest)
+        _thread_local.service = service
+        _thread_local.service_generation = _generation
     return service
 
 
-def get_or_create_drive_folder(service, folder_name, parent_id=None):
-    """Get folder ID if exists, else create and return ID."""
-    query = f"mimeType='application/vnd.google-apps.folder' and name='{folder_name}'"
+def get_authorized_session():
+    """
+    Return this thread's requests session signed with the Drive credentials,
+    for the raw HTTP endpoints the generated client doesn't stream (resumable uploads).
+    """
+    creds = get_credentials()
+
+    session = getattr(_thread_local, "session", None)
+    if session is None or getattr(_thread_local, "session_generation", None) != _generation:
+        session = AuthorizedSession(creds)
+        if settings.DRIVE_HTTP_TRANSPORT == "pooled":
+            session.mount("https://", get_pooled_adapter())
+        _thread_local.session = session
+        _thread_local.session_generation = _generation
+    return session
+
+
+def reset_drive_service():
+    """Drop cached credentials and every thread's clients (e.g. after token.json was replaced)."""
+    global _credentials, _generation
+    with _credentials_lock:
+        _credentials = None
+        _generation += 1
+
+
+FOLDER_MIME_TYPE = "application/vnd.google-apps.folder"
+
+# Everything DriveFile stores about a file
+DRIVE_FILE_FIELDS = "id, name, mimeType, parents, md5Checksum, size, modifiedTime"
+
+# Upper bound on folders OR-ed into one `in parents` query (keeps `q` well under Drive's length limit)
+PARENTS_PER_QUERY = 40
+
+# Drive's maximum page size for files().list
+DRIVE_MAX_PAGE_SIZE = 1000
+
+# In-process LRU in front of the DriveFolder table: (parent_id, name) -> folder ID
+_folder_index = OrderedDict()
+_folder_index_lock = threading.Lock()
+
+
+def escape_query_value(value):
+    """Escape a value for use inside single quotes in a Drive `q` query."""
+    return str(value).replace("\\", "\\\\").replace("'", "\\'")
+
+
+def _index_lookup(parent_id, folder_name):
+    key = (parent_id or "", folder_name)
+    with _folder_index_lock:
+        if key in _folder_index:
+            _folder_index.move_to_end(key)
+            return _folder_index[key]
+
+    drive_id = DriveFolder.objects.filter(parent_id=key[0], name=folder_name) \
+        .values_list("drive_id", flat=True).first()
+    if drive_id:
+        _index_remember(key, drive_id)
+    return drive_id
+
+
+def _index_remember(key, drive_id):
+    with _folder_index_lock:
+        _folder_index[key] = drive_id
+        _folder_index.move_to_end(key)
+        while len(_folder_index) > settings.DRIVE_FOLDER_INDEX_SIZE:
+            _folder_index.popitem(last=False)
+
+
+def _index_store(parent_id, folder_name, drive_id):
+    key = (parent_id or "", folder_name)
+    _index_remember(key, drive_id)
+    try:
+        DriveFolder.objects.update_or_create(
+            parent_id=key[0], name=folder_name, defaults={"drive_id": drive_id}
+        )
+    except IntegrityError as e:
+        print(f"[WARN] Could not index Drive folder {folder_name} ({drive_id}): {e}")
+
+
+def forget_drive_folder(drive_id):
+    """
+    Drop a folder and every folder indexed under it, e.g. after Drive returned
+    404 for it (a deleted folder takes its whole subtree with it). The next
+    lookup resolves the path against Drive again.
+    """
+    forgotten, pending = set(), [drive_id]
+    while pending:
+        forgotten.update(pending)
+        with _folder_index_lock:
+            children = {v for k, v in _folder_index.items() if k[0] in pending}
+        children.update(DriveFolder.objects.filter(parent_id__in=pending).values_list("drive_id", flat=True))
+        pending = list(children - forgotten)
+
+    with _folder_index_lock:
+        for key in [k for k, v in _folder_index.items() if v in forgotten or k[0] in forgotten]:
+            del _folder_index[key]
+    DriveFolder.objects.filter(Q(drive_id__in=forgotten) | Q(parent_id__in=forgotten)).delete()
+
+
+def is_not_found_error(error):
+    return isinstance(error, HttpError) and error.resp.status == 404
+
+
+def iter_drive_files(service, query, fields="id, name", page_size=None, **list_kwargs):
+    """
+    Yield every file matching a Drive `q` query, fetching pages lazily by
+    following nextPageToken. Only ``fields`` is requested for each file.
+    """
+    page_size = min(page_size or settings.DRIVE_LIST_PAGE_SIZE, DRIVE_MAX_PAGE_SIZE)
+    page_token = None
+    while True:
+        result = service.files().list(
+            q=query,
+            fields=f"nextPageToken, files({fields})",
+            pageSize=page_size,
+            pageToken=page_token,
+            **list_kwargs
+        ).execute()
+        yield from result.get('files', [])
+
+        page_token = result.get('nextPageToken')
+        if not page_token:
+            return
+
+
+def _query_drive_folder(service, folder_name, parent_id=None):
+    query = (
+        f"mimeType='{FOLDER_MIME_TYPE}' and name='{escape_query_value(folder_name)}' "
+        f"and trashed=false"
+    )
     if parent_id:
         query += f" and '{parent_id}' in parents"
 
-    result = service.files().list(q=query, spaces='drive', fields='files(id, name)').execute()
-    files = result.get('files', [])
-    if files:
-        return files[0]['id']
+    folder = next(iter_drive_files(service, query, fields='id', page_size=1, spaces='drive'), None)
+    return folder['id'] if folder else None
+
+
+def find_drive_folder(service, folder_name, parent_id=None):
+    """Return the folder ID if the folder exists, else None (never creates)."""
+    folder_id = _index_lookup(parent_id, folder_name)
+    if folder_id:
+        return folder_id
+
+    folder_id = _query_drive_folder(service, folder_name, parent_id)
+    if folder_id:
+        _index_store(parent_id, folder_name, folder_id)
+    return folder_id
+
+
+def get_or_create_drive_folder(service, folder_name, parent_id=None):
+    """Get folder ID if exists, else create and return ID."""
+    folder_id = find_drive_folder(service, folder_name, parent_id)
+    if folder_id:
+        return folder_id
 
     # Create folder only if it doesn't exist
-    metadata = {'name': folder_name, 'mimeType': 'application/vnd.google-apps.folder'}
+    metadata = {'name': folder_name, 'mimeType': FOLDER_MIME_TYPE}
     if parent_id:
         metadata['parents'] = [parent_id]
 
-    folder = service.files().create(body=metadata, fields='id').execute()
+    try:
+        folder = service.files().create(body=metadata, fields='id').execute()
+    except HttpError as e:
+        if is_not_found_error(e) and parent_id:
+            # The indexed parent no longer exists in Drive
+            forget_drive_folder(parent_id)
+        raise
+
+    _index_store(parent_id, folder_name, folder['id'])
     return folder['id']
+
+
+def list_folder_children(service, folder_ids, fields="id, name, mimeType, parents"):
+    """
+    Yield the (non-trashed) children of several folders, using one combined
+    `'a' in parents or 'b' in parents` query per batch of folders.
+    """
+    folder_ids = [fid for fid in folder_ids if fid]
+    for start in range(0, len(folder_ids), PARENTS_PER_QUERY):
+        batch = folder_ids[start:start + PARENTS_PER_QUERY]
+        parents_clause = " or ".join(f"'{fid}' in parents" for fid in batch)
+        yield from iter_drive_files(service, f"({parents_clause}) and trashed=false", fields=fields)
+
+
+def register_drive_file(drive_file):
+    """Record (or refresh) a file's Drive metadata in the DriveFile table."""
+    parents = drive_file.get("parents") or [""]
+    size = drive_file.get("size")
+    modified_time = drive_file.get("modifiedTime")
+    obj, _ = DriveFile.objects.update_or_create(
+        drive_id=drive_file["id"],
+        defaults={
+            "parent_id": parents[0],
+            "name": drive_file.get("name", ""),
+            "mime_type": drive_file.get("mimeType", ""),
+            "md5_checksum": drive_file.get("md5Checksum", ""),
+            "size": int(size) if size else None,
+            "modified_time": parse_datetime(modified_time) if modified_time else None,
+        },
+    )
+    return obj
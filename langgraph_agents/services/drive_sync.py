@@ -0,0 +1,152 @@
+import datetime
+
+from django.conf import settings
+from django.db.models import Q
+from django.utils import timezone
+from googleapiclient.errors import HttpError
+
+from accounts.models import DriveFile, DriveFolder, DriveSyncState
+from langgraph_agents.services.drive_service import (
+    FOLDER_MIME_TYPE, DRIVE_FILE_FIELDS, find_drive_folder, forget_drive_folder, list_folder_children,
+    register_drive_file,
+)
+
+# What we need from each entry of the change feed
+CHANGE_FIELDS = f"nextPageToken, newStartPageToken, changes(fileId, removed, file({DRIVE_FILE_FIELDS}, trashed))"
+
+
+def _get_state():
+    state = DriveSyncState.objects.order_by("id").first()
+    return state or DriveSyncState.objects.create()
+
+
+def mirror_is_fresh():
+    """True if the DriveFile table was synced recently enough to answer listings on its own."""
+    synced_at = DriveSyncState.objects.order_by("id").values_list("synced_at", flat=True).first()
+    if not synced_at:
+        return False
+    return timezone.now() - synced_at <= datetime.timedelta(seconds=settings.DRIVE_MIRROR_MAX_AGE)
+
+
+def list_mirrored_files(folder_ids):
+    """Files directly inside the given folders, from the DriveFile table (one indexed query)."""
+    rows = DriveFile.objects.filter(parent_id__in=[fid for fid in folder_ids if fid]).order_by("name")
+    return [row.as_drive_metadata() for row in rows]
+
+
+def _forget_file(file_id):
+    DriveFile.objects.filter(drive_id=file_id).delete()
+    if DriveFolder.objects.filter(drive_id=file_id).exists():
+        forget_drive_folder(file_id)
+
+
+def _under_oer_content(drive_file):
+    """Whether a file sits in a folder the mirror covers: an indexed folder, or one mirrored from oer_content."""
+    parents = [p for p in drive_file.get("parents") or [] if p]
+    if not parents:
+        return False
+    return (DriveFolder.objects.filter(drive_id__in=parents).exists()
+            or DriveFile.objects.filter(drive_id__in=parents, mime_type=FOLDER_MIME_TYPE).exists())
+
+
+def _apply_change(change):
+    drive_file = change.get("file")
+    if change.get("removed") or not drive_file or drive_file.get("trashed"):
+        _forget_file(change["fileId"])
+        return
+
+    # The feed covers the whole Drive account; only oer_content is mirrored
+    if _under_oer_content(drive_file):
+        register_drive_file(drive_file)
+    else:
+        DriveFile.objects.filter(drive_id=drive_file["id"]).delete()  # if it was moved out
+
+    if drive_file.get("mimeType") == FOLDER_MIME_TYPE:
+        # A renamed or moved folder no longer lives at the path the index has for it
+        parents = drive_file.get("parents") or [""]
+        # (top-level folders are indexed without a parent, so only their name is compared)
+        stale = DriveFolder.objects.filter(drive_id=drive_file["id"]) \
+            .exclude(Q(parent_id__in=[parents[0], ""]) & Q(name=drive_file.get("name", "")))
+        if stale.exists():
+            forget_drive_folder(drive_file["id"])
+
+
+def bootstrap_drive_mirror(service):
+    """
+    Fill the DriveFile table with everything under oer_content (one listing per
+    folder level) and remember where the change feed stands, so later syncs only
+    read what changed. Rows for files that no longer exist are dropped.
+    """
+    # Take the token before crawling: changes made during the crawl are replayed afterwards
+    start_token = service.changes().getStartPageToken().execute()["startPageToken"]
+    crawl_started = timezone.now()
+
+    root_id = find_drive_folder(service, "oer_content")
+    seen = 0
+    level = [root_id] if root_id else []
+    while level:
+        folders = []
+        for drive_file in list_folder_children(service, level, fields=DRIVE_FILE_FIELDS):
+            register_drive_file(drive_file)
+            seen += 1
+            if drive_file.get("mimeType") == FOLDER_MIME_TYPE:
+                folders.append(drive_file["id"])
+        level = folders
+
+    # Anything the crawl didn't touch is gone from Drive
+    DriveFile.objects.filter(updated_at__lt=crawl_started).delete()
+
+    state = _get_state()
+    state.page_token = start_token
+    state.bootstrapped_at = timezone.now()
+    state.synced_at = state.bootstrapped_at
+    state.save()
+    print(f"[INFO] Drive mirror bootstrapped with {seen} file(s)")
+    return seen
+
+
+def sync_drive_changes(service):
+    """
+    Read Drive's change feed from where the last sync stopped and apply it to the
+    DriveFile table. Returns the number of changes applied.
+    """
+    state = _get_state()
+    if not state.page_token:
+        bootstrap_drive_mirror(service)
+        state = _get_state()
+
+    applied = 0
+    page_token = state.page_token
+    while page_token:
+        try:
+            result = service.changes().list(
+                pageToken=page_token,
+                pageSize=min(settings.DRIVE_LIST_PAGE_SIZE, 1000),
+                includeRemoved=True,
+                spaces='drive',
+                fields=CHANGE_FIELDS,
+            ).execute()
+        except HttpError as e:
+            if e.resp.status not in (400, 404, 410):
+                raise
+            # The saved token expired or is invalid: start over from a full crawl
+            print(f"[WARN] Drive change token rejected ({e.resp.status}), re-crawling")
+            return bootstrap_drive_mirror(service)
+
+        for change in result.get("changes", []):
+            _apply_change(change)
+            applied += 1
+
+        if "newStartPageToken" in result:
+            # Reached the end of the feed; this token picks up future changes
+            state.page_token = result["newStartPageToken"]
+            state.synced_at = timezone.now()
+            state.save(update_fields=["page_token", "synced_at"])
+            break
+
+        # Save progress after every page so an interrupted sync resumes here
+        page_token = result.get("nextPageToken")
+        state.page_token = page_token or ""
+        state.save(update_fields=["page_token"])
+
+    return applied
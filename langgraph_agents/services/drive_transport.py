@@ -0,0 +1,83 @@
+import threading
+
+import httplib2
+import requests
+from django.conf import settings
+from requests.adapters import HTTPAdapter
+
+# One connection pool per process, shared by every thread's Drive client and
+# upload session, so TLS connections to googleapis.com are opened once and reused.
+_adapter = None
+_session = None
+_lock = threading.Lock()
+
+
+def get_pooled_adapter():
+    """The process-wide keep-alive adapter (urllib3 pool, thread-safe)."""
+    global _adapter
+    with _lock:
+        if _adapter is None:
+            _adapter = HTTPAdapter(
+                pool_connections=4,  # distinct hosts kept (www.googleapis.com, oauth2, ...)
+                pool_maxsize=settings.DRIVE_HTTP_POOL_SIZE,
+                pool_block=False,  # past the limit open an extra connection rather than wait
+                max_retries=0,  # retries are decided by drive_resilience
+            )
+        return _adapter
+
+
+def _get_session():
+    global _session
+    adapter = get_pooled_adapter()
+    with _lock:
+        if _session is None:
+            _session = requests.Session()
+            _session.mount("https://", adapter)
+            _session.mount("http://", adapter)
+        return _session
+
+
+class PooledHttp:
+    """
+    Stands in for httplib2.Http under googleapiclient (wrap it in
+    google_auth_httplib2.AuthorizedHttp for credentials): same request()
+    signature and (Response, content) result, but the connections come from the
+    shared keep-alive pool and it is safe to use from several threads.
+    """
+
+    redirect_codes = frozenset((300, 301, 302, 303, 307, 308))
+
+    def __init__(self, timeout=None):
+        self.timeout = timeout or (settings.DRIVE_HTTP_CONNECT_TIMEOUT, settings.DRIVE_HTTP_READ_TIMEOUT)
+        self.follow_redirects = True
+        self.connections = {}  # httplib2 attribute some callers clear; nothing is kept here
+
+    def request(self, uri, method="GET", body=None, headers=None,
+                redirections=httplib2.DEFAULT_MAX_REDIRECTS, connection_type=None, **kwargs):
+        try:
+            response = _get_session().request(
+                method, uri,
+                data=body,
+                headers=headers,
+                timeout=self.timeout,
+                allow_redirects=self.follow_redirects and method in ("GET", "HEAD"),
+            )
+        except requests.Timeout as e:
+            raise TimeoutError(str(e)) from e
+        except requests.ConnectionError as e:
+            raise ConnectionError(str(e)) from e
+
+        info = {key.lower(): value for key, value in response.headers.items()}
+        # requests already decoded gzip bodies; don't let anyone decode them twice
+        info.pop("content-encoding", None)
+        info["status"] = str(response.status_code)
+        http_response = httplib2.Response(info)
+        http_response.reason = response.reason
+        return http_response, response.content
+
+    def close(self):
+        # The pool is shared; connections are kept for the other threads
+        pass
+
+    def add_certificate(self, key, cert, domain, password=None):
+        raise NotImplementedError("Client certificates are not supported by the pooled Drive transport")
@@ -0,0 +1,479 @@
+import datetime
+import hashlib
+import json
+import queue
+import threading
+import time
+from concurrent.futures import Future
+
+import requests
+from django.conf import settings
+from django.db import connection
+from django.utils import timezone
+
+from accounts.models import DriveFile, UploadProgress
+from langgraph_agents.services.drive_layout import tags_query
+from langgraph_agents.services.drive_resilience import acquire_drive_tokens, backoff_delay, record
+from langgraph_agents.services.drive_service import (
+    get_authorized_session, get_drive_service, iter_drive_files, register_drive_file,
+    DRIVE_FILE_FIELDS, FOLDER_MIME_TYPE,
+)
+from langgraph_agents.services.drive_sync import mirror_is_fresh
+
+UPLOAD_URL = "https://www.googleapis.com/upload/drive/v3/files"
+
+# Drive requires every chunk except the last one to be a multiple of 256 KiB
+CHUNK_ALIGNMENT = 256 * 1024
+
+RETRYABLE_STATUSES = {429, 500, 502, 503, 504}
+
+
+class DriveUploadError(Exception):
+    def __init__(self, message, status=None):
+        super().__init__(message)
+        self.status = status  # HTTP status from Drive, if there was a response
+
+
+def _aligned(size):
+    return max(CHUNK_ALIGNMENT, size - size % CHUNK_ALIGNMENT)
+
+
+def find_existing_copy(service, parent_id, md5_checksum, size=None, app_properties=None, exclude_id=None):
+    """
+    A file already in the folder (or flat-layout chapter/topic, via ``app_properties``)
+    with the same content, going by Drive's md5Checksum; None if there is none.
+    """
+    if not app_properties and mirror_is_fresh():
+        rows = DriveFile.objects.filter(parent_id=parent_id, md5_checksum=md5_checksum).exclude(drive_id=exclude_id)
+        if size is not None:
+            rows = rows.filter(size=size)
+        row = rows.first()
+        return row.as_drive_metadata() if row else None
+
+    # Drive can't filter on md5Checksum: list the folder's files and compare here
+    query = f"'{parent_id}' in parents and mimeType != '{FOLDER_MIME_TYPE}' and trashed=false"
+    if app_properties:
+        query += " and " + tags_query(app_properties)
+    for drive_file in iter_drive_files(service, query, fields=DRIVE_FILE_FIELDS):
+        if drive_file["id"] == exclude_id or drive_file.get("md5Checksum") != md5_checksum:
+            continue
+        if size is None or int(drive_file.get("size") or 0) == size:
+            return drive_file
+    return None
+
+
+def reuse_existing_copy(service, existing, name):
+    """Stand an identical file in for a new upload, renaming it to the uploaded name if that differs."""
+    if existing["name"] != name:
+        existing = service.files().update(
+            fileId=existing["id"], body={"name": name}, fields=DRIVE_FILE_FIELDS
+        ).execute()
+    register_drive_file(existing)
+    record("dedupe_hits")
+    record("dedupe_bytes", int(existing.get("size") or 0))
+    return existing
+
+
+def _committed_bytes(response):
+    """Bytes Drive has persisted, from a 308 response's `Range: bytes=0-N` header."""
+    range_header = response.headers.get("Range")
+    if not range_header:
+        return 0
+    return int(range_header.rsplit("-", 1)[1]) + 1
+
+
+class ResumableDriveUpload:
+    """
+    Streams a file into a Drive resumable-upload session without knowing its size
+    up front. At most one chunk is held in memory; a failed chunk is resumed from
+    the last byte Drive acknowledged instead of restarting the whole file.
+
+    With ``dedupe`` the MD5 of the stream is computed as it goes; if the target
+    folder already holds a file with that checksum, the session is cancelled
+    before the last chunk is sent and the existing file is reused instead. Files
+    smaller than one chunk are then never sent at all.
+    """
+
+    def __init__(self, name, parent_id, mime_type, chunk_size=None, on_progress=None, app_properties=None,
+                 dedupe=False):
+        self.name = name
+        self.parent_id = parent_id
+        self.app_properties = app_properties  # tags for the flat Drive layout (see drive_layout)
+        self.dedupe = dedupe
+        self.md5 = hashlib.md5()
+        self.size = 0  # bytes written so far
+        self.mime_type = mime_type or "application/octet-stream"
+        self.chunk_size = _aligned(chunk_size or settings.DRIVE_UPLOAD_CHUNK_SIZE)
+        self.on_progress = on_progress  # called with the acknowledged byte count after each chunk
+        self.session_uri = None
+        self.offset = 0          # bytes acknowledged by Drive
+        self.buffer = bytearray()
+        self.result = None
+
+    @property
+    def session(self):
+        # The upload may be fed from a pool thread: always use the calling thread's session
+        return get_authorized_session()
+
+    def start(self, origin=None):
+        """Open the resumable session and return its URI."""
+        headers = {
+            "Content-Type": "application/json; charset=UTF-8",
+            "X-Upload-Content-Type": self.mime_type,
+        }
+        if origin:
+            headers["Origin"] = origin
+        body = {"name": self.name, "parents": [self.parent_id]}
+        if self.app_properties:
+            body["appProperties"] = self.app_properties
+        response = self.session.post(
+            UPLOAD_URL,
+            params={"uploadType": "resumable", "fields": DRIVE_FILE_FIELDS},
+            data=json.dumps(body),
+            headers=headers,
+            timeout=settings.DRIVE_UPLOAD_TIMEOUT,
+        )
+        if response.status_code != 200:
+            raise DriveUploadError(
+                f"Could not start upload for {self.name}: {response.status_code} {response.text}",
+                status=response.status_code,
+            )
+        self.session_uri = response.headers["Location"]
+        return self.session_uri
+
+    def write(self, data):
+        self.md5.update(data)
+        self.size += len(data)
+        self.buffer.extend(data)
+        while len(self.buffer) >= self.chunk_size:
+            chunk = bytes(self.buffer[:self.chunk_size])
+            del self.buffer[:self.chunk_size]
+            self._send(chunk, final=False)
+
+    def finish(self):
+        """Send whatever is buffered as the last chunk and return the Drive file metadata."""
+        if self.dedupe:
+            existing = find_existing_copy(
+                get_drive_service(), self.parent_id, self.md5.hexdigest(), self.size, self.app_properties
+            )
+            if existing:
+                print(f"[UPLOAD] {self.name} matches {existing['name']} ({existing['id']}), skipping the transfer")
+                self.abort()
+                self.buffer.clear()
+                self.result = reuse_existing_copy(get_drive_service(), existing, self.name)
+                return self.result
+
+        chunk = bytes(self.buffer)
+        self.buffer.clear()
+        self._send(chunk, final=True)
+        return self.result
+
+    def abort(self):
+        if not self.session_uri or self.result:
+            return
+        try:
+            self.session.delete(self.session_uri, timeout=settings.DRIVE_UPLOAD_TIMEOUT)
+        except requests.RequestException as e:
+            print(f"[WARN] Could not cancel Drive upload session for {self.name}: {e}")
+
+    def _send(self, chunk, final):
+        chunk_start = self.offset
+        total = chunk_start + len(chunk) if final else None
+
+        for attempt in range(settings.DRIVE_UPLOAD_MAX_RETRIES + 1):
+            if self.offset < chunk_start:
+                # Drive no longer has bytes of earlier chunks, which aren't kept here to resend
+                self.abort()
+                raise DriveUploadError(
+                    f"Upload of {self.name} lost data: Drive has {self.offset} bytes, {chunk_start} were acknowledged"
+                )
+            pending = chunk[self.offset - chunk_start:]
+            acquire_drive_tokens()
+            record("calls")
+            try:
+                response = self.session.put(
+                    self.session_uri,
+                    data=pending,
+                    headers={"Content-Range": self._content_range(len(pending), total)},
+                    timeout=settings.DRIVE_UPLOAD_TIMEOUT,
+                )
+            except requests.RequestException as e:
+                print(f"[WARN] Upload chunk for {self.name} failed ({e}), retrying")
+                response = None
+
+            if response is not None:
+                if response.status_code in (200, 201):
+                    self.offset = chunk_start + len(chunk)
+                    self.result = response.json()
+                    self._report_progress()
+                    return
+                if response.status_code == 308:
+                    self.offset = _committed_bytes(response)
+                    if self.offset == chunk_start + len(chunk) and not final:
+                        self._report_progress()
+                        return
+                    continue  # Drive kept only part of the chunk: send the rest right away
+                if response.status_code in (404, 410):
+                    raise DriveUploadError(f"Upload session for {self.name} expired", status=response.status_code)
+                if response.status_code not in RETRYABLE_STATUSES:
+                    raise DriveUploadError(
+                        f"Upload of {self.name} rejected: {response.status_code} {response.text}",
+                        status=response.status_code,
+                    )
+
+            if response is not None and response.status_code == 429:
+                record("throttled")
+            record("retried")
+            time.sleep(backoff_delay(attempt))
+            self._refresh_offset(total)
+            if self.result:
+                return
+
+        raise DriveUploadError(f"Upload of {self.name} failed after {settings.DRIVE_UPLOAD_MAX_RETRIES} retries")
+
+    def _report_progress(self):
+        if self.on_progress:
+            self.on_progress(self.offset)
+
+    def _content_range(self, length, total):
+        total_part = str(total) if total is not None else "*"
+        if length == 0:
+            return f"bytes */{total_part}"
+        return f"bytes {self.offset}-{self.offset + length - 1}/{total_part}"
+
+    def _refresh_offset(self, total):
+        """Ask Drive how much of the upload it already has (after a dropped connection)."""
+        total_part = str(total) if total is not None else "*"
+        try:
+            response = self.session.put(
+                self.session_uri,
+                headers={"Content-Range": f"bytes */{total_part}"},
+                timeout=settings.DRIVE_UPLOAD_TIMEOUT,
+            )
+        except requests.RequestException:
+            return
+        if response.status_code == 308:
+            self.offset = _committed_bytes(response)
+        elif response.status_code in (200, 201):
+            self.result = response.json()
+
+
+_END = object()
+_ABORT = object()
+
+_upload_slots = None
+_upload_slots_lock = threading.Lock()
+
+
+def _acquire_upload_slot():
+    """Take one of the process's DRIVE_UPLOAD_CONCURRENCY sender threads, if one is free (never waits)."""
+    global _upload_slots
+    with _upload_slots_lock:
+        if _upload_slots is None:
+            _upload_slots = threading.BoundedSemaphore(settings.DRIVE_UPLOAD_CONCURRENCY)
+    return _upload_slots.acquire(blocking=False)
+
+
+def _release_upload_slot():
+    _upload_slots.release()
+
+
+class BackgroundDriveUpload:
+    """
+    Feeds a started ResumableDriveUpload from a bounded queue on a sender thread,
+    so the request thread can move on to the next file while earlier ones are
+    still being sent; a full queue pushes back on the request body instead of
+    buffering it. At most DRIVE_UPLOAD_CONCURRENCY sender threads run per
+    process: when none is free the file is sent inline from the request thread,
+    so a busy process gets slower rather than failing uploads.
+    """
+
+    def __init__(self, upload, on_done=None):
+        self.upload = upload
+        self.on_done = on_done  # called with (drive_file, error) once the upload ends
+        self.future = Future()
+        self.error = None  # inline mode: first failure, after which data is ignored
+        self.inline = not _acquire_upload_slot()
+        if self.inline:
+            self.queue = None
+        else:
+            self.queue = queue.Queue(maxsize=settings.DRIVE_UPLOAD_QUEUE_CHUNKS)
+            threading.Thread(target=self._run_threaded, name="drive-upload", daemon=True).start()
+
+    def write(self, data):
+        if self.inline:
+            self._write_inline(data)
+            return
+        try:
+            self.queue.put(bytes(data), timeout=settings.DRIVE_UPLOAD_TIMEOUT)
+        except queue.Full:
+            raise DriveUploadError(f"Upload of {self.upload.name} stalled")
+
+    def close(self):
+        if self.inline:
+            self._run(self._finish_inline)
+        else:
+            self.queue.put(_END)
+
+    def abort(self):
+        if self.inline:
+            if not self.future.done():
+                self.upload.abort()
+                self._run(self._interrupted)
+            return
+        try:
+            self.queue.put_nowait(_ABORT)
+        except queue.Full:
+            pass  # the sender is still draining; it gives up on its own once input stops
+
+    def result(self, timeout=None):
+        """Drive metadata of the finished file (raises if the upload failed)."""
+        return self.future.result(timeout)
+
+    def _run(self, send):
+        try:
+            drive_file = send()
+        except Exception as e:
+            self.future.set_exception(e)
+            if self.on_done:
+                self.on_done(None, e)
+            return
+        self.future.set_result(drive_file)
+        if self.on_done:
+            self.on_done(drive_file, None)
+
+    def _run_threaded(self):
+        try:
+            self._run(self._send_all)
+        finally:
+            connection.close()  # progress updates opened one for this thread
+            _release_upload_slot()
+
+    def _write_inline(self, data):
+        if self.error is not None:
+            return  # keep consuming the request body; the failure is reported at close()
+        try:
+            self.upload.write(data)
+        except Exception as e:
+            self.error = e
+            self.upload.abort()
+
+    def _finish_inline(self):
+        if self.error is not None:
+            raise self.error
+        return self.upload.finish()
+
+    def _interrupted(self):
+        raise DriveUploadError(f"Upload of {self.upload.name} was interrupted")
+
+    def _send_all(self):
+        error = None
+        while True:
+            try:
+                item = self.queue.get(timeout=settings.DRIVE_UPLOAD_TIMEOUT)
+            except queue.Empty:
+                item = _ABORT  # the request went away mid-file
+            if item is _END or item is _ABORT:
+                break
+            if error is not None:
+                continue  # keep draining so the request thread never blocks on a dead upload
+            try:
+                self.upload.write(item)
+            except Exception as e:
+                error = e
+
+        if item is _ABORT or error is not None:
+            self.upload.abort()
+            if error is not None:
+                raise error
+            self._interrupted()
+        return self.upload.finish()
+
+
+class KnownCopyUpload:
+    """
+    Stands in for a BackgroundDriveUpload when the page's checksum for a file
+    matched one already in the target folder: nothing is sent to Drive. The
+    request body is still hashed as it arrives, and the existing file is only
+    reused if the checksum is confirmed.
+    """
+
+    def __init__(self, name, existing, md5_checksum, size, on_done=None):
+        self.name = name
+        self.existing = existing
+        self.expected = (md5_checksum, size)
+        self.on_done = on_done
+        self.md5 = hashlib.md5()
+        self.size = 0
+        self.future = Future()
+
+    def write(self, data):
+        self.md5.update(data)
+        self.size += len(data)
+
+    def close(self):
+        if (self.md5.hexdigest(), self.size) != self.expected:
+            self._done(None, DriveUploadError(f"{self.name} did not match the checksum the page sent; upload it again"))
+            return
+        print(f"[UPLOAD] {self.name} matches {self.existing['name']} ({self.existing['id']}), skipping the transfer")
+        try:
+            drive_file = reuse_existing_copy(get_drive_service(), self.existing, self.name)
+        except Exception as e:
+            self._done(None, e)
+            return
+        self._done(drive_file, None)
+
+    def abort(self):
+        if not self.future.done():
+            self._done(None, DriveUploadError(f"Upload of {self.name} was interrupted"))
+
+    def result(self, timeout=None):
+        return self.future.result(timeout)
+
+    def _done(self, drive_file, error):
+        if error is not None:
+            self.future.set_exception(error)
+        else:
+            self.future.set_result(drive_file)
+        if self.on_done:
+            self.on_done(drive_file, error)
+
+
+class UploadBatchProgress:
+    """
+    Per-file progress of one upload batch, kept in the database (UploadProgress)
+    so the page can poll it, through any worker process, while the upload POST
+    is still running. Each file's row is written only by the thread sending it.
+    """
+
+    TIMEOUT = 60 * 60  # rows of batches idle this long (seconds) are cleared out
+
+    def __init__(self, batch_id, owner_id):
+        self.batch_id = batch_id
+        self.owner_id = owner_id
+        self.files = 0
+        UploadProgress.objects.filter(
+            updated_at__lt=timezone.now() - datetime.timedelta(seconds=self.TIMEOUT)
+        ).delete()
+
+    def add_file(self, name):
+        """Start tracking a file; returns the key to pass to update()."""
+        row = UploadProgress.objects.create(
+            batch_id=self.batch_id, owner_id=self.owner_id, position=self.files, name=name
+        )
+        self.files += 1
+        return row.id
+
+    def update(self, file_key, **changes):
+        if changes.get("error") is None:
+            changes.pop("error", None)
+        UploadProgress.objects.filter(id=file_key).update(updated_at=timezone.now(), **changes)
+
+    @classmethod
+    def load(cls, batch_id, owner_id):
+        """Progress of every file in the batch, or None if the batch is unknown or not the owner's."""
+        rows = list(
+            UploadProgress.objects.filter(batch_id=batch_id, owner_id=owner_id)
+            .order_by("position").values("name", "sent", "size", "status", "error")
+        )
+        return rows or None
@@ -0,0 +1,151 @@
+import json
+import socket
+import struct
+import threading
+from concurrent.futures.process import BrokenProcessPool
+
+from django.conf import settings
+
+from langgraph_agents.services import transcription
+
+# Whisper and sentence-transformers models are served by `manage.py run_inference_daemon`
+# over a Unix socket, so every web and job worker shares models that are loaded once.
+# Messages are a 4-byte big-endian length followed by that many bytes of JSON.
+
+_HEADER = struct.Struct(">I")
+
+
+class InferenceError(Exception):
+    """The daemon answered, but the model call failed."""
+
+
+def send_message(sock, message):
+    data = json.dumps(message).encode("utf-8")
+    sock.sendall(_HEADER.pack(len(data)) + data)
+
+
+def _recv_exactly(sock, size):
+    chunks = []
+    while size:
+        chunk = sock.recv(min(size, 1024 * 1024))
+        if not chunk:
+            raise ConnectionError("Inference connection closed mid-message")
+        chunks.append(chunk)
+        size -= len(chunk)
+    return b"".join(chunks)
+
+
+def recv_message(sock):
+    """The next message on the socket, or None if the peer closed it between messages."""
+    header = sock.recv(_HEADER.size, socket.MSG_WAITALL)
+    if not header:
+        return None
+    if len(header) < _HEADER.size:
+        header += _recv_exactly(sock, _HEADER.size - len(header))
+    (size,) = _HEADER.unpack(header)
+    return json.loads(_recv_exactly(sock, size))
+
+
+def _call_daemon(request):
+    with socket.socket(socket.AF_UNIX, socket.SOCK_STREAM) as sock:
+        sock.settimeout(settings.INFERENCE_TIMEOUT)
+        sock.connect(str(settings.INFERENCE_SOCKET))
+        send_message(sock, request)
+        response = recv_message(sock)
+    if response is None:
+        raise ConnectionError("Inference daemon closed the connection")
+    if not response.get("ok"):
+        raise InferenceError(response.get("error", "unknown error"))
+    return response["result"]
+
+
+_warned_fallback = False
+
+
+def _call(request, run_locally):
+    global _warned_fallback
+    try:
+        return _call_daemon(request)
+    except (FileNotFoundError, ConnectionRefusedError) as e:
+        # No daemon running (e.g. in development): load the model into this process instead
+        if not settings.INFERENCE_LOCAL_FALLBACK:
+            raise
+        if not _warned_fallback:
+            print(f"[WARN] Inference daemon unavailable ({e}), running models in-process")
+            _warned_fallback = True
+        return run_locally()
+
+
+# ---------- Models (loaded once per process: the daemon's, or a worker's as fallback) ----------
+
+_models = {}  # name → (model, lock)
+_models_lock = threading.Lock()
+
+
+def load_model(name):
+    """Load one model instance ("embeddings"; Whisper lives in the transcription worker processes)."""
+    if name == "embeddings":
+        from sentence_transformers import SentenceTransformer
+
+        print(f"[INFO] Loading sentence-transformers {settings.EMBEDDING_MODEL}")
+        return SentenceTransformer(settings.EMBEDDING_MODEL)
+    raise ValueError(f"Unknown model {name!r}")
+
+
+def _with_local_model(name, run):
+    with _models_lock:
+        if name not in _models:
+            _models[name] = (load_model(name), threading.Lock())
+        model, lock = _models[name]
+    # One call at a time per instance: Whisper installs per-call hooks on the model
+    with lock:
+        return run(model)
+
+
+def run_transcription(path):
+    """Chunked transcription on this process's pool of Whisper worker processes."""
+    pool = transcription.get_pool(
+        settings.INFERENCE_REPLICAS.get("whisper", 1), settings.WHISPER_MODEL, settings.TRANSCRIBE_THREADS_PER_WORKER,
+        backend=settings.TRANSCRIBE_BACKEND, compute_type=settings.TRANSCRIBE_COMPUTE_TYPE,
+    )
+    try:
+        return transcription.transcribe_file(
+            path, pool,
+            target=settings.TRANSCRIBE_SEGMENT_SECONDS,
+            longest=settings.TRANSCRIBE_MAX_SEGMENT_SECONDS,
+            noise_db=settings.TRANSCRIBE_SILENCE_DB,
+            min_silence=settings.TRANSCRIBE_SILENCE_SECONDS,
+        )
+    except BrokenProcessPool:
+        transcription.reset_pool()  # a worker died (e.g. out of memory): start fresh next time
+        raise
+
+
+def run_embedding(model, texts, normalize):
+    return model.encode(texts, normalize_embeddings=normalize).tolist()
+
+
+# ---------- Client API ----------
+
+def transcribe_with_timestamps(path):
+    """
+    Whisper transcript of a local audio/video file (the daemon reads the same
+    filesystem): ``{"text": ..., "segments": [{"start", "end", "text"}, ...]}``.
+    """
+    return _call({"op": "transcribe", "path": str(path)}, lambda: run_transcription(str(path)))
+
+
+def transcribe(path):
+    return transcribe_with_timestamps(path)["text"]
+
+
+def embed_texts(texts, normalize=True):
+    """Sentence embeddings of ``texts`` as a numpy array, one row per text."""
+    import numpy as np
+
+    texts = list(texts)
+    vectors = _call(
+        {"op": "embed", "texts": texts, "normalize": normalize},
+        lambda: _with_local_model("embeddings", lambda model: run_embedding(model, texts, normalize)),
+    )
+    return np.asarray(vectors, dtype=np.float32)
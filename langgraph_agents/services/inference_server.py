@@ -0,0 +1,128 @@
+import os
+import queue
+import socketserver
+import threading
+import time
+from concurrent.futures import Future
+
+from django.conf import settings
+
+from langgraph_agents.services.inference import (
+    load_model, run_transcription, run_embedding, send_message, recv_message,
+)
+
+
+class ModelReplicas:
+    """A fixed set of loaded instances of one model; each call borrows one."""
+
+    def __init__(self, name, count):
+        self.name = name
+        self.pool = queue.Queue()
+        for _ in range(count):
+            self.pool.put(load_model(name))
+
+    def run(self, func, *args):
+        model = self.pool.get()
+        try:
+            return func(model, *args)
+        finally:
+            self.pool.put(model)
+
+
+class EmbeddingBatcher:
+    """
+    Collects embedding requests arriving within a short window and encodes them
+    as one batch per replica, which is far cheaper than many small encode calls.
+    """
+
+    def __init__(self, replicas, window, max_batch):
+        self.replicas = replicas
+        self.window = window
+        self.max_batch = max_batch
+        self.requests = queue.Queue()
+        for _ in range(replicas.pool.qsize()):
+            threading.Thread(target=self._loop, daemon=True, name="embed-batcher").start()
+
+    def embed(self, texts, normalize):
+        future = Future()
+        self.requests.put((texts, normalize, future))
+        return future.result()
+
+    def _take_batch(self):
+        batch = [self.requests.get()]
+        size = len(batch[0][0])
+        deadline = time.monotonic() + self.window
+        while size < self.max_batch:
+            remaining = deadline - time.monotonic()
+            if remaining <= 0:
+                break
+            try:
+                item = self.requests.get(timeout=remaining)
+            except queue.Empty:
+                break
+            batch.append(item)
+            size += len(item[0])
+        return batch
+
+    def _loop(self):
+        while True:
+            batch = self._take_batch()
+            # normalize is a per-request option: encode each setting as its own group
+            for normalize in {item[1] for item in batch}:
+                group = [item for item in batch if item[1] == normalize]
+                texts = [text for item in group for text in item[0]]
+                try:
+                    vectors = self.replicas.run(run_embedding, texts, normalize)
+                except Exception as e:
+                    for _, _, future in group:
+                        future.set_exception(e)
+                    continue
+                start = 0
+                for item_texts, _, future in group:
+                    future.set_result(vectors[start:start + len(item_texts)])
+                    start += len(item_texts)
+
+
+class InferenceServer(socketserver.ThreadingMixIn, socketserver.UnixStreamServer):
+    daemon_threads = True
+
+    def __init__(self, path, batcher):
+        self.batcher = batcher
+        if os.path.exists(path):
+            os.remove(path)  # left behind by a daemon that didn't shut down cleanly
+        super().__init__(str(path), InferenceHandler)
+        os.chmod(path, 0o660)  # web and job workers run as the same user/group
+
+    def handle_request_message(self, request):
+        op = request.get("op")
+        if op == "transcribe":
+            # Split into segments transcribed on the worker processes (see transcription)
+            return run_transcription(request["path"])
+        if op == "embed":
+            return self.batcher.embed(request["texts"], request.get("normalize", True))
+        raise ValueError(f"Unknown op {op!r}")
+
+
+class InferenceHandler(socketserver.BaseRequestHandler):
+    def handle(self):
+        while True:
+            request = recv_message(self.request)
+            if request is None:
+                return
+            started = time.monotonic()
+            try:
+                response = {"ok": True, "result": self.server.handle_request_message(request)}
+            except Exception as e:
+                print(f"[ERROR] Inference {request.get('op')} failed: {e}")
+                response = {"ok": False, "error": str(e)}
+            print(f"[INFO] Inference {request.get('op')} in {time.monotonic() - started:.2f}s")
+            send_message(self.request, response)
+
+
+def build_server(path=None):
+    """Load the configured model replicas and bind the daemon's socket."""
+    batcher = EmbeddingBatcher(
+        ModelReplicas("embeddings", settings.INFERENCE_REPLICAS.get("embeddings", 1)),
+        settings.INFERENCE_BATCH_WINDOW, settings.INFERENCE_MAX_BATCH,
+    )
+    return InferenceServer(path or settings.INFERENCE_SOCKET, batcher)
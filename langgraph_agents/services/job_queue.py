@@ -0,0 +1,129 @@
+import datetime
+import random
+import traceback
+import zlib
+
+from django.conf import settings
+from django.db import connection, transaction
+from django.db.models import Q
+from django.utils import timezone
+from django.utils.module_loading import import_string
+
+from accounts.models import Job
+
+
+def enqueue_job(kind, payload, max_attempts=None, delay=0):
+    """Queue a job for the workers and return it; ``payload`` must be JSON-serialisable."""
+    if kind not in settings.JOB_HANDLERS:
+        raise ValueError(f"No handler for job kind {kind!r}")
+    return Job.objects.create(
+        kind=kind,
+        payload=payload,
+        max_attempts=max_attempts or settings.JOB_MAX_ATTEMPTS,
+        run_after=timezone.now() + datetime.timedelta(seconds=delay),
+    )
+
+
+def _claimable(now):
+    # Queued and due, or running on a worker that stopped renewing its lock
+    return Q(status="queued", run_after__lte=now) | Q(status="running", locked_until__lt=now)
+
+
+# First key of the two-key advisory locks that serialise claims per job kind
+KIND_LOCK_NAMESPACE = 0x4A4F42  # "JOB"
+
+
+def _lock_kinds(kinds):
+    """
+    Hold a per-kind PostgreSQL advisory lock until the transaction ends, so two
+    workers can't both count a kind's running jobs and both see room for one more.
+    """
+    if connection.vendor != "postgresql":
+        return  # other backends (sqlite in development) serialise writers anyway
+    with connection.cursor() as cursor:
+        for kind in sorted(kinds):  # same order in every worker, so claims can't deadlock
+            key = zlib.crc32(kind.encode()) - 2 ** 31  # signed 32-bit
+            cursor.execute("SELECT pg_advisory_xact_lock(%s, %s)", [KIND_LOCK_NAMESPACE, key])
+
+
+def claim_jobs(worker_id, limit):
+    """
+    Lock up to ``limit`` due jobs for this worker. Rows another worker is
+    claiming at the same moment are skipped rather than waited for, and kinds
+    already at their settings.JOB_KIND_CONCURRENCY limit are left queued.
+    """
+    now = timezone.now()
+    lock_until = now + datetime.timedelta(seconds=settings.JOB_VISIBILITY_TIMEOUT)
+
+    with transaction.atomic():
+        candidates = list(
+            Job.objects.select_for_update(skip_locked=True)
+            .filter(_claimable(now))
+            .order_by("run_after", "id")[:limit * 4]
+        )
+        limited_kinds = {job.kind for job in candidates if job.kind in settings.JOB_KIND_CONCURRENCY}
+        _lock_kinds(limited_kinds)
+        running = {}
+        for kind in limited_kinds:
+            running[kind] = Job.objects.filter(kind=kind, status="running", locked_until__gte=now).count()
+
+        claimed = []
+        for job in candidates:
+            if len(claimed) == limit:
+                break
+            kind_limit = settings.JOB_KIND_CONCURRENCY.get(job.kind)
+            if kind_limit is not None:
+                if running[job.kind] >= kind_limit:
+                    continue
+                running[job.kind] += 1
+            job.status = "running"
+            job.attempts += 1
+            job.locked_by = worker_id
+            job.locked_until = lock_until
+            job.save(update_fields=["status", "attempts", "locked_by", "locked_until", "updated_at"])
+            claimed.append(job)
+        return claimed
+
+
+def extend_locks(worker_id, job_ids):
+    """Push the visibility timeout of this worker's running jobs forward (heartbeat)."""
+    lock_until = timezone.now() + datetime.timedelta(seconds=settings.JOB_VISIBILITY_TIMEOUT)
+    return Job.objects.filter(id__in=job_ids, locked_by=worker_id, status="running").update(
+        locked_until=lock_until
+    )
+
+
+def retry_delay(attempt):
+    """Jittered exponential backoff before attempt ``attempt + 1``."""
+    delay = min(settings.JOB_RETRY_MAX_DELAY, settings.JOB_RETRY_BASE_DELAY * 2 ** (attempt - 1))
+    return random.uniform(delay / 2, delay)
+
+
+def run_job(job, worker_id):
+    """Run one claimed job and record the outcome (done, queued for a retry, or failed)."""
+    handler = import_string(settings.JOB_HANDLERS[job.kind])
+    try:
+        result = handler(**job.payload)
+    except Exception as e:
+        error = "".join(traceback.format_exception(e))
+        if job.attempts >= job.max_attempts:
+            print(f"[ERROR] Job {job} failed for good: {e}")
+            changes = {"status": "failed"}
+        else:
+            delay = retry_delay(job.attempts)
+            print(f"[WARN] Job {job} failed ({e}), retrying in {delay:.0f}s")
+            changes = {"status": "queued", "run_after": timezone.now() + datetime.timedelta(seconds=delay)}
+        # Only if the lock is still ours: a worker that lost it must not overwrite the new owner
+        Job.objects.filter(id=job.id, locked_by=worker_id, status="running").update(
+            last_error=error, locked_until=None, updated_at=timezone.now(), **changes
+        )
+        return False
+
+    updated = Job.objects.filter(id=job.id, locked_by=worker_id, status="running").update(
+        status="done", result=result, locked_until=None, updated_at=timezone.now()
+    )
+    if not updated:
+        print(f"[WARN] Job {job.kind} #{job.id} finished after its lock expired; it may run again")
+        return False
+    print(f"[INFO] Job {job.kind} #{job.id} done")
+    return True
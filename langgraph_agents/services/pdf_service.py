@@ -1,37 +1,111 @@
-import io
+import multiprocessing
+import threading
+from concurrent.futures import ThreadPoolExecutor, ProcessPoolExecutor
+from concurrent.futures.process import BrokenProcessPool
 
-from PyPDF2 import PdfReader
-from googleapiclient.http import MediaIoBaseDownload
+from django.conf import settings
+from django.db import connection
 
-from langgraph_agents.services.drive_service import get_drive_service
+from langgraph_agents.services.content_store import get_content_store
+from langgraph_agents.services.derivative_cache import lookup_derived_text, store_derived_text
+from langgraph_agents.services.pdf_text import parse_pdf_file
+
+# Bump when extraction changes, so cached texts (see derivative_cache) are redone
+PDF_TEXT_EXTRACTOR = f"{settings.PDF_TEXT_ENGINE}/2:{settings.PDF_TEXT_MAX_PAGES}:{settings.PDF_TEXT_MAX_CHARS}"
+
+
+def _parse_args():
+    # parse_pdf_file's max_pages, max_chars and engine
+    return settings.PDF_TEXT_MAX_PAGES, settings.PDF_TEXT_MAX_CHARS, settings.PDF_TEXT_ENGINE
+
+
+def extract_pdf_text(file_id, metadata=None):
+    """
+    Extract the readable text of a stored PDF, up to settings.PDF_TEXT_MAX_PAGES
+    pages and PDF_TEXT_MAX_CHARS characters; raises if it can't be read.
+    """
+    # Open the file (downloaded from Drive, or memory-mapped from local disk)
+    with get_content_store().open(file_id, metadata) as file_stream:
+        return parse_pdf_file(file_stream, *_parse_args())
 
 
 def download_and_read_pdf(file_id: str) -> str:
     """
-    Downloads a PDF from Google Drive and extracts all readable text.
+    Reads a PDF from the content store (Google Drive by default) and extracts all readable text.
     """
     try:
-        service = get_drive_service()
+        return extract_pdf_text(file_id)
+    except Exception as e:
+        print(f"[ERROR] Failed to download or read PDF ({file_id}): {e}")
+        return ""
 
-        # 1️⃣ Download file bytes from Google Drive
-        request = service.files().get_media(fileId=file_id)
-        file_stream = io.BytesIO()
-        downloader = MediaIoBaseDownload(file_stream, request)
 
-        done = False
-        while not done:
-            status, done = downloader.next_chunk()
+_parse_pool = None
+_parse_pool_lock = threading.Lock()
 
-        file_stream.seek(0)
 
-        # 2️⃣ Read PDF text using PyPDF2
-        reader = PdfReader(file_stream)
-        text = ""
-        for page in reader.pages:
-            text += page.extract_text() or ""
+def _get_parse_pool():
+    """
+    The process-wide pool that parses PDFs outside this process's GIL. Workers are
+    spawned (not forked from a threaded Django process) and only import pdf_text.
+    """
+    global _parse_pool
+    with _parse_pool_lock:
+        if _parse_pool is None:
+            _parse_pool = ProcessPoolExecutor(
+                max_workers=settings.PDF_PARSE_WORKERS, mp_context=multiprocessing.get_context("spawn")
+            )
+        return _parse_pool
 
-        return text.strip()
 
-    except Exception as e:
-        print(f"[ERROR] Failed to download or read PDF ({file_id}): {e}")
-        return ""
+def _reset_parse_pool():
+    global _parse_pool
+    with _parse_pool_lock:
+        _parse_pool = None
+
+
+def _fetch_and_parse(store, f):
+    # Runs on a download thread: get the file onto local disk, then hand the path to a parser process
+    try:
+        path = store.local_path(f["id"], f)
+        if not path or not settings.PDF_PARSE_WORKERS:
+            return extract_pdf_text(f["id"], f)
+        try:
+            return _get_parse_pool().submit(parse_pdf_file, path, *_parse_args()).result()
+        except BrokenProcessPool:
+            # A parser process died (e.g. killed for memory): start a fresh pool next time, parse this one here
+            _reset_parse_pool()
+            return extract_pdf_text(f["id"], f)
+        except FileNotFoundError:
+            # Evicted from the download cache before the parser opened it
+            return extract_pdf_text(f["id"], f)
+    finally:
+        connection.close()
+
+
+def extract_pdf_texts(files):
+    """
+    Text of several stored PDFs, in the order given (None where a PDF couldn't be
+    read). Cached texts are reused; the rest are downloaded on a thread pool
+    (settings.PDF_DOWNLOAD_WORKERS) and each one is parsed in a worker process
+    (settings.PDF_PARSE_WORKERS) as soon as it arrives, so a chapter takes about
+    as long as its largest PDF.
+    """
+    store = get_content_store()
+    files = list(files)
+    texts = [lookup_derived_text(f, "pdf_text", PDF_TEXT_EXTRACTOR) for f in files]
+    missing = [i for i, text in enumerate(texts) if text is None]
+    if not missing:
+        return texts
+
+    with ThreadPoolExecutor(max_workers=min(settings.PDF_DOWNLOAD_WORKERS, len(missing)),
+                            thread_name_prefix="pdf-download") as pool:
+        futures = {i: pool.submit(_fetch_and_parse, store, files[i]) for i in missing}
+        for i, future in futures.items():
+            try:
+                texts[i] = future.result()
+            except Exception as e:
+                print(f"[ERROR] Failed to download or read PDF ({files[i]['id']}): {e}")
+                continue
+            store_derived_text(files[i], "pdf_text", PDF_TEXT_EXTRACTOR, texts[i])
+    return texts
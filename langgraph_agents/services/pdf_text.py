@@ -0,0 +1,174 @@
+# PDF text extraction that needs nothing but the PDF library, so it can run in
+# worker processes (see pdf_service.extract_pdf_texts) without setting up Django.
+# Text comes out one page at a time, so callers can stop early and never hold
+# more than the text they keep.
+
+import io
+import os
+import shutil
+import tempfile
+import threading
+from contextlib import closing, contextmanager
+
+# Non-seekable streams are copied to memory up to this size, to a temp file above it
+SPOOL_MAX_MEMORY = 8 * 1024 * 1024
+
+
+@contextmanager
+def _seekable(source, spool_max_memory):
+    """``source`` itself if PDF libraries can open it (a path or a seekable file), else a spooled copy."""
+    if isinstance(source, (str, os.PathLike)) or _is_seekable(source):
+        yield source
+        return
+    with tempfile.SpooledTemporaryFile(max_size=spool_max_memory, prefix="pdf-") as spool:
+        shutil.copyfileobj(source, spool, 1024 * 1024)
+        spool.seek(0)
+        yield spool
+
+
+def _is_seekable(fileobj):
+    try:
+        return fileobj.seekable()
+    except (AttributeError, ValueError):
+        return hasattr(fileobj, "seek")  # e.g. mmap, which has no seekable()
+
+
+@contextmanager
+def _binary_file(source):
+    if isinstance(source, (str, os.PathLike)):
+        with open(source, "rb") as f:
+            yield f
+    else:
+        yield source
+
+
+# PDFium is not thread-safe: calls from different threads of one process take turns
+_pdfium_lock = threading.Lock()
+
+
+class _BlockReader(io.RawIOBase):
+    """
+    A seekable reader without readinto (e.g. an mmap of a local file) as the kind of
+    stream pypdfium2 loads from: PDFium asks for one block at a time, so the PDF is
+    never copied into memory whole.
+    """
+
+    def __init__(self, source):
+        super().__init__()
+        self._source = source
+
+    def readable(self):
+        return True
+
+    def seekable(self):
+        return True
+
+    def seek(self, offset, whence=io.SEEK_SET):
+        self._source.seek(offset, whence)
+        return self._source.tell()
+
+    def tell(self):
+        return self._source.tell()
+
+    def readinto(self, buffer):
+        view = memoryview(buffer).cast("B")
+        data = self._source.read(len(view))
+        view[:len(data)] = data
+        return len(data)
+
+
+def _pypdfium2_pages(source):
+    # PDFium (Chrome's PDF engine) through pypdfium2: native code, text in reading order
+    import pypdfium2 as pdfium
+
+    if isinstance(source, os.PathLike):
+        source = str(source)
+    elif not isinstance(source, str) and not hasattr(source, "readinto"):
+        source = _BlockReader(source)
+    with _pdfium_lock:
+        pdf = pdfium.PdfDocument(source)
+    try:
+        for index in range(len(pdf)):
+            with _pdfium_lock:
+                page = pdf[index]
+                textpage = page.get_textpage()
+                text = textpage.get_text_range()
+                textpage.close()
+                page.close()
+            yield text.replace("\r\n", "\n")
+    finally:
+        with _pdfium_lock:
+            pdf.close()
+
+
+def _pdfminer_pages(source):
+    # pdfminer.six without layout analysis: characters in content-stream order, no line or word grouping
+    from pdfminer.converter import TextConverter
+    from pdfminer.pdfinterp import PDFPageInterpreter, PDFResourceManager
+    from pdfminer.pdfpage import PDFPage
+
+    resources = PDFResourceManager(caching=True)
+    out = io.StringIO()
+    device = TextConverter(resources, out, laparams=None)
+    interpreter = PDFPageInterpreter(resources, device)
+    try:
+        with _binary_file(source) as f:
+            for page in PDFPage.get_pages(f):
+                interpreter.process_page(page)
+                yield out.getvalue()
+                out.seek(0)
+                out.truncate()
+    finally:
+        device.close()
+
+
+def _pypdf2_pages(source):
+    from PyPDF2 import PdfReader
+
+    for page in PdfReader(source).pages:
+        yield page.extract_text() or ""
+
+
+def _pdfplumber_pages(source):
+    # Layout-aware: keeps a table row or a heading on one line, but the slowest
+    import pdfplumber
+
+    with pdfplumber.open(source) as pdf:
+        for page in pdf.pages:
+            yield page.extract_text() or ""
+            page.close()  # drop the page's parsed layout objects
+
+
+# Text extraction engines by name; each yields the text of every page of a path or seekable file
+ENGINES = {
+    "pypdfium2": _pypdfium2_pages,
+    "pdfminer": _pdfminer_pages,
+    "pypdf2": _pypdf2_pages,
+    "pdfplumber": _pdfplumber_pages,
+}
+
+DEFAULT_ENGINE = "pypdfium2"
+
+
+def iter_pdf_pages(source, max_pages=None, max_chars=None, engine=DEFAULT_ENGINE, spool_max_memory=SPOOL_MAX_MEMORY):
+    """
+    Yield the text of each page of a PDF (a path or a binary file object), in
+    order. Stops after ``max_pages`` pages, or once ``max_chars`` characters
+    have been yielded (the last page is cut short to fit). ``engine`` is one of ENGINES.
+    """
+    if engine not in ENGINES:
+        raise ValueError(f"Unknown PDF engine {engine!r} (choose from {', '.join(ENGINES)})")
+    with _seekable(source, spool_max_memory) as pdf, closing(ENGINES[engine](pdf)) as pages:
+        remaining = max_chars
+        for number, text in enumerate(pages, 1):
+            if remaining is not None:
+                text = text[:remaining]
+                remaining -= len(text)
+            yield text
+            if number == max_pages or remaining == 0:
+                break
+
+
+def parse_pdf_file(source, max_pages=None, max_chars=None, engine=DEFAULT_ENGINE, separator=""):
+    """Readable text of a PDF, from a path or a binary file object, within the page and character limits."""
+    return separator.join(iter_pdf_pages(source, max_pages, max_chars, engine)).strip()
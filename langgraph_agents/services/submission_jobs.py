@@ -0,0 +1,28 @@
+import asyncio
+
+from django.db import transaction
+
+from langgraph_agents.services.job_queue import enqueue_job
+
+
+# Handlers for the job queue (see settings.JOB_HANDLERS); each takes the job payload as keyword arguments.
+
+def record_submission(state):
+    """Record the confirmed submission, then queue its evaluation."""
+    from langgraph_agents.agents.submission_agent import record_submission_to_db
+
+    # One transaction, so a retry never finds the submission recorded but its evaluation unqueued
+    with transaction.atomic():
+        upload = record_submission_to_db(state["contributor_id"], state["chapter_id"], state["drive_folders"])
+        if upload is None:
+            raise RuntimeError(f"Chapter {state['chapter_id']} not found")
+        evaluation = enqueue_job("evaluate_submission", {"state": dict(state, upload_id=upload.id)})
+    return {"status": "submission_recorded", "upload_id": upload.id, "evaluation_job": evaluation.id}
+
+
+def evaluate_submission(state):
+    """Run the LangGraph evaluation workflow for a recorded submission."""
+    from langgraph_agents.graph.workflow import compiled_graph
+
+    result = asyncio.run(compiled_graph.ainvoke(state))
+    return {"status": result.get("status"), "scores": result.get("scores", {})}
@@ -0,0 +1,206 @@
+# Chunked Whisper transcription: ffmpeg extracts a 16 kHz mono track, the track
+# is cut at silences into segments of a few minutes, and the segments are
+# transcribed in parallel worker processes with one of the BACKENDS. Nothing
+# here needs Django, so the workers (spawned, each holding one loaded model)
+# only import this module.
+
+import importlib.util
+import multiprocessing
+import os
+import re
+import shutil
+import subprocess
+import tempfile
+import threading
+import wave
+from concurrent.futures import ProcessPoolExecutor
+
+SAMPLE_RATE = 16000
+
+_SILENCE_RE = re.compile(r"silence_(start|end): (-?[\d.]+)")
+
+
+def extract_audio(source, wav_path):
+    """Write the source's audio as 16 kHz mono 16-bit WAV (Whisper's input format)."""
+    subprocess.run(
+        ["ffmpeg", "-nostdin", "-v", "error", "-y", "-i", str(source),
+         "-vn", "-ac", "1", "-ar", str(SAMPLE_RATE), "-c:a", "pcm_s16le", str(wav_path)],
+        check=True, capture_output=True,
+    )
+
+
+def wav_duration(wav_path):
+    with wave.open(str(wav_path), "rb") as w:
+        return w.getnframes() / w.getframerate()
+
+
+def find_silences(wav_path, noise_db, min_silence):
+    """(start, end) of every silence of at least ``min_silence`` seconds below ``noise_db``."""
+    result = subprocess.run(
+        ["ffmpeg", "-nostdin", "-i", str(wav_path),
+         "-af", f"silencedetect=noise={noise_db}dB:d={min_silence}", "-f", "null", "-"],
+        check=True, capture_output=True, text=True,
+    )
+    silences, start = [], None
+    for kind, value in _SILENCE_RE.findall(result.stderr):
+        if kind == "start":
+            start = max(float(value), 0.0)
+        elif start is not None:
+            silences.append((start, float(value)))
+            start = None
+    return silences
+
+
+def plan_segments(duration, silences, target, longest):
+    """
+    Split [0, duration] into segments of about ``target`` seconds, never longer
+    than ``longest``, cutting in the middle of the silence nearest the target.
+    """
+    cuts = sorted((start + end) / 2 for start, end in silences)
+    segments, cursor = [], 0.0
+    while duration - cursor > longest:
+        candidates = [c for c in cuts if cursor + target / 2 <= c <= cursor + longest]
+        cut = min(candidates, key=lambda c: abs(c - cursor - target)) if candidates else cursor + target
+        segments.append((cursor, cut))
+        cursor = cut
+    segments.append((cursor, duration))
+    return segments
+
+
+# ---------- Backends ----------
+
+class FasterWhisperBackend:
+    """CTranslate2 re-implementation of Whisper (faster-whisper); int8 weights run several times faster on CPU."""
+
+    name = "faster-whisper"
+    package = "faster_whisper"
+
+    def load(self, model_name, threads, compute_type):
+        from faster_whisper import WhisperModel
+
+        return WhisperModel(model_name, device="cpu", compute_type=compute_type, cpu_threads=threads)
+
+    def transcribe(self, model, samples):
+        # Greedy decoding, like openai-whisper's default
+        segments, _ = model.transcribe(samples, beam_size=1)
+        return [(s.start, s.end, s.text) for s in segments]
+
+
+class OpenAIWhisperBackend:
+    """The reference openai-whisper package (PyTorch, fp32 on CPU)."""
+
+    name = "openai-whisper"
+    package = "whisper"
+
+    def load(self, model_name, threads, compute_type):
+        import torch
+        import whisper
+
+        torch.set_num_threads(threads)  # workers share the cores instead of each grabbing all of them
+        return whisper.load_model(model_name, device="cpu")
+
+    def transcribe(self, model, samples):
+        result = model.transcribe(samples, fp16=False)
+        return [(s["start"], s["end"], s["text"]) for s in result.get("segments", [])]
+
+
+BACKENDS = {backend.name: backend for backend in (FasterWhisperBackend(), OpenAIWhisperBackend())}
+
+# Used when the configured backend's package isn't installed
+FALLBACK_BACKEND = "openai-whisper"
+
+
+def resolve_backend(name):
+    """
+    The backend that will actually run for the configured ``name``: the fallback
+    if the configured one's package isn't installed. Checked without importing
+    the package, so cache keys and reports can name the real backend up front.
+    """
+    if name not in BACKENDS:
+        raise ValueError(f"Unknown transcription backend {name!r} (choose from {', '.join(BACKENDS)})")
+    if name != FALLBACK_BACKEND and importlib.util.find_spec(BACKENDS[name].package) is None:
+        return FALLBACK_BACKEND
+    return name
+
+
+# ---------- Worker processes ----------
+
+_backend = None
+_model = None
+
+
+def _init_worker(backend_name, model_name, threads, compute_type):
+    global _backend, _model
+    # The parent already picked an installed backend (see resolve_backend)
+    _backend = BACKENDS[backend_name]
+    _model = _backend.load(model_name, threads, compute_type)
+
+
+def _read_samples(wav_path, start, end):
+    import numpy as np
+
+    with wave.open(str(wav_path), "rb") as w:
+        w.setpos(int(start * SAMPLE_RATE))
+        frames = w.readframes(int((end - start) * SAMPLE_RATE))
+    return np.frombuffer(frames, dtype=np.int16).astype(np.float32) / 32768.0
+
+
+def _transcribe_segment(wav_path, start, end):
+    return [
+        {"start": round(start + seg_start, 2), "end": round(start + seg_end, 2), "text": text.strip()}
+        for seg_start, seg_end, text in _backend.transcribe(_model, _read_samples(wav_path, start, end))
+    ]
+
+
+_pools = {}
+_pool_lock = threading.Lock()
+
+
+def get_pool(workers, model_name, threads_per_worker, backend="faster-whisper", compute_type="int8"):
+    """
+    A process-wide pool of transcription workers for this configuration, each with
+    the model loaded once. ``backend`` falls back as described in resolve_backend.
+    """
+    resolved = resolve_backend(backend)
+    key = (workers, resolved, model_name, threads_per_worker, compute_type)
+    with _pool_lock:
+        if key not in _pools:
+            if resolved != backend:
+                print(f"[WARN] {backend} is not installed, transcribing with {resolved}")
+            _pools[key] = ProcessPoolExecutor(
+                max_workers=workers,
+                mp_context=multiprocessing.get_context("spawn"),
+                initializer=_init_worker,
+                initargs=(resolved, model_name, threads_per_worker, compute_type),
+            )
+        return _pools[key]
+
+
+def reset_pool():
+    with _pool_lock:
+        for pool in _pools.values():
+            pool.shutdown(wait=False, cancel_futures=True)
+        _pools.clear()
+
+
+def transcribe_file(source, pool, target=120, longest=180, noise_db=-30, min_silence=0.5):
+    """
+    Transcribe an audio/video file on ``pool`` (see get_pool). Returns
+    ``{"text": ..., "segments": [{"start", "end", "text"}, ...]}`` with timestamps
+    in seconds from the start of the file, in order.
+    """
+    if not shutil.which("ffmpeg"):
+        raise RuntimeError("ffmpeg is required for transcription")
+
+    with tempfile.TemporaryDirectory(prefix="transcribe-") as tmp:
+        wav_path = os.path.join(tmp, "audio.wav")
+        extract_audio(source, wav_path)
+        duration = wav_duration(wav_path)
+        silences = find_silences(wav_path, noise_db, min_silence) if duration > longest else []
+        plan = plan_segments(duration, silences, target, longest)
+        print(f"[INFO] Transcribing {duration:.0f}s of audio in {len(plan)} segment(s)")
+
+        futures = [pool.submit(_transcribe_segment, wav_path, start, end) for start, end in plan]
+        segments = [segment for future in futures for segment in future.result()]
+
+    return {"text": " ".join(s["text"] for s in segments if s["text"]), "segments": segments}
@@ -27,13 +27,21 @@ from langgraph_agents.services.drive_service import get_drive_service
 #
 #     return state
 
-import whisper
-import torch
 import os
 
+from django.conf import settings
+
+from langgraph_agents.services.inference import transcribe
+from langgraph_agents.services.transcription import resolve_backend
+
+# Bump when the model or transcription options change, so cached transcripts (see derivative_cache) are redone.
+# Names the backend that really runs, which is the fallback when the configured one isn't installed.
+TRANSCRIPT_EXTRACTOR = f"{resolve_backend(settings.TRANSCRIBE_BACKEND)}-{settings.WHISPER_MODEL}/2"
+
 def transcribe_audio_or_video(state: dict) -> dict:
     """
-    Transcribes local audio/video using Whisper.
+    Transcribes local audio/video using Whisper (served by the inference daemon,
+    so the model isn't reloaded for every video).
     Stores transcript in state['transcript'].
     """
     file_path = state.get("file_path")
@@ -42,12 +50,8 @@ def transcribe_audio_or_video(state: dict) -> dict:
         return state
 
     try:
-        device = "cuda" if torch.cuda.is_available() else "cpu"
-        model = whisper.load_model("tiny", device=device)
-
-        print(f"[INFO] Transcribing: {file_path} using {device.upper()}")
-        result = model.transcribe(file_path, fp16=False)
-        transcript = result.get("text", "").strip()
+        print(f"[INFO] Transcribing: {file_path}")
+        transcript = transcribe(file_path)
 
         state["transcript"] = transcript
         print(f"[INFO] Transcription complete — {len(transcript)} characters")
@@ -56,5 +60,3 @@ def transcribe_audio_or_video(state: dict) -> dict:
         state["transcript"] = f"[ERROR] {e}"
 
     return state
-
-
@@ -0,0 +1,207 @@
+import io
+import mmap
+import tempfile
+from pathlib import Path
+from unittest import mock
+
+import httplib2
+from django.test import SimpleTestCase, TestCase, override_settings
+from google.auth.exceptions import RefreshError
+from googleapiclient.errors import HttpError
+
+from accounts.models import DriveFolder
+from langgraph_agents.management.commands.benchmark_pdf_extraction import text_fidelity
+from langgraph_agents.management.commands.benchmark_transcription import word_error_rate
+from langgraph_agents.services import contributor_files, drive_batch, pdf_text
+from langgraph_agents.services.content_store import LocalContentStore
+
+
+class LocalContentStoreDeleteTests(SimpleTestCase):
+    def setUp(self):
+        tmp = tempfile.TemporaryDirectory()
+        self.addCleanup(tmp.cleanup)
+        self.root = Path(tmp.name)
+        (self.root / "chapter").mkdir()
+        (self.root / "chapter" / "notes.pdf").write_bytes(b"%PDF")
+        self.store = LocalContentStore(self.root)
+
+    def test_deletes_a_file(self):
+        errors = self.store.delete(["chapter/notes.pdf"])
+        self.assertIsNone(errors["chapter/notes.pdf"])
+        self.assertFalse((self.root / "chapter" / "notes.pdf").exists())
+
+    def test_refuses_the_store_root(self):
+        errors = self.store.delete(["", ".", "chapter/.."])
+        self.assertTrue(all(error is not None for error in errors.values()))
+        self.assertTrue((self.root / "chapter" / "notes.pdf").exists())
+
+    def test_refuses_folders_and_paths_outside_the_store(self):
+        errors = self.store.delete(["chapter", "../outside.pdf"])
+        self.assertIsInstance(errors["chapter"], IsADirectoryError)
+        self.assertIsNotNone(errors["../outside.pdf"])
+        self.assertTrue((self.root / "chapter" / "notes.pdf").exists())
+
+
+class _FolderStore:
+    """Content store whose folders and listings fail for the type roots named in ``broken``."""
+
+    def __init__(self, broken_find=(), broken_list=(), error=OSError):
+        self.broken_find, self.broken_list, self.error = broken_find, broken_list, error
+
+    def find_folder(self, path):
+        if path[1] in self.broken_find:
+            raise self.error(f"cannot resolve {path[1]}")
+        return f"{path[1]}-folder"
+
+    def list_files(self, folder_ids):
+        if len(folder_ids) > 1 and self.broken_list:
+            raise OSError("combined listing failed")
+        for folder_id in folder_ids:
+            if folder_id.removesuffix("-folder") in self.broken_list:
+                raise self.error(f"cannot list {folder_id}")
+            yield {"id": f"{folder_id}-file", "name": "a.pdf", "mimeType": "application/pdf", "parents": [folder_id]}
+
+
+@override_settings(GOOGLE_DRIVE_FOLDERS={"drafts": "drafts", "pdf": "pdf", "videos": "videos"})
+class ListContributorFilesTests(SimpleTestCase):
+    def list_with(self, store):
+        with mock.patch.object(contributor_files, "get_content_store", return_value=store):
+            return contributor_files.list_contributor_files(7, 1, 2, ["drafts", "pdf", "videos"])
+
+    def test_lists_every_type_in_order(self):
+        files = self.list_with(_FolderStore())
+        self.assertEqual([f["type"] for f in files], ["drafts", "pdf", "videos"])
+
+    def test_a_failed_folder_chain_leaves_the_other_types(self):
+        files = self.list_with(_FolderStore(broken_find={"drafts"}))
+        self.assertEqual([f["type"] for f in files], ["pdf", "videos"])
+
+    def test_a_failed_listing_leaves_the_other_types(self):
+        files = self.list_with(_FolderStore(broken_list={"videos"}))
+        self.assertEqual([f["type"] for f in files], ["drafts", "pdf"])
+
+    def test_an_expired_token_is_raised(self):
+        with self.assertRaises(RefreshError):
+            self.list_with(_FolderStore(broken_find={"pdf"}, error=RefreshError))
+        with self.assertRaises(RefreshError):
+            self.list_with(_FolderStore(broken_list={"pdf"}, error=RefreshError))
+
+
+def _http_error(status):
+    return HttpError(httplib2.Response({"status": status}), b"{}")
+
+
+class _FakeRequest:
+    def __init__(self, method, outcomes):
+        self.method = method
+        self.outcomes = list(outcomes)  # response or exception per attempt
+
+
+class _FakeBatch:
+    def __init__(self, service, callback):
+        self.service, self.callback, self.items = service, callback, []
+
+    def add(self, request, request_id):
+        self.items.append((request_id, request))
+
+    def execute(self):
+        self.service.batches.append(len(self.items))
+        if self.service.transport_errors:
+            raise self.service.transport_errors.pop(0)
+        for request_id, request in self.items:
+            outcome = request.outcomes.pop(0)
+            if isinstance(outcome, Exception):
+                self.callback(request_id, None, outcome)
+            else:
+                self.callback(request_id, outcome, None)
+
+
+class _FakeBatchService:
+    def __init__(self, transport_errors=()):
+        self.batches = []
+        self.transport_errors = list(transport_errors)
+
+    def new_batch_http_request(self, callback):
+        return _FakeBatch(self, callback)
+
+
+@mock.patch("langgraph_agents.services.drive_resilience.time.sleep")
+@mock.patch.object(drive_batch.time, "sleep")
+class ExecuteBatchTests(SimpleTestCase):
+    def test_only_failed_items_are_sent_again(self, *sleeps):
+        service = _FakeBatchService()
+        results = drive_batch.execute_batch(service, {
+            "ok": _FakeRequest("PATCH", [{"id": "ok"}]),
+            "flaky": _FakeRequest("PATCH", [_http_error(503), {"id": "flaky"}]),
+            "missing": _FakeRequest("PATCH", [_http_error(404)]),
+        })
+        self.assertEqual(service.batches, [3, 1])
+        self.assertEqual(results["ok"], ({"id": "ok"}, None))
+        self.assertEqual(results["flaky"], ({"id": "flaky"}, None))
+        self.assertEqual(results["missing"][1].resp.status, 404)
+
+    def test_batch_of_creates_is_not_resent_after_a_timeout(self, *sleeps):
+        service = _FakeBatchService(transport_errors=[TimeoutError("timed out")])
+        results = drive_batch.execute_batch(service, {
+            "a": _FakeRequest("POST", [{"id": "a"}]),
+            "b": _FakeRequest("POST", [{"id": "b"}]),
+        })
+        self.assertEqual(service.batches, [2])
+        self.assertTrue(all(isinstance(error, TimeoutError) for _, error in results.values()))
+
+    def test_idempotent_batch_is_resent_after_a_timeout(self, *sleeps):
+        service = _FakeBatchService(transport_errors=[TimeoutError("timed out")])
+        results = drive_batch.execute_batch(service, {"a": _FakeRequest("GET", [{"id": "a"}])})
+        self.assertEqual(service.batches, [1, 1])
+        self.assertEqual(results["a"], ({"id": "a"}, None))
+
+
+class BatchCreateFoldersTests(TestCase):
+    def test_created_folders_are_indexed_when_another_create_fails(self):
+        outcomes = {"made": [{"id": "made-id"}], "failed": [_http_error(400)]}
+        batch_service = _FakeBatchService()
+        service = mock.Mock()
+        service.files.return_value.list.side_effect = lambda **kwargs: _FakeRequest("GET", [{"files": []}])
+        service.files.return_value.create.side_effect = \
+            lambda body, fields: _FakeRequest("POST", outcomes[body["name"]])
+        service.new_batch_http_request.side_effect = lambda callback: _FakeBatch(batch_service, callback)
+
+        with self.assertRaises(HttpError):
+            drive_batch.batch_get_or_create_folders(service, [("failed", "parent"), ("made", "parent")])
+        self.assertEqual(
+            list(DriveFolder.objects.values_list("parent_id", "name", "drive_id")), [("parent", "made", "made-id")]
+        )
+
+
+class BlockReaderTests(SimpleTestCase):
+    def test_reads_an_mmap_block_by_block(self):
+        with tempfile.TemporaryFile() as f:
+            f.write(b"%PDF-1.4 " + bytes(range(256)) * 4)
+            f.flush()
+            with mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ) as mapped:
+                reader = pdf_text._BlockReader(mapped)
+                buffer = bytearray(4)
+                self.assertEqual(reader.readinto(buffer), 4)
+                self.assertEqual(bytes(buffer), b"%PDF")
+                reader.seek(-2, io.SEEK_END)
+                self.assertEqual(reader.readinto(buffer), 2)
+                self.assertEqual(bytes(buffer[:2]), bytes([254, 255]))
+                self.assertEqual(reader.readinto(buffer), 0)
+
+
+class BenchmarkMetricTests(SimpleTestCase):
+    def test_text_fidelity(self):
+        self.assertEqual(text_fidelity("The quick brown fox", "the QUICK, brown fox!"), 1.0)
+        self.assertEqual(text_fidelity("fox jumps", "jumps fox"), 1.0)  # order isn't compared
+        self.assertAlmostEqual(text_fidelity("a b c d", "a b"), 2 / 3)  # precision 1, recall 1/2
+        self.assertEqual(text_fidelity("a b", "c d"), 0.0)
+        self.assertEqual(text_fidelity("", ""), 1.0)
+        self.assertEqual(text_fidelity("a", ""), 0.0)
+
+    def test_word_error_rate(self):
+        self.assertEqual(word_error_rate("Hello, world.", "hello world"), 0.0)
+        self.assertEqual(word_error_rate("the cat sat", "the bat sat"), 1 / 3)  # one substitution
+        self.assertEqual(word_error_rate("the cat sat", "the cat"), 1 / 3)  # one deletion
+        self.assertEqual(word_error_rate("the cat", "the big cat sat"), 1.0)  # two insertions
+        self.assertEqual(word_error_rate("", ""), 0.0)
+        self.assertEqual(word_error_rate("", "noise"), 1.0)
@@ -152,6 +152,69 @@ GOOGLE_DRIVE_FOLDERS = {
 }
 GOOGLE_CREDENTIALS_FILE = BASE_DIR / "oer-content-e7c6695272bb_service_acc.json"
 GOOGLE_TOKEN_FILE = BASE_DIR / "token.json"  # Path to your saved OAuth token
+DRIVE_FOLDER_INDEX_SIZE = 2048  # folder-path → Drive ID entries kept in memory per worker (backed by DriveFolder table)
+DRIVE_LISTING_WORKERS = 8  # threads resolving Drive folder chains concurrently for the contributor file panels
+DRIVE_LIST_PAGE_SIZE = 1000  # files per Drive listing page (Drive's maximum); further pages are fetched lazily
+DRIVE_SYNC_INTERVAL = 30  # seconds between change-feed reads in `manage.py sync_drive_changes`
+DRIVE_MIRROR_MAX_AGE = 300  # listings come from the DriveFile mirror only if it was synced this recently
+DRIVE_CACHE_DIR = os.getenv("DRIVE_CACHE_DIR", BASE_DIR / "drive_cache")  # local copies of downloaded Drive files
+DRIVE_CACHE_MAX_BYTES = 2 * 1024 * 1024 * 1024  # least recently used copies are evicted past this size
+DRIVE_STREAM_BLOCK_SIZE = 1024 * 1024  # bytes read at a time from the ranged Drive request when streaming video
+DRIVE_RATE_LIMIT = 10  # Drive API calls per second per worker process (token bucket shared by all threads)
+DRIVE_RATE_BURST = 20  # calls allowed back to back before the rate limit applies
+DRIVE_MAX_RETRIES = 5  # retries for throttled / 5xx / network failures, with jittered exponential backoff
+DRIVE_BACKOFF_BASE = 0.5  # seconds; retry n waits up to base * 2^n
+DRIVE_BACKOFF_MAX = 32  # seconds; cap on a single backoff
+DRIVE_CIRCUIT_FAILURES = 5  # consecutive failed calls before Drive calls are refused for a while
+DRIVE_CIRCUIT_COOLDOWN = 30  # seconds the circuit stays open before one trial call is let through
+DRIVE_STALE_LISTING_TTL = 24 * 60 * 60  # seconds a last known listing may be served while Drive is down
+DRIVE_LAYOUT = os.getenv("DRIVE_LAYOUT", "nested")  # "nested": type/contributor_course_chapter/topic folders; "flat": one folder, files tagged with appProperties
+DRIVE_FLAT_FOLDER = "files"  # folder under oer_content holding every content file in the "flat" layout
+DRIVE_HTTP_TRANSPORT = "pooled"  # "pooled": shared keep-alive connection pool; "httplib2": one connection set per thread
+DRIVE_HTTP_POOL_SIZE = 20  # keep-alive connections per Google host shared by all threads of a worker
+DRIVE_HTTP_CONNECT_TIMEOUT = 10  # seconds
+DRIVE_HTTP_READ_TIMEOUT = 60  # seconds
+DRIVE_UPLOAD_CHUNK_SIZE = 8 * 1024 * 1024  # bytes per resumable-upload request (rounded down to a 256 KiB multiple)
+DRIVE_UPLOAD_MAX_RETRIES = 5  # per chunk, resuming from the last byte Drive acknowledged
+DRIVE_UPLOAD_TIMEOUT = 120  # seconds per upload request
+DRIVE_UPLOAD_CONCURRENCY = 4  # files sent to Drive from background threads per worker process (more are sent inline)
+DRIVE_UPLOAD_DEDUPE = True  # reuse a file with the same MD5 already in the target folder instead of storing a copy
+DRIVE_UPLOAD_QUEUE_CHUNKS = 64  # request-body chunks (64 KiB each) buffered per file before the request waits on Drive
+JOB_HANDLERS = {  # Job.kind → handler, run by `manage.py run_job_worker`
+    "record_submission": "langgraph_agents.services.submission_jobs.record_submission",
+    "evaluate_submission": "langgraph_agents.services.submission_jobs.evaluate_submission",
+}
+JOB_KIND_CONCURRENCY = {"evaluate_submission": 2}  # jobs of a kind running at once across all workers
+JOB_WORKER_CONCURRENCY = 4  # jobs one worker process runs at the same time
+JOB_MAX_ATTEMPTS = 5  # a job failing this many times is marked failed
+JOB_RETRY_BASE_DELAY = 30  # seconds; retry n waits about base * 2^(n-1), jittered
+JOB_RETRY_MAX_DELAY = 30 * 60  # seconds; cap on a single retry delay
+JOB_VISIBILITY_TIMEOUT = 10 * 60  # seconds a claimed job stays locked without a worker heartbeat
+JOB_POLL_INTERVAL = 2  # seconds between polls of an idle worker
+PDF_DOWNLOAD_WORKERS = 8  # PDFs of a chapter fetched from the content store at the same time
+PDF_PARSE_WORKERS = os.cpu_count() or 2  # processes parsing PDF text in parallel (0: parse in the download threads)
+PDF_TEXT_ENGINE = "pypdfium2"  # engine for evaluation text, see pdf_text.ENGINES and `manage.py benchmark_pdf_extraction`
+SYLLABUS_PDF_ENGINE = "pdfplumber"  # syllabus parsing matches table rows line by line; keep layout-aware text
+PDF_TEXT_MAX_PAGES = 1000  # pages of a PDF whose text is extracted for evaluation (None: all)
+PDF_TEXT_MAX_CHARS = 2_000_000  # characters of text kept per PDF (None: all)
+WHISPER_MODEL = "tiny"  # Whisper model used for video transcripts
+EMBEDDING_MODEL = "all-MiniLM-L6-v2"  # sentence-transformers model used for expertise clustering
+INFERENCE_SOCKET = os.getenv("INFERENCE_SOCKET", BASE_DIR / "inference.sock")  # Unix socket of `manage.py run_inference_daemon`
+INFERENCE_LOCAL_FALLBACK = True  # without a running daemon, load the models into the calling process (once)
+INFERENCE_REPLICAS = {"whisper": 4, "embeddings": 1}  # model instances kept loaded (Whisper: one per transcription process)
+INFERENCE_BATCH_WINDOW = 0.02  # seconds the daemon waits to batch embedding requests together
+INFERENCE_MAX_BATCH = 256  # texts per embedding batch
+TRANSCRIBE_BACKEND = os.getenv("TRANSCRIBE_BACKEND", "faster-whisper")  # "faster-whisper" (CTranslate2) or "openai-whisper"
+TRANSCRIBE_COMPUTE_TYPE = "int8"  # faster-whisper weight type on CPU: "int8", "int8_float32", "float32"
+TRANSCRIBE_SEGMENT_SECONDS = 120  # audio is cut at the silence nearest this length and segments transcribed in parallel
+TRANSCRIBE_MAX_SEGMENT_SECONDS = 180  # hard cut if there is no silence before this
+TRANSCRIBE_SILENCE_DB = -30  # below this level counts as silence
+TRANSCRIBE_SILENCE_SECONDS = 0.5  # shortest pause that can be cut at
+TRANSCRIBE_THREADS_PER_WORKER = 2  # torch threads per Whisper process (processes x threads ≈ cores)
+INFERENCE_TIMEOUT = 30 * 60  # seconds a worker waits for one inference call (long videos)
+CONTENT_STORE = os.getenv("CONTENT_STORE", "drive")  # where contributor content lives: "drive" or "local"
+CONTENT_STORE_ROOT = os.getenv("CONTENT_STORE_ROOT", BASE_DIR / "content_store")  # root directory of the "local" store
+CONTENT_STORE_ACCEL_REDIRECT = os.getenv("CONTENT_STORE_ACCEL_REDIRECT", "")  # e.g. "/protected/": nginx serves local files
 
 
 import os